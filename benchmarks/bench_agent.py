@@ -0,0 +1,33 @@
+"""
+Benchmarks for complete negotiations between two agents.
+"""
+
+from harness import Case, benchmark
+from scenarios import make_scenario, size_params
+
+from pyneg.agent import make_linear_concession_agent, make_linear_random_agent
+
+FACTORIES = {
+    "concession": lambda name, neg_space, utilities: make_linear_concession_agent(
+        name, neg_space, utilities, 0.5, -1000),
+    "random": lambda name, neg_space, utilities: make_linear_random_agent(
+        name, neg_space, utilities, 0.5, -1000, rng=0),
+}
+
+
+@benchmark(*[dict(params, agents=agents)
+             for params in size_params("lex", "random")
+             for agents in FACTORIES])
+def bench_agent_negotiate(scenario, issues, values, agents):
+    neg_space, utilities_a, utilities_b = make_scenario(scenario, issues, values)
+    factory = FACTORIES[agents]
+
+    def setup():
+        return (factory("A", neg_space, utilities_a),
+                factory("B", neg_space, utilities_b))
+
+    def run(pair):
+        agent_a, agent_b = pair
+        agent_a.negotiate(agent_b)
+
+    return Case(run, setup)
@@ -0,0 +1,51 @@
+"""
+Benchmarks for constructing, hashing, comparing and encoding offers.
+"""
+
+from harness import Case, benchmark
+from scenarios import make_scenario, random_offers, size_params
+
+from pyneg.comms import Message, MessageCodec, Offer
+from pyneg.types import MessageType
+
+
+@benchmark(*size_params("random"))
+def bench_offer_construction(scenario, issues, values):
+    neg_space, _, _ = make_scenario(scenario, issues, values)
+    offer = random_offers(neg_space, 1)[0]
+    nested = {issue: dict(dist) for issue, dist in offer.values_by_issue.items()}
+    return Case(lambda _: Offer(nested))
+
+
+@benchmark(*size_params("random"))
+def bench_offer_hashing(scenario, issues, values):
+    neg_space, _, _ = make_scenario(scenario, issues, values)
+    offers = random_offers(neg_space, 100)
+    return Case(lambda _: {offer: None for offer in offers}, ops=len(offers))
+
+
+@benchmark(*size_params("random"))
+def bench_offer_equality(scenario, issues, values):
+    neg_space, _, _ = make_scenario(scenario, issues, values)
+    offers = random_offers(neg_space, 100)
+    copies = [Offer({issue: dict(dist) for issue, dist in offer.values_by_issue.items()})
+              for offer in offers]
+    return Case(lambda _: [a == b for a, b in zip(offers, copies)], ops=len(offers))
+
+
+@benchmark(*size_params("random"))
+def bench_message_encoding(scenario, issues, values):
+    neg_space, _, _ = make_scenario(scenario, issues, values)
+    codec = MessageCodec(neg_space)
+    messages = [Message("A", "B", MessageType.OFFER, offer)
+                for offer in random_offers(neg_space, 100)]
+    return Case(lambda _: [codec.encode(msg) for msg in messages], ops=len(messages))
+
+
+@benchmark(*size_params("random"))
+def bench_message_decoding(scenario, issues, values):
+    neg_space, _, _ = make_scenario(scenario, issues, values)
+    codec = MessageCodec(neg_space)
+    encoded = [codec.encode(Message("A", "B", MessageType.OFFER, offer))
+               for offer in random_offers(neg_space, 100)]
+    return Case(lambda _: [codec.decode(data) for data in encoded], ops=len(encoded))
@@ -0,0 +1,115 @@
+"""
+Benchmarks for the evaluators and generators in :mod:`pyneg.engine`.
+"""
+
+from itertools import cycle
+
+from harness import Case, benchmark
+from scenarios import make_scenario, random_offers, size_params, uniform_weights
+
+from pyneg.engine import (ConstraintDiscovery, EnumGenerator, KnowledgeBase, LinearEvaluator,
+                          ProblogEvaluator, RandomGenerator)
+from pyneg.utils import atom_from_issue_value, issue_value_tuple_from_atom
+
+NON_AGREEMENT_COST = -1000
+
+
+def max_utility(utilities, weights) -> float:
+    best = {}
+    for atom, util in utilities.items():
+        issue, _ = issue_value_tuple_from_atom(atom)
+        best[issue] = max(best.get(issue, util), util)
+    return sum(util * weights[issue] for issue, util in best.items())
+
+
+@benchmark(*size_params("lex", "random"))
+def bench_linear_evaluator_calc_offer_utility(scenario, issues, values):
+    neg_space, utilities, _ = make_scenario(scenario, issues, values)
+    evaluator = LinearEvaluator(utilities, uniform_weights(neg_space), NON_AGREEMENT_COST)
+    offers = random_offers(neg_space, 100)
+
+    def run(_):
+        for offer in offers:
+            evaluator.calc_offer_utility(offer)
+
+    return Case(run, ops=len(offers))
+
+
+@benchmark(*size_params("lex", "random"))
+def bench_enum_generator_generate_offer(scenario, issues, values):
+    neg_space, utilities, _ = make_scenario(scenario, issues, values)
+    weights = uniform_weights(neg_space)
+    numb_offers = min(100, values ** issues)
+
+    def setup():
+        evaluator = LinearEvaluator(utilities, weights, NON_AGREEMENT_COST)
+        return EnumGenerator(neg_space, utilities, evaluator, 0)
+
+    def run(generator):
+        for _ in range(numb_offers):
+            generator.generate_offer()
+
+    return Case(run, setup, ops=numb_offers)
+
+
+@benchmark(*[dict(params, threshold=threshold)
+             for params in size_params("random")
+             for threshold in [0.5, 0.8, 0.9]])
+def bench_random_generator_generate_offer(scenario, issues, values, threshold):
+    neg_space, utilities, _ = make_scenario(scenario, issues, values)
+    weights = uniform_weights(neg_space)
+    absolute_threshold = threshold * max_utility(utilities, weights)
+    numb_offers = 10
+
+    def setup():
+        evaluator = LinearEvaluator(utilities, weights, NON_AGREEMENT_COST)
+        return RandomGenerator(neg_space, utilities, evaluator, NON_AGREEMENT_COST, [],
+                               absolute_threshold, numb_offers,
+                               max_generation_tries=10000, rng=0)
+
+    def run(generator):
+        # tight thresholds may exhaust the tries, which is part of what we're timing
+        try:
+            for _ in range(numb_offers):
+                generator.generate_offer()
+        except StopIteration:
+            pass
+
+    return Case(run, setup, ops=numb_offers)
+
+
+@benchmark(*size_params("random", sizes=[(10, 10), (100, 10)]))
+def bench_constraint_discovery_after_update(scenario, issues, values):
+    neg_space, utilities, _ = make_scenario(scenario, issues, values)
+    threshold = 0.5 * max_utility(utilities, dict.fromkeys(neg_space, 1))
+    knowledge = KnowledgeBase(utilities)
+    discovery = ConstraintDiscovery(neg_space, knowledge)
+    discovery.discover(threshold)
+    # lower the utility of a single assignment at a time, like a received message would
+    updates = cycle([{atom_from_issue_value(issue, str(value)): -1.0}
+                     for issue, values in neg_space.items() for value in values])
+
+    def run(_):
+        knowledge.add_utilities(next(updates))
+        discovery.discover(threshold)
+
+    return Case(run)
+
+
+KNOWLEDGE_BASE = [
+    "bonus :- issue0_0, issue1_1.",
+    "0.5::penalty :- issue0_2.",
+    "issue1_0 :- bonus.",
+]
+
+
+@benchmark(*size_params("random", sizes=[(3, 3), (5, 5)]))
+def bench_problog_evaluator_calc_offer_utility(scenario, issues, values):
+    neg_space, utilities, _ = make_scenario(scenario, issues, values)
+    utilities = dict(utilities, bonus=50.0, penalty=-50.0)
+    evaluator = ProblogEvaluator(neg_space, utilities, NON_AGREEMENT_COST, KNOWLEDGE_BASE)
+    offers = cycle(random_offers(neg_space, 100))
+    # compile the model outside of the timing
+    evaluator.calc_offer_utility(next(offers))
+
+    return Case(lambda _: evaluator.calc_offer_utility(next(offers)))
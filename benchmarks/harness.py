@@ -0,0 +1,174 @@
+"""
+A small harness for timing the hot paths of PyNeg. Benchmarks are registered with the
+:func:`benchmark` decorator in the `bench_*.py` modules of this directory and run by `run.py`.
+
+A benchmark is a function that takes its parameters as keyword arguments, does whatever setup
+is needed and returns a :class:`Case` describing what to time. If the case has a `setup`
+function it is called before every timed call, outside of the timing, and its result is
+passed to `run`. That is needed for anything stateful, like generators that run out of offers.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+FORMAT_NAME = "pyneg-benchmarks"
+FORMAT_VERSION = 1
+
+
+class Case(NamedTuple):
+    """
+    What a benchmark times. `ops` is the number of operations a single call of `run` performs,
+    e.g. the number of offers it generates, and is used to report throughput.
+    """
+    run: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+    ops: int = 1
+
+
+class Benchmark(NamedTuple):
+    """
+    A registered benchmark together with the parameter sets it should be run with.
+    """
+    name: str
+    func: Callable[..., Case]
+    params: List[Dict[str, Any]]
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(*params: Dict[str, Any]) -> Callable[[Callable[..., Case]], Callable[..., Case]]:
+    """
+    Registers the decorated function as a benchmark, which is run once for every given set
+    of parameters, or once without parameters if none are given.
+    The name of the benchmark is the name of the function without a `bench_` prefix.
+    """
+    def register(func: Callable[..., Case]) -> Callable[..., Case]:
+        name = func.__name__
+        if name.startswith("bench_"):
+            name = name[len("bench_"):]
+        BENCHMARKS.append(Benchmark(name, func, list(params) or [{}]))
+        return func
+
+    return register
+
+
+def _time_calls(case: Case, number: int) -> float:
+    """
+    Returns the total time `number` calls of the case take.
+    """
+    if case.setup is None:
+        start = perf_counter()
+        for _ in range(number):
+            case.run(None)
+        return perf_counter() - start
+
+    total = 0.0
+    for _ in range(number):
+        state = case.setup()
+        start = perf_counter()
+        case.run(state)
+        total += perf_counter() - start
+    return total
+
+
+def time_case(case: Case, min_time: float = 0.2, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Times a case like :mod:`timeit` does: the number of calls per repeat is increased until a
+    repeat takes at least `min_time` seconds, after which `repeats` repeats are timed.
+    All times are reported per call.
+    """
+    number = 1
+    while True:
+        elapsed = _time_calls(case, number)
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    times = [elapsed / number]
+    times.extend(_time_calls(case, number) / number for _ in range(repeats - 1))
+    median = statistics.median(times)
+
+    return {"ops": case.ops,
+            "number": number,
+            "repeats": repeats,
+            "min": min(times),
+            "median": median,
+            "mean": statistics.mean(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "ops_per_sec": case.ops / median if median > 0 else None}
+
+
+def _version(distribution: str) -> Optional[str]:
+    try:
+        # pylint: disable=import-outside-toplevel
+        from importlib import metadata as importlib_metadata
+    except ImportError:
+        # python < 3.8
+        try:
+            return getattr(__import__(distribution), "__version__", None)
+        except ImportError:
+            return None
+
+    try:
+        return importlib_metadata.version(distribution)
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> Dict[str, Any]:
+    """
+    Describes the machine and versions the benchmarks ran on, so results can be compared.
+    """
+    return {"timestamp": datetime.now(timezone.utc).isoformat(),
+            "pyneg": _version("pyneg"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "numpy": _version("numpy"),
+            "problog": _version("problog"),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()}
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """
+    Identifies a result by its benchmark and parameters, for comparisons between runs.
+    """
+    return "{}[{}]".format(result["name"], ",".join(
+        "{}={}".format(key, value) for key, value in sorted(result["params"].items())))
+
+
+def save_results(path: str, results: List[Dict[str, Any]]) -> None:
+    with open(path, "w") as file:
+        json.dump({"format": FORMAT_NAME,
+                   "version": FORMAT_VERSION,
+                   "metadata": metadata(),
+                   "results": results}, file, indent=2)
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    with open(path) as file:
+        data = json.load(file)
+    if data.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} does not contain benchmark results")
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark results version: {data.get('version')}")
+    return data["results"]
@@ -0,0 +1,92 @@
+"""
+Runs the PyNeg benchmarks and saves the results as JSON, e.g.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --filter evaluator --compare results.json
+
+When comparing, the ratio of every median to the baseline is printed, and the exit code is 1
+if any benchmark got slower than `--max-slowdown` allows.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from glob import glob
+from typing import Dict, List, Optional
+
+from harness import BENCHMARKS, load_results, result_key, save_results, time_case
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_benchmarks() -> None:
+    # make sure the benchmarks run against this checkout rather than an installed version
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+    for path in sorted(glob(os.path.join(BENCHMARK_DIR, "bench_*.py"))):
+        importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+
+
+def run(name_filter: Optional[str], min_time: float, repeats: int) -> List[Dict]:
+    results = []
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.name:
+            continue
+        for params in bench.params:
+            result = {"name": bench.name, "params": params}
+            result.update(time_case(bench.func(**params), min_time, repeats))
+            print("{:<70} {:>12.3f} us {:>14.1f} ops/s".format(
+                result_key(result), result["median"] * 1e6, result["ops_per_sec"] or 0))
+            results.append(result)
+
+    return results
+
+
+def compare(results: List[Dict], baseline_path: str, max_slowdown: float) -> bool:
+    baseline = {result_key(result): result for result in load_results(baseline_path)}
+    ok = True
+    print("\nCompared to {}:".format(baseline_path))
+    for result in results:
+        key = result_key(result)
+        if key not in baseline:
+            print("{:<70} {:>10}".format(key, "new"))
+            continue
+        ratio = result["median"] / baseline[key]["median"]
+        slower = ratio > max_slowdown
+        ok = ok and not slower
+        print("{:<70} {:>9.2f}x{}".format(key, ratio, "  SLOWER" if slower else ""))
+
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the PyNeg benchmarks")
+    parser.add_argument("--output", "-o", help="file to save the results to as JSON")
+    parser.add_argument("--filter", "-k", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimal duration of a single repeat in seconds")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats")
+    parser.add_argument("--quick", action="store_true",
+                        help="short repeats, for checking the benchmarks work")
+    parser.add_argument("--compare", help="results of an earlier run to compare to")
+    parser.add_argument("--max-slowdown", type=float, default=1.25,
+                        help="ratio to the baseline above which a benchmark counts as slower")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.min_time = 0.0
+        args.repeats = 1
+
+    load_benchmarks()
+    results = run(args.filter, args.min_time, args.repeats)
+    if args.output:
+        save_results(args.output, results)
+
+    if args.compare and not compare(results, args.compare, args.max_slowdown):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+The scenarios the benchmarks run on, built from the scenario generators in :mod:`pyneg.utils`
+so every run of the benchmarks uses exactly the same negotiations.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pyneg.comms import CompactOffer, NegSpaceSchema, Offer
+from pyneg.types import AtomicDict, NegSpace
+from pyneg.utils import (generate_lex_utility_matrices, generate_random_scenario,
+                         neg_scenario_from_util_matrices)
+
+Scenario = Tuple[NegSpace, AtomicDict, AtomicDict]
+
+# (number of issues, number of values per issue)
+SIZES = [(3, 3), (5, 5), (10, 10)]
+SEED = 2020
+
+
+def lex_scenario(issues: int, values: int) -> Scenario:
+    return neg_scenario_from_util_matrices(*generate_lex_utility_matrices((issues, values), 2))
+
+
+def random_scenario(issues: int, values: int, constraints: int = 0) -> Scenario:
+    return neg_scenario_from_util_matrices(
+        *generate_random_scenario((issues, values), constraints, rng=SEED))
+
+
+def make_scenario(kind: str, issues: int, values: int) -> Scenario:
+    if kind == "lex":
+        return lex_scenario(issues, values)
+    if kind == "random":
+        return random_scenario(issues, values)
+    raise ValueError(f"Unknown scenario kind: {kind}")
+
+
+def uniform_weights(neg_space: NegSpace) -> Dict[str, float]:
+    return {issue: 1 / len(neg_space) for issue in neg_space}
+
+
+def random_offers(neg_space: NegSpace, numb: int) -> List[Offer]:
+    schema = NegSpaceSchema(neg_space)
+    rng = np.random.default_rng(SEED)
+    indices = rng.integers(0, schema.cardinalities(), (numb, len(schema)))
+    return [CompactOffer(schema, row).to_offer() for row in indices]
+
+
+def size_params(*kinds: str, sizes=None) -> List[Dict]:
+    return [{"scenario": kind, "issues": issues, "values": values}
+            for kind in kinds for issues, values in (sizes or SIZES)]
@@ -6,6 +6,8 @@ It contains the following submodules:
 - agent
 - engine
 - utils
+- tournament
+- analysis
 
 see :ref:`API` or :ref:`Getting Started` in the docs for more information.
 """
@@ -15,3 +17,5 @@ from pyneg import types
 from pyneg import utils
 from pyneg import agent
 from pyneg import engine
+from pyneg import tournament
+from pyneg import analysis
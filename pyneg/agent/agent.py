@@ -2,10 +2,12 @@
 communication logic and the main negotiation loop is defined.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 
-from pyneg.comms import AtomicConstraint, Message, Offer
-from pyneg.engine import AbstractEngine
+from pyneg.agent.negotiation_session import NegotiationSession
+from pyneg.comms import (AtomicConstraint, InMemoryTranscript, Message, Offer,
+                         TranscriptSink)
+from pyneg.engine import AbstractEngine, MetricsSink
 from pyneg.types import MessageType, NegSpace
 
 
@@ -18,11 +20,15 @@ class Agent:
      Public Methods:
        - receive_negotiation_request(self, opponent: Agent, neg_space: NegSpace) -> bool:
        - negotiate(self, opponent: Agent) -> bool:
+       - step(self, incoming: Optional[Message]) -> Optional[Message]
+       - exit_negotiation(self) -> Message
        - send_message(self, opponent: Agent, msg: Message) -> None
        - receive_message(self, msg: Message) -> None
        - generate_next_message(self) -> Message
        - add_utilities(self, new_utils: Dict[str, float]) -> bool
        - set_utilities(self, new_utils: Dict[str, float]) -> bool
+       - set_transcript_sink(self, sink: TranscriptSink) -> None
+       - set_metrics_sink(self, sink: Optional[MetricsSink]) -> None
     """
     # pylint: disable=too-many-instance-attributes
     def __init__(self) -> None:
@@ -31,7 +37,9 @@ class Agent:
             to make the linters a bit happier.
         """
         self.name: str = "" #: Name of the agent. mainly used for logging
-        self._transcript: List[Message] = []
+        self._transcript: TranscriptSink = InMemoryTranscript()
+        self._last_message: Optional[Message] = None
+        self._metrics: Optional[MetricsSink] = None
         self._max_rounds: int = 0
         self._neg_space: NegSpace = {}
         self._engine: AbstractEngine = AbstractEngine()
@@ -100,7 +108,9 @@ class Agent:
 
     def negotiate(self, opponent: 'Agent') -> bool:
         """
-        This is the entrypoint to run a negotiation, and where the main loop is located.
+        This is the entrypoint to run a negotiation. The main loop is run by a
+        :class:`NegotiationSession`, use one directly to limit the number of rounds
+        or the time the negotiation may take.
         `self` is assumed to have set up the negotiation before hand, meaning that it must
         have both a neotiation space and a utility function defined. This should be the case if
         the agent was created by the factory. See :doc:`/usage/agent-setup` for more information.
@@ -111,25 +121,54 @@ class Agent:
         :rtype: bool
         """
         # self is assumed to have setup the negotiation (including issues) beforehand
-        self.negotiation_active = self._call_for_negotiation(
-            opponent, self._neg_space)
+        return NegotiationSession(self, opponent, metrics=self._metrics).run()
 
-        if not self.negotiation_active or not self.opponent:
-            return self.successful
+    def step(self, incoming: Optional[Message]) -> Optional[Message]:
+        """
+        Takes a single turn in the negotiation: records and parses the incoming message and
+        generates the response, which is also recorded. Pass None to make the opening move.
+        Returns None when the negotiation is over and nothing needs to be sent back.
+
+        :param incoming: The last message of the opponent, if any
+        :type incoming: Optional[Message]
+        :return: The message to send to the opponent
+        :rtype: Optional[Message]
+        """
+        if incoming is not None:
+            if self._metrics is None:
+                self.receive_message(incoming)
+            else:
+                with self._metrics.timer("agent.receive_message"):
+                    self.receive_message(incoming)
 
-        next_message_to_send = Message(self.name, self.opponent.name, MessageType.EMPTY, None)
-        while self.negotiation_active:
-            try:
-                next_message_to_send = self.generate_next_message()
-            except StopIteration:
-                # raised when no acceptable offers can be found
-                self.send_message(opponent, self._terminate(False))
-                break
+        if not self.negotiation_active:
+            return None
 
-            self.send_message(opponent, next_message_to_send)
-            self._wait_for_response(self.opponent)
+        try:
+            if self._metrics is None:
+                outgoing = self.generate_next_message()
+            else:
+                with self._metrics.timer("agent.generate_next_message"):
+                    outgoing = self.generate_next_message()
+        except StopIteration:
+            # raised when no acceptable offers can be found
+            outgoing = self._terminate(False)
 
-        return self.successful
+        self._record_message(outgoing)
+        return outgoing
+
+    def exit_negotiation(self) -> Message:
+        """
+        Ends the current negotiation without agreement and returns the message
+        that tells the opponent so, which is also recorded.
+
+        :raises RuntimeError: Raised if no negotiation is active
+        :return: The message to send to the opponent
+        :rtype: Message
+        """
+        msg = self._terminate(False)
+        self._record_message(msg)
+        return msg
 
     def _terminate(self, successful: bool) -> Message:
         """
@@ -155,7 +194,7 @@ class Agent:
             return Message(self.name,
                            self.opponent.name,
                            MessageType.ACCEPT,
-                           self._transcript[-1].offer)
+                           self._last_message.offer if self._last_message else None)
 
         self.successful = False
         self.negotiation_active = False
@@ -182,6 +221,29 @@ class Agent:
             return
         sender.send_message(self, sender.generate_next_message())
 
+    def set_transcript_sink(self, sink: TranscriptSink) -> None:
+        """
+        Sets where the messages of the negotiation are recorded. By default they are kept
+        in memory, see :mod:`pyneg.comms.transcript` for writers that stream them to disk.
+        The agent does not close the sink.
+
+        :param sink: The sink to record messages in
+        :type sink: TranscriptSink
+        """
+        self._transcript = sink
+
+    def set_metrics_sink(self, sink: Optional[MetricsSink]) -> None:
+        """
+        Sets the sink that the agent, its engine and the negotiations it starts report
+        timings and counters to, see :mod:`pyneg.engine.metrics`. Pass None to stop
+        reporting, which is the default, in which case nothing is measured.
+
+        :param sink: The sink to report to
+        :type sink: Optional[MetricsSink]
+        """
+        self._metrics = sink
+        self._engine.set_metrics_sink(sink)
+
     def _record_message(self, msg: Message) -> None:
         """
         appends message to transcript
@@ -189,7 +251,8 @@ class Agent:
         :param msg: The message to be appended
         :type msg: Message
         """
-        self._transcript.append(msg)
+        self._last_message = msg
+        self._transcript.record(msg)
 
     def receive_message(self, msg: Message) -> None:
         """
@@ -18,11 +18,12 @@ from typing import Dict, List, Optional, Set, Union
 from numpy import isclose
 
 from pyneg.comms import AtomicConstraint
-from pyneg.engine import (ConstrainedEnumGenerator, ConstrainedLinearEvaluator,
+from pyneg.engine import (CachingEvaluator, ConstrainedEnumGenerator,
+                          ConstrainedLinearEvaluator,
                           ConstrainedRandomGenerator, Engine, EnumGenerator,
                           Evaluator, Generator, LinearEvaluator,
                           ProblogEvaluator, RandomGenerator)
-from pyneg.types import NegSpace
+from pyneg.types import NegSpace, RandomSeed
 from pyneg.utils import issue_value_tuple_from_atom, nested_dict_from_atom_dict
 
 from . import Agent, ConstrainedAgent
@@ -120,7 +121,8 @@ def make_linear_random_agent(
         reservation_value: float,
         non_agreement_cost: float,
         issue_weights: Optional[Dict[str, float]] = None,
-        max_rounds: int = None) -> Agent:
+        max_rounds: int = None,
+        rng: RandomSeed = None) -> Agent:
     """
     This agent calculates utility in a linear additive way using numpy as a backend.
     it also uses numpy to generate random offers by sampling from the strategy distribution.
@@ -144,6 +146,9 @@ def make_linear_random_agent(
     :param max_rounds: Maximum number of rounds the agent will try to generate an offer. \
         This is to make sure that even impossible negotiations terminate. Defaults to 200
     :type max_rounds: int, optional
+    :param rng: Seed or numpy random Generator used to sample offers. \
+        Pass one to make the negotiation reproducible.
+    :type rng: RandomSeed, optional
     :return:  The agent with the correct mechanisms initialised.
     :rtype: Agent
     """
@@ -177,7 +182,8 @@ def make_linear_random_agent(
         non_agreement_cost,
         [],
         reservation_value,
-        max_rounds)
+        max_rounds,
+        rng=rng)
 
     engine = Engine(generator, evaluator)
     if isclose(reservation_value, 0):
@@ -195,7 +201,9 @@ def make_random_agent(
         reservation_value: Union[float, int],
         non_agreement_cost: float,
         knowledge_base: List[str],
-        max_rounds: int = None) -> Agent:
+        max_rounds: int = None,
+        rng: RandomSeed = None,
+        cache_size: Optional[int] = None) -> Agent:
     """
     This agent uses ProbLog as a backend to evaluate offers. That means that it can
     handle non-linear utility functions and non trivial (probabalistic) knowledge bases.
@@ -218,6 +226,12 @@ def make_random_agent(
     :param max_rounds: Maximum number of rounds the agent will try to generate an offer. \
         This is to make sure that even impossible negotiations terminate. Defaults to 200
     :type max_rounds: int, optional
+    :param rng: Seed or numpy random Generator used to sample offers. \
+        Pass one to make the negotiation reproducible.
+    :type rng: RandomSeed, optional
+    :param cache_size: If given, the utilities of up to this many offers are cached \
+        so they don't have to be evaluated by ProbLog again, see :class:`CachingEvaluator`
+    :type cache_size: int, optional
     :return:  The agent with the correct mechanisms initialised.
     :rtype: Agent
     """
@@ -239,13 +253,15 @@ def make_random_agent(
                                             utilities,
                                             non_agreement_cost,
                                             knowledge_base)
+    if cache_size is not None:
+        evaluator = CachingEvaluator(evaluator, cache_size)
     generator: Generator = RandomGenerator(
         neg_space,
         utilities,
         evaluator,
         reservation_value,
         knowledge_base,
-        reservation_value, max_rounds)
+        reservation_value, max_rounds, rng=rng)
 
     engine = Engine(generator, evaluator)
     if isclose(reservation_value, 0):
@@ -353,7 +369,8 @@ def make_constrained_linear_random_agent(
         issue_weights: Optional[Dict[str, float]] = None,
         initial_constraints: Optional[Set[AtomicConstraint]] = None,
         max_rounds: int = None,
-        auto_constraints=True) -> ConstrainedAgent:
+        auto_constraints=True,
+        rng: RandomSeed = None) -> ConstrainedAgent:
     """
     [summary]
 
@@ -387,6 +404,9 @@ def make_constrained_linear_random_agent(
         whether constraints can be created. ONly works for linear additive utility functions.
         defaults to True
     :type auto_constraints: bool
+    :param rng: Seed or numpy random Generator used to sample offers. \
+        Pass one to make the negotiation reproducible.
+    :type rng: RandomSeed, optional
     :return: The agent with the correct mechanisms initialised.
     :rtype: ConstrainedAgent
     """
@@ -432,7 +452,8 @@ def make_constrained_linear_random_agent(
         max_rounds,
         constr_value,
         initial_constraints,
-        auto_constraints=auto_constraints)
+        auto_constraints=auto_constraints,
+        rng=rng)
 
     engine: Engine = Engine(generator, evaluator)
     if isclose(reservation_value, 0):
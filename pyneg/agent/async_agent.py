@@ -0,0 +1,195 @@
+"""
+This module defines :class:`AsyncAgent` and :class:`AsyncNegotiationSession`, which run
+negotiations on an asyncio event loop. The agents, their engines and the messages they send
+are the same as for synchronous negotiations, but the messages travel over a
+:class:`Transport`, so many negotiations can be interleaved on a single event loop.
+
+>>> async def tournament(pairs):
+...     return await asyncio.gather(*(AsyncAgent(a).negotiate(b) for a, b in pairs))
+>>> asyncio.run(tournament(pairs))
+[True, False, True]
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Any, Optional, Tuple, Union
+
+from pyneg.comms import Message, QueueTransport, TranscriptSink, Transport
+from pyneg.engine import MetricsSink
+from pyneg.types import MessageType
+
+from .agent import Agent
+from .negotiation_session import NegotiationSession
+
+
+class AsyncAgent:
+    """
+    Wraps an :class:`Agent` so it can negotiate on an asyncio event loop.
+    Any attribute that isn't defined here is looked up on the wrapped agent.
+
+    By default the agent takes its turns on the event loop itself, which is the fastest option
+    for engines that only compute. If the engine waits on something else, e.g. on the worker
+    processes of a :class:`ProblogPool`, pass an `executor` and every turn runs there instead,
+    so other negotiations carry on in the meantime.
+
+    :param agent: The agent to wrap
+    :type agent: Agent
+    :param executor: Where to run the turns of the agent, if not on the event loop
+    :type executor: Optional[Executor]
+    """
+
+    def __init__(self, agent: Agent, executor: Optional[Executor] = None):
+        self.agent = agent
+        self.executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that aren't found on the wrapper itself
+        if name == "agent":
+            raise AttributeError(name)
+        return getattr(self.agent, name)
+
+    async def step(self, incoming: Optional[Message]) -> Optional[Message]:
+        """
+        Takes a single turn in the negotiation, see :func:`Agent.step`.
+
+        :param incoming: The last message of the opponent, if any
+        :type incoming: Optional[Message]
+        :return: The message to send to the opponent
+        :rtype: Optional[Message]
+        """
+        if self.executor is None:
+            return self.agent.step(incoming)
+
+        # get_running_loop was only added in python 3.7
+        loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)()
+        return await loop.run_in_executor(self.executor, self.agent.step, incoming)
+
+    async def negotiate(self, opponent: Union['AsyncAgent', Agent]) -> bool:
+        """
+        The asynchronous version of :func:`Agent.negotiate`. Use an
+        :class:`AsyncNegotiationSession` directly to limit the number of rounds
+        or the time the negotiation may take.
+
+        :param opponent: Agent that `self` is going to negotiate with
+        :type opponent: Union[AsyncAgent, Agent]
+        :return: Whether the negotiation came to an agreement or not.
+        :rtype: bool
+        """
+        # pylint: disable=protected-access
+        return await AsyncNegotiationSession(self, opponent, metrics=self.agent._metrics).run()
+
+    def __repr__(self) -> str:
+        return self.agent.name
+
+
+class AsyncNegotiationSession(NegotiationSession):
+    """
+    The asynchronous version of :class:`NegotiationSession`, with the same limits, transcript
+    and metrics. Each agent runs its own loop that waits for messages from its end of a
+    :class:`Transport`. By default the ends of a new :class:`QueueTransport` are used, pass
+    `transports` to use others, e.g. the ends of a :class:`StreamTransport` so the messages are
+    serialised. Agents that aren't an :class:`AsyncAgent` yet are wrapped in one.
+
+    If an agent raises an exception its end of the transport is closed, so the opponent ends
+    the negotiation without agreement, and the exception is raised by :func:`run`.
+
+    >>> session = AsyncNegotiationSession(agent_a, agent_b, max_rounds=100, timeout=5)
+    >>> await session.run()
+    True
+    """
+    def __init__(self, initiator: Union[AsyncAgent, Agent],
+                 responder: Union[AsyncAgent, Agent],
+                 max_rounds: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 transcript: Optional[TranscriptSink] = None,
+                 metrics: Optional[MetricsSink] = None,
+                 transports: Optional[Tuple[Transport, Transport]] = None):
+        super().__init__(_as_async(initiator), _as_async(responder), max_rounds,
+                         timeout, transcript, metrics)
+        self.transports = transports
+        self._deadline: Optional[float] = None
+
+    async def run(self) -> bool:  # type: ignore
+        """
+        Runs the negotiation until one of the agents accepts or ends it, or
+        until the limits of the session are reached.
+
+        :return: Whether the negotiation came to an agreement or not.
+        :rtype: bool
+        """
+        # pylint: disable=protected-access
+        if not self.initiator._call_for_negotiation(self.responder.agent,
+                                                    self.initiator._neg_space):
+            return self.initiator.successful
+
+        self._deadline = None if self.timeout is None else perf_counter() + self.timeout
+        self._round_start = perf_counter()
+        initiator_end, responder_end = self.transports or QueueTransport.pair()
+        loops = [asyncio.ensure_future(self._converse(self.initiator, initiator_end, True)),
+                 asyncio.ensure_future(self._converse(self.responder, responder_end, False))]
+        try:
+            await asyncio.gather(*loops)
+        except BaseException:
+            # don't leave the other agent running, or waiting, on its own
+            for loop in loops:
+                loop.cancel()
+            await asyncio.gather(*loops, return_exceptions=True)
+            raise
+
+        if self.turns % 2 == 1:
+            # the last round was cut short
+            self._end_round()
+        self.successful = self.initiator.successful
+        return self.successful
+
+    async def _converse(self, agent: AsyncAgent, transport: Transport, opening: bool) -> None:
+        """
+        The loop of a single agent: respond to every message that comes in
+        until the negotiation is over.
+        """
+        try:
+            outgoing = await agent.step(None) if opening else None
+            while True:
+                if outgoing is not None:
+                    self._record_turn(outgoing)
+                    await transport.send(outgoing)
+                if not agent.negotiation_active:
+                    return
+
+                incoming = await transport.receive()
+                if incoming is None:
+                    # the opponent stopped without ending the negotiation
+                    _abandon(agent)
+                    return
+
+                outgoing = await self._respond(agent, incoming)
+        except asyncio.CancelledError:
+            # the opponent failed, or the whole session was cancelled
+            _abandon(agent)
+            raise
+        finally:
+            await transport.close()
+
+    async def _respond(self, agent: AsyncAgent, incoming: Message) -> Optional[Message]:
+        if self.max_rounds is not None and self.turns >= 2 * self.max_rounds:
+            self.exceeded_max_rounds = True
+            return self._exit(agent, incoming)
+
+        if self._deadline is not None and perf_counter() > self._deadline:
+            self.timed_out = True
+            return self._exit(agent, incoming)
+
+        return await agent.step(incoming)
+
+
+def _abandon(agent: AsyncAgent) -> None:
+    """
+    Ends the negotiation of `agent` without agreement, as if the opponent had left it.
+    """
+    if agent.negotiation_active:
+        agent.receive_message(Message(agent.opponent.name, agent.name, MessageType.EXIT, None))
+
+
+def _as_async(agent: Union[AsyncAgent, Agent]) -> AsyncAgent:
+    return agent if isinstance(agent, AsyncAgent) else AsyncAgent(agent)
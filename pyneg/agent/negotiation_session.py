@@ -0,0 +1,138 @@
+"""
+This module defines the :class:`NegotiationSession` class which runs the main negotiation loop
+between two agents.
+"""
+
+from time import perf_counter
+from typing import TYPE_CHECKING, Optional
+
+from pyneg.comms import Message, TranscriptSink
+from pyneg.engine import MetricsSink
+
+if TYPE_CHECKING:
+    from pyneg.agent.agent import Agent # pylint: disable=cyclic-import
+
+
+class NegotiationSession:
+    """
+    Drives a negotiation between two agents. The session owns the loop and hands
+    messages back and forth explicitly, the agents only see the messages through
+    :func:`Agent.step`. This means agents never call each other directly so
+    they can be put behind other transports.
+
+    A round consists of one message from each agent. If the negotiation reaches `max_rounds`
+    or takes longer than `timeout` seconds the agent whose turn it is ends the negotiation
+    without agreement. The timeout is checked between turns, so a single turn that takes long
+    is not interrupted. Every message passes through the initiator, which records it in its own
+    sink, so by default `transcript` is simply that sink and the session keeps no copy. If
+    another :class:`TranscriptSink` is given every message is recorded there as well.
+    If a :class:`MetricsSink` is given the duration of every round is reported to it.
+
+    >>> session = NegotiationSession(agent_a, agent_b, max_rounds=100, timeout=5)
+    >>> session.run()
+    True
+    >>> session.rounds
+    3
+    """
+    def __init__(self, initiator: 'Agent',
+                 responder: 'Agent',
+                 max_rounds: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 transcript: Optional[TranscriptSink] = None,
+                 metrics: Optional[MetricsSink] = None):
+        self.initiator = initiator
+        self.responder = responder
+        self.max_rounds = max_rounds
+        self.timeout = timeout
+        self._transcript = transcript
+        self.turns: int = 0
+        self.successful: bool = False
+        self.timed_out: bool = False
+        self.exceeded_max_rounds: bool = False
+        self.metrics = metrics
+        self._round_start = 0.0
+
+    @property
+    def transcript(self) -> TranscriptSink:
+        """
+        :return: Where the messages of the negotiation are recorded. Unless a sink was given \
+            this is the sink of the initiator, which also holds any earlier negotiations of it.
+        :rtype: TranscriptSink
+        """
+        # pylint: disable=protected-access
+        return self.initiator._transcript if self._transcript is None else self._transcript
+
+    @property
+    def rounds(self) -> int:
+        """
+        A round is a message of the initiator and the response of the responder. The turn that
+        ends the negotiation counts as well, so if the initiator ends the negotiation after
+        `max_rounds` complete rounds, its exit message starts round `max_rounds` + 1.
+
+        :return: The number of rounds that were started, including the last one if it was \
+            cut short
+        :rtype: int
+        """
+        return (self.turns + 1) // 2
+
+    def run(self) -> bool:
+        """
+        Runs the negotiation until one of the agents accepts or ends it, or
+        until the limits of the session are reached.
+
+        :return: Whether the negotiation came to an agreement or not.
+        :rtype: bool
+        """
+        # pylint: disable=protected-access
+        if not self.initiator._call_for_negotiation(self.responder,
+                                                    self.initiator._neg_space):
+            return self.initiator.successful
+
+        deadline = None if self.timeout is None else perf_counter() + self.timeout
+        self._round_start = perf_counter()
+        current, other = self.initiator, self.responder
+        outgoing = current.step(None)
+        while outgoing is not None:
+            self._record_turn(outgoing)
+            current, other = other, current
+            if self.max_rounds is not None and self.turns >= 2 * self.max_rounds:
+                self.exceeded_max_rounds = True
+                outgoing = self._exit(current, outgoing)
+            elif deadline is not None and perf_counter() > deadline:
+                self.timed_out = True
+                outgoing = self._exit(current, outgoing)
+            else:
+                outgoing = current.step(outgoing)
+
+        if self.turns % 2 == 1:
+            # the last round was cut short
+            self._end_round()
+        self.successful = self.initiator.successful
+        return self.successful
+
+    def _record_turn(self, msg: Message) -> None:
+        if self._transcript is not None:
+            self._transcript.record(msg)
+        self.turns += 1
+        if self.turns % 2 == 0:
+            self._end_round()
+
+    def _end_round(self) -> None:
+        if self.metrics is None:
+            return
+
+        now = perf_counter()
+        self.metrics.observe("negotiation.round", now - self._round_start)
+        self.metrics.increment("negotiation.rounds")
+        self._round_start = now
+
+    def _exit(self, agent: 'Agent', incoming: Message) -> Optional[Message]:
+        """
+        Lets `agent` process the last message and then end the negotiation without agreement,
+        unless the message already ended it.
+        """
+        agent.receive_message(incoming)
+        if not agent.negotiation_active:
+            return None
+
+        return agent.exit_negotiation()
@@ -0,0 +1,11 @@
+"""
+This submodule contains tools to analyse negotiation scenarios and score their outcomes,
+e.g. the Pareto frontier of a linear additive scenario and the bargaining solutions on it.
+"""
+
+from pyneg.analysis.pareto import ParetoFrontier
+from pyneg.analysis.pareto import ParetoPoint
+from pyneg.analysis.pareto import TranscriptScore
+from pyneg.analysis.pareto import pareto_frontier
+from pyneg.analysis.pareto import score_transcript
+from pyneg.analysis.pareto import transcript_pareto_distances
@@ -0,0 +1,342 @@
+"""
+This module computes the Pareto frontier of bilateral linear additive scenarios, such as those
+created with the `generate_*_utility_matrices` functions in :mod:`pyneg.utils`, and uses it
+to score the outcome of negotiations.
+
+The frontier is built one issue at a time: after every issue only the partial offers that are
+not dominated by another partial offer are kept, since adding the same values for the remaining
+issues to a dominated partial offer can never produce a Pareto optimal offer. The work is
+therefore proportional to the size of the frontier instead of the size of the negotiation space.
+
+>>> u_a, u_b = generate_binary_utility_matrices((10, 10), 4)
+>>> frontier = pareto_frontier(u_a, u_b)
+>>> len(frontier)
+11
+>>> frontier.nash_point()
+ParetoPoint(utility_a=0.5, utility_b=0.5, value_indices=(0, 0, 0, 0, 0, 4, 4, 4, 4, 4))
+>>> session = NegotiationSession(agent_a, agent_b)
+>>> session.run()
+True
+>>> score = score_transcript(session.transcript, frontier, disagreement=(-1000, -1000))
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from pyneg.comms import CompactOffer, Message, NegSpaceSchema, Offer
+from pyneg.types import MessageType, NegSpace
+from pyneg.utils import weighted_utility_matrix
+
+
+class ParetoPoint(NamedTuple):
+    """
+    A Pareto optimal offer, given by the value index it chooses for every issue,
+    together with its utility for both agents.
+    """
+    utility_a: float
+    utility_b: float
+    value_indices: Tuple[int, ...]
+
+
+class TranscriptScore(NamedTuple):
+    """
+    How good the outcome of a negotiation was. If no agreement was reached the outcome is
+    the disagreement point. The distances are euclidean distances in utility space.
+    `mean_offer_distance` is the average distance to the frontier of all offers made during the
+    negotiation, or None if none were made.
+    """
+    agreement: bool
+    utility_a: float
+    utility_b: float
+    distance_to_pareto: float
+    distance_to_nash: Optional[float]
+    mean_offer_distance: Optional[float]
+
+
+def _non_dominated(utils_a: np.ndarray, utils_b: np.ndarray,
+                   tolerance: float, epsilon: float) -> np.ndarray:
+    """
+    Returns the indices of the points that are not dominated by any other point, ordered
+    by decreasing utility for A. Utilities that differ less than tolerance are considered equal,
+    and of points with equal utilities only one is kept. If epsilon is positive, points that
+    improve less than epsilon for B on the last kept point are dropped as well.
+    """
+    order = np.lexsort((-utils_b, -np.rint(utils_a / tolerance)))
+    sorted_b = utils_b[order]
+    best_b_before = np.maximum.accumulate(sorted_b)
+    keep = np.empty(len(order), dtype=bool)
+    keep[0] = True
+    keep[1:] = sorted_b[1:] > best_b_before[:-1] + tolerance
+    kept = order[keep]
+    if epsilon <= 0 or len(kept) < 2:
+        return kept
+
+    thinned = [kept[0]]
+    for index in kept[1:]:
+        if utils_b[index] > utils_b[thinned[-1]] + epsilon:
+            thinned.append(index)
+
+    return np.array(thinned, dtype=kept.dtype)
+
+
+class ParetoFrontier:
+    """
+    The Pareto optimal offers of a bilateral linear additive scenario, as computed by
+    :func:`pareto_frontier`. Points are ordered by increasing utility for A, and therefore
+    decreasing utility for B. Offers are identified by their value indices against `schema`.
+
+    :param weighted_a: Utility matrix of A with the issue weights applied
+    :type weighted_a: np.ndarray
+    :param weighted_b: Utility matrix of B with the issue weights applied
+    :type weighted_b: np.ndarray
+    :param utilities: Array of shape (number of points, 2) with the utilities for A and B
+    :type utilities: np.ndarray
+    :param value_indices: Array of shape (number of points, number of issues)
+    :type value_indices: np.ndarray
+    :param schema: The schema the value indices refer to
+    :type schema: NegSpaceSchema
+    """
+
+    def __init__(self,
+                 weighted_a: np.ndarray,
+                 weighted_b: np.ndarray,
+                 utilities: np.ndarray,
+                 value_indices: np.ndarray,
+                 schema: NegSpaceSchema):
+        self.weighted_a = weighted_a
+        self.weighted_b = weighted_b
+        self.utilities = utilities
+        self.value_indices = value_indices
+        self.schema = schema
+
+    def __len__(self) -> int:
+        return len(self.utilities)
+
+    def __getitem__(self, index: int) -> ParetoPoint:
+        return ParetoPoint(float(self.utilities[index, 0]), float(self.utilities[index, 1]),
+                           tuple(int(i) for i in self.value_indices[index]))
+
+    def __iter__(self) -> Iterator[ParetoPoint]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return "ParetoFrontier({} points)".format(len(self))
+
+    def to_offer(self, index: int) -> Offer:
+        """
+        Returns the offer of a point on the frontier.
+
+        :param index: The index of the point
+        :type index: int
+        :return: The offer
+        :rtype: Offer
+        """
+        return CompactOffer(self.schema, self.value_indices[index]).to_offer()
+
+    def offer_utilities(self, offer: Offer) -> Tuple[float, float]:
+        """
+        Calculates the utility of an offer for both agents.
+
+        :param offer: The offer to evaluate, which should fit the schema of the frontier
+        :type offer: Union[Offer, CompactOffer]
+        :raises KeyError: if the offer chooses a value that is not part of the schema
+        :return: The utility for A and B
+        :rtype: Tuple[float, float]
+        """
+        indices = self.schema.offer_indices(offer).astype(np.intp)
+        issues = np.arange(len(indices))
+        return (float(self.weighted_a[issues, indices].sum()),
+                float(self.weighted_b[issues, indices].sum()))
+
+    def distance(self, utility_a: float, utility_b: float) -> float:
+        """
+        Calculates the euclidean distance from a point in utility space to the closest
+        point on the frontier. Pareto optimal offers have distance 0.
+
+        :param utility_a: The utility for A
+        :type utility_a: float
+        :param utility_b: The utility for B
+        :type utility_b: float
+        :return: The distance to the frontier
+        :rtype: float
+        """
+        return float(np.hypot(self.utilities[:, 0] - utility_a,
+                              self.utilities[:, 1] - utility_b).min())
+
+    def _gains(self, disagreement: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        gains = self.utilities - np.asarray(disagreement, dtype=float)
+        individually_rational = np.all(gains >= 0, axis=1)
+        return gains, individually_rational
+
+    def nash_point(self, disagreement: Tuple[float, float] = (0.0, 0.0)) -> Optional[ParetoPoint]:
+        """
+        Returns the Nash bargaining solution: the point that maximises the product of the gains
+        of both agents over the disagreement point. Since that product is maximal on the
+        frontier this is exact for the whole negotiation space.
+
+        :param disagreement: The utility both agents get if no agreement is reached
+        :type disagreement: Tuple[float, float]
+        :return: The Nash point or None if no offer is at least as good as the \
+            disagreement point for both agents
+        :rtype: Optional[ParetoPoint]
+        """
+        gains, rational = self._gains(disagreement)
+        if not rational.any():
+            return None
+
+        products = np.where(rational, gains[:, 0] * gains[:, 1], -np.inf)
+        return self[int(np.argmax(products))]
+
+    def kalai_smorodinsky_point(self,
+                                disagreement: Tuple[float, float] = (0.0, 0.0)
+                                ) -> Optional[ParetoPoint]:
+        """
+        Returns the Kalai-Smorodinsky solution: the point where the gains of both
+        agents, relative to the best they could possibly get, are as equal as possible.
+        Because the space is discrete this is the point maximising the smallest relative gain.
+
+        :param disagreement: The utility both agents get if no agreement is reached
+        :type disagreement: Tuple[float, float]
+        :return: The Kalai-Smorodinsky point or None if no offer is at least as good as the \
+            disagreement point for both agents
+        :rtype: Optional[ParetoPoint]
+        """
+        gains, rational = self._gains(disagreement)
+        if not rational.any():
+            return None
+
+        ideal = gains[rational].max(axis=0)
+        ideal[ideal == 0] = 1.0
+        relative = np.where(rational, (gains / ideal).min(axis=1), -np.inf)
+        return self[int(np.argmax(relative))]
+
+
+def pareto_frontier(u_a,
+                    u_b,
+                    w_a=None,
+                    w_b=None,
+                    neg_space: Optional[NegSpace] = None,
+                    epsilon: float = 0.0) -> ParetoFrontier:
+    """
+    Computes the Pareto frontier of a linear additive scenario by dynamic programming over
+    the issues, discarding dominated partial offers after every issue, so the full
+    negotiation space is never enumerated.
+
+    If the frontier itself is too large, a positive `epsilon` keeps only points that improve
+    at least `epsilon` on their neighbour, which bounds the size of the frontier. Every Pareto
+    optimal offer is then within `epsilon` times the number of issues of a returned point,
+    for both agents.
+
+    :param u_a: Utility matrix of A with one row per issue
+    :type u_a: ndarray
+    :param u_b: Utility matrix of B with one row per issue
+    :type u_b: ndarray
+    :param w_a: distribution of issue importance for A, defaults to uniform
+    :type w_a: Optional[ndarray]
+    :param w_b: distribution of issue importance for B, defaults to uniform
+    :type w_b: Optional[ndarray]
+    :param neg_space: The negotiation space the matrices describe, defaults to the one \
+        created by :func:`pyneg.utils.neg_scenario_from_util_matrices`
+    :type neg_space: Optional[NegSpace]
+    :param epsilon: Minimal improvement between neighbouring points, 0 for the exact frontier
+    :type epsilon: float
+    :raises ValueError: if the matrices don't have the same shape or don't fit the neg_space
+    :return: The Pareto frontier
+    :rtype: ParetoFrontier
+    """
+    weighted_a = weighted_utility_matrix(u_a, w_a)
+    weighted_b = weighted_utility_matrix(u_b, w_b)
+    if weighted_a.shape != weighted_b.shape:
+        raise ValueError("Utility matrices should have the same shape, not {} and {}".format(
+            weighted_a.shape, weighted_b.shape))
+
+    n, m = weighted_a.shape
+    if neg_space is None:
+        neg_space = {"issue{i}".format(i=i): list(map(str, range(m))) for i in range(n)}
+    schema = NegSpaceSchema(neg_space)
+    if len(schema) != n or any(card != m for card in schema.cardinalities()):
+        raise ValueError("Negotiation space does not match the shape of the utility matrices")
+
+    # sums of the same utilities in a different order can differ by rounding errors
+    tolerance = 1e-9 * max(np.abs(weighted_a).max(axis=1).sum(),
+                           np.abs(weighted_b).max(axis=1).sum(), 1.0)
+    utils_a = np.zeros(1)
+    utils_b = np.zeros(1)
+    # for every issue, which partial offer every point extends and with which value
+    parents: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    for issue in range(n):
+        candidates_a = (utils_a[:, np.newaxis] + weighted_a[issue]).ravel()
+        candidates_b = (utils_b[:, np.newaxis] + weighted_b[issue]).ravel()
+        kept = _non_dominated(candidates_a, candidates_b, tolerance, epsilon)
+        parents.append(kept // m)
+        values.append(kept % m)
+        utils_a = candidates_a[kept]
+        utils_b = candidates_b[kept]
+
+    value_indices = np.empty((len(utils_a), n), dtype=schema.index_dtype)
+    point = np.arange(len(utils_a))
+    for issue in range(n - 1, -1, -1):
+        value_indices[:, issue] = values[issue][point]
+        point = parents[issue][point]
+
+    # points were kept in order of decreasing utility for A
+    return ParetoFrontier(weighted_a, weighted_b,
+                          np.column_stack((utils_a, utils_b))[::-1],
+                          value_indices[::-1], schema)
+
+
+def transcript_pareto_distances(transcript: Iterable[Message],
+                                frontier: ParetoFrontier) -> List[float]:
+    """
+    Calculates the distance to the Pareto frontier of every offer in a transcript.
+
+    :param transcript: The messages of a negotiation, e.g. the transcript of one of the agents
+    :type transcript: Iterable[Message]
+    :param frontier: The frontier of the scenario that was negotiated
+    :type frontier: ParetoFrontier
+    :return: The distance of every offer, in the order they were made
+    :rtype: List[float]
+    """
+    return [frontier.distance(*frontier.offer_utilities(msg.offer))
+            for msg in transcript if msg.is_offer()]
+
+
+def score_transcript(transcript: Iterable[Message],
+                     frontier: ParetoFrontier,
+                     disagreement: Tuple[float, float] = (0.0, 0.0)) -> TranscriptScore:
+    """
+    Scores the outcome of a negotiation against the frontier of its scenario.
+    The negotiation is considered to have reached an agreement if its last message is an
+    acceptance.
+
+    :param transcript: The messages of a negotiation, e.g. the transcript of one of the agents
+    :type transcript: Iterable[Message]
+    :param frontier: The frontier of the scenario that was negotiated
+    :type frontier: ParetoFrontier
+    :param disagreement: The utility both agents get if no agreement is reached
+    :type disagreement: Tuple[float, float]
+    :return: The score of the negotiation
+    :rtype: TranscriptScore
+    """
+    messages = list(transcript)
+    agreement = bool(messages) and messages[-1].type_ == MessageType.ACCEPT
+    if agreement:
+        utility_a, utility_b = frontier.offer_utilities(messages[-1].offer)
+    else:
+        utility_a, utility_b = disagreement
+
+    offer_distances = transcript_pareto_distances(messages, frontier)
+    nash = frontier.nash_point(disagreement)
+    distance_to_nash = None if nash is None else float(
+        np.hypot(nash.utility_a - utility_a, nash.utility_b - utility_b))
+
+    return TranscriptScore(
+        agreement,
+        float(utility_a),
+        float(utility_b),
+        frontier.distance(utility_a, utility_b),
+        distance_to_nash,
+        float(np.mean(offer_distances)) if offer_distances else None)
@@ -4,8 +4,20 @@ Currently consists of:
     - AtomicConstraint
     - Message
     - Offer
+    - NegSpaceSchema
+    - CompactOffer
+    - TranscriptSink and the transcript writers
+    - MessageCodec
+    - Transport, QueueTransport and StreamTransport
 '''
 
 from pyneg.comms.atomic_constraint import AtomicConstraint
 from pyneg.comms.message import Message
 from pyneg.comms.offer import Offer
+from pyneg.comms.neg_space_schema import NegSpaceSchema
+from pyneg.comms.compact_offer import CompactOffer
+from pyneg.comms.transcript import (BinaryTranscriptWriter, InMemoryTranscript,
+                                    JSONLTranscriptWriter, TranscriptSink,
+                                    read_transcript)
+from pyneg.comms.codec import MessageCodec
+from pyneg.comms.transport import QueueTransport, StreamTransport, Transport
@@ -0,0 +1,246 @@
+"""
+This module defines the wire format of messages, so agents can negotiate across processes or
+machines, see :class:`StreamTransport`. Offers and constraints are encoded as value indices
+relative to a :class:`NegSpaceSchema`, and every message carries the fingerprint of that schema
+so both ends can check they agree on what the indices mean.
+
+>>> codec = MessageCodec(NegSpaceSchema(neg_space))
+>>> data = codec.encode(msg)
+>>> codec.decode(data) == msg
+True
+"""
+
+import json
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from pyneg.types import MessageType, NegSpace
+from .atomic_constraint import AtomicConstraint
+from .compact_offer import offer_from_indices
+from .message import Message
+from .neg_space_schema import NegSpaceSchema
+
+FORMAT_NAME = "pyneg-message"
+FORMAT_VERSION = 1
+WIRE_MAGIC = b"PN"
+# longest sender or recipient name in bytes, once encoded as UTF-8
+MAX_NAME_SIZE = 0xFFFF
+
+_HAS_OFFER = 1
+_HAS_CONSTRAINT = 2
+
+# magic, version, message type, flags, schema fingerprint, sender and recipient name lengths
+_HEADER = struct.Struct("<2sBBB8sHH")
+_CONSTRAINT = struct.Struct("<HI")
+
+
+class MessageCodec:
+    """
+    Encodes messages to bytes and back. The binary format is the default, it consists of a
+    small fixed size header, the names of the sender and recipient, one little endian value
+    index per issue if the message has an offer, using the smallest integer type that fits the
+    schema, and the issue and value index of the constraint if it has one.
+    :func:`encode_json` produces the same fields as a JSON object instead, for channels that
+    can only carry text or for debugging. :func:`decode` accepts both.
+
+    Both formats start with a version number, and messages encoded with a different version
+    or against a different schema are rejected rather than misread. Decoded offers are built
+    directly from their value indices, see :func:`offer_from_indices`. No message, in either
+    format, is longer than `max_message_size` bytes, so readers can reject anything longer
+    without decoding it.
+
+    :param schema: The schema of the negotiation, or the negotiation space to create it from
+    :type schema: Union[NegSpaceSchema, NegSpace]
+    """
+
+    def __init__(self, schema: Union[NegSpaceSchema, NegSpace]):
+        if not isinstance(schema, NegSpaceSchema):
+            schema = NegSpaceSchema(schema)
+        self.schema = schema
+        self._index_dtype = schema.index_dtype.newbyteorder("<")
+        self._offer_size = self._index_dtype.itemsize * len(schema)
+        binary_size = _HEADER.size + 2 * MAX_NAME_SIZE + self._offer_size + _CONSTRAINT.size
+        # JSON escapes take at most 6 bytes per byte of UTF-8, every index takes its digits
+        # and a separator, and the keys, fingerprint and constraint fit in 512 bytes easily
+        max_index_digits = len(str(max(len(values) for values in schema.values)))
+        json_size = 2 * 6 * MAX_NAME_SIZE + len(schema) * (max_index_digits + 2) + 512
+        self.max_message_size: int = max(binary_size, json_size)
+
+    def encode(self, msg: Message) -> bytes:
+        """
+        Encodes a message in the binary format.
+
+        :param msg: The message to encode
+        :type msg: Message
+        :raises KeyError: if the offer or constraint refers to values not in the schema
+        :raises ValueError: if the name of the sender or recipient is too long
+        :return: The encoded message
+        :rtype: bytes
+        """
+        sender = _encode_name(msg.sender_name)
+        recipient = _encode_name(msg.recipient_name)
+        indices = self._offer_indices(msg)
+        constraint = self._constraint_indices(msg)
+        flags = (_HAS_OFFER if indices is not None else 0) | \
+            (_HAS_CONSTRAINT if constraint is not None else 0)
+
+        parts = [_HEADER.pack(WIRE_MAGIC, FORMAT_VERSION, msg.type_.value, flags,
+                              self.schema.fingerprint, len(sender), len(recipient)),
+                 sender, recipient]
+        if indices is not None:
+            parts.append(indices.astype(self._index_dtype).tobytes())
+        if constraint is not None:
+            parts.append(_CONSTRAINT.pack(*constraint))
+
+        return b"".join(parts)
+
+    def encode_json(self, msg: Message) -> str:
+        """
+        Encodes a message as a JSON object.
+
+        :param msg: The message to encode
+        :type msg: Message
+        :raises KeyError: if the offer or constraint refers to values not in the schema
+        :raises ValueError: if the name of the sender or recipient is too long
+        :return: The encoded message
+        :rtype: str
+        """
+        _encode_name(msg.sender_name)
+        _encode_name(msg.recipient_name)
+        indices = self._offer_indices(msg)
+        constraint = self._constraint_indices(msg)
+        return json.dumps({
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "schema": self.schema.fingerprint.hex(),
+            "sender": msg.sender_name,
+            "recipient": msg.recipient_name,
+            "type": msg.type_.name,
+            "offer": None if indices is None else indices.tolist(),
+            "constraint": None if constraint is None else list(constraint),
+        })
+
+    def decode(self, data: Union[bytes, str]) -> Message:
+        """
+        Decodes a message encoded by :func:`encode` or :func:`encode_json`.
+        The format is detected from the data.
+
+        :param data: The encoded message
+        :type data: Union[bytes, str]
+        :raises ValueError: if the data is malformed, or was encoded with another version \
+            of the format or against another schema
+        :return: The decoded message
+        :rtype: Message
+        """
+        if isinstance(data, str):
+            return self._decode_json(data)
+        if data[:len(WIRE_MAGIC)] == WIRE_MAGIC:
+            return self._decode_binary(bytes(data))
+        if data[:1] == b"{":
+            return self._decode_json(bytes(data).decode("utf-8"))
+
+        raise ValueError("Data is not an encoded message")
+
+    def _offer_indices(self, msg: Message) -> Optional[np.ndarray]:
+        if msg.offer is None:
+            return None
+        return self.schema.offer_indices(msg.offer)
+
+    def _constraint_indices(self, msg: Message) -> Optional[Tuple[int, int]]:
+        if msg.constraint is None:
+            return None
+        issue = msg.constraint.issue
+        return self.schema.issue_index(issue), self.schema.value_index(issue, msg.constraint.value)
+
+    def _check(self, version: Any, fingerprint: bytes) -> None:
+        # true and 1.0 compare equal to 1, but aren't versions
+        if isinstance(version, bool) or not isinstance(version, int) or \
+                version != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported message format version {version}, expected {FORMAT_VERSION}")
+        if fingerprint != self.schema.fingerprint:
+            raise ValueError("Message was encoded against a different negotiation space")
+
+    def _decode_binary(self, data: bytes) -> Message:
+        if len(data) < _HEADER.size:
+            raise ValueError("Message is truncated")
+        _, version, type_value, flags, fingerprint, sender_size, recipient_size = \
+            _HEADER.unpack_from(data)
+        self._check(version, fingerprint)
+
+        expected_size = _HEADER.size + sender_size + recipient_size + \
+            (self._offer_size if flags & _HAS_OFFER else 0) + \
+            (_CONSTRAINT.size if flags & _HAS_CONSTRAINT else 0)
+        if len(data) != expected_size:
+            raise ValueError(f"Expected a message of {expected_size} bytes not {len(data)}")
+
+        offset = _HEADER.size
+        sender = data[offset:offset + sender_size].decode("utf-8")
+        offset += sender_size
+        recipient = data[offset:offset + recipient_size].decode("utf-8")
+        offset += recipient_size
+        indices = None
+        if flags & _HAS_OFFER:
+            indices = np.frombuffer(data, dtype=self._index_dtype, count=len(self.schema),
+                                    offset=offset).tolist()
+            offset += self._offer_size
+        constraint = None
+        if flags & _HAS_CONSTRAINT:
+            constraint = _CONSTRAINT.unpack_from(data, offset)
+
+        return self._message(sender, recipient, MessageType(type_value), indices, constraint)
+
+    def _decode_json(self, data: str) -> Message:
+        record: Dict[str, Any] = json.loads(data)
+        if not isinstance(record, dict) or record.get("format") != FORMAT_NAME:
+            raise ValueError("Data is not an encoded message")
+        fingerprint = record.get("schema")
+        if not isinstance(fingerprint, str):
+            raise ValueError("Message has no schema fingerprint")
+        self._check(record.get("version"), bytes.fromhex(fingerprint))
+
+        sender = record.get("sender")
+        recipient = record.get("recipient")
+        if not isinstance(sender, str) or not isinstance(recipient, str):
+            raise ValueError("Message has no sender or recipient")
+        type_name = record.get("type")
+        if not isinstance(type_name, str) or type_name not in MessageType.__members__:
+            raise ValueError(f"Unknown message type {type_name!r}")
+
+        return self._message(sender, recipient, MessageType[type_name],
+                             _json_indices(record, "offer", len(self.schema)),
+                             _json_indices(record, "constraint", 2))
+
+    def _message(self, sender: str, recipient: str, type_: MessageType,
+                 indices: Optional[Sequence[int]],
+                 constraint: Optional[Sequence[int]]) -> Message:
+        offer = None if indices is None else offer_from_indices(self.schema, indices)
+        atomic_constraint = None
+        if constraint is not None:
+            issue_index, value_index = constraint
+            if not 0 <= issue_index < len(self.schema) or \
+                    not 0 <= value_index < len(self.schema.values[issue_index]):
+                raise ValueError(f"Invalid constraint indices {tuple(constraint)}")
+            atomic_constraint = AtomicConstraint(self.schema.issues[issue_index],
+                                                 self.schema.values[issue_index][value_index])
+        return Message(sender, recipient, type_, offer, atomic_constraint)
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode("utf-8")
+    if len(encoded) > MAX_NAME_SIZE:
+        raise ValueError(f"Names can be at most {MAX_NAME_SIZE} bytes long, not {len(encoded)}")
+    return encoded
+
+
+def _json_indices(record: Dict[str, Any], key: str, size: int) -> Optional[List[int]]:
+    indices = record.get(key)
+    if indices is None:
+        return None
+    # bool is a subclass of int, but true and false aren't indices
+    if not isinstance(indices, list) or len(indices) != size or \
+            not all(isinstance(index, int) and not isinstance(index, bool) for index in indices):
+        raise ValueError(f"Expected {size} integer indices as {key}, not {indices!r}")
+    return indices
@@ -0,0 +1,263 @@
+"""
+Defines the CompactOffer class, an integer indexed alternative to :class:`Offer`.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple, Union, cast
+
+import numpy as np
+
+from pyneg.types import AtomicDict, NestedDict
+from pyneg.utils import atom_from_issue_value, nested_dict_from_atom_dict
+from .neg_space_schema import NegSpaceSchema
+from .offer import Offer
+
+
+class CompactOffer:
+    """
+    A compact representation of an offer. Instead of storing a float for every value of
+    every issue, it stores one value index per issue in a small integer array, relative to a
+    :class:`NegSpaceSchema`. This means that looking up the chosen value, comparing and hashing
+    offers are all integer operations. It supports the same read only interface as :class:`Offer`
+    so evaluators can use them interchangeably. Use :func:`from_dict` and :func:`from_offer`
+    to convert from the other representations and :func:`to_offer` to convert back.
+
+    >>> schema = NegSpaceSchema({"First":["A","B"], "Second":["C","D"]})
+    >>> CompactOffer(schema, [1, 0])
+    [First->B, Second->C]
+
+    """
+    __slots__ = ("schema", "indices", "_hash")
+
+    def __init__(self, schema: NegSpaceSchema, indices: Union[Sequence[int], np.ndarray]):
+        if not isinstance(schema, NegSpaceSchema):
+            raise TypeError(f"Expected a NegSpaceSchema not {type(schema)}")
+
+        index_array = np.array(indices, dtype=np.int64)
+        if index_array.shape != (len(schema),):
+            raise ValueError(
+                f"Invalid offer, expected {len(schema)} indices but got {index_array.shape}")
+        if np.any(index_array < 0) or np.any(index_array >= schema.cardinalities()):
+            raise ValueError(f"Invalid offer, indices out of range: {index_array}")
+
+        self.schema: NegSpaceSchema = schema
+        self.indices: np.ndarray = index_array.astype(schema.index_dtype)
+        self.indices.setflags(write=False)
+        self._hash: int = hash(self.indices.tobytes())
+
+    @classmethod
+    def from_dict(cls, schema: NegSpaceSchema,
+                  values_by_issue: Union[NestedDict, AtomicDict]) -> 'CompactOffer':
+        """
+        Creates a compact offer from a NestedDict or AtomicDict using the same
+        validity rules as :class:`Offer`. Every issue in the schema must be present.
+
+        :param schema: The schema to index the offer against
+        :type schema: NegSpaceSchema
+        :param values_by_issue: The offer as nested or atomic dictionary
+        :type values_by_issue: Union[NestedDict, AtomicDict]
+        :raises TypeError: if values_by_issue is not a dictionary
+        :raises ValueError: if the dictionary does not describe a valid offer
+        :return: the compact offer
+        :rtype: CompactOffer
+        """
+        if not isinstance(values_by_issue, dict):
+            raise TypeError(
+                "Expected a dictionary not {}".format(type(values_by_issue)))
+
+        if isinstance(next(iter(values_by_issue.values())), dict):
+            nested = cast(NestedDict, values_by_issue)
+        elif isinstance(next(iter(values_by_issue.values())), float):
+            nested = nested_dict_from_atom_dict(values_by_issue)
+        else:
+            raise ValueError(
+                "invalid offer structure: {}".format(values_by_issue))
+
+        indices: List[int] = []
+        for issue in schema.get_issues():
+            if issue not in nested.keys():
+                raise ValueError(f"Invalid offer, {issue} has no assignment")
+
+            chosen = [value for value, prob in nested[issue].items()
+                      if not np.isclose(prob, 0)]
+            if len(chosen) != 1 or not np.isclose(nested[issue][chosen[0]], 1):
+                raise ValueError(
+                    f"Invalid offer, {issue} does not have exactly one value assigned")
+            try:
+                indices.append(schema.value_index(issue, chosen[0]))
+            except KeyError:
+                raise ValueError(
+                    f"Invalid offer, {issue} has unknown value: {chosen[0]}")
+
+        return cls(schema, indices)
+
+    @classmethod
+    def from_offer(cls, schema: NegSpaceSchema, offer: Offer) -> 'CompactOffer':
+        """
+        Converts an :class:`Offer` to its compact representation.
+
+        :param schema: The schema to index the offer against
+        :type schema: NegSpaceSchema
+        :param offer: The offer to convert
+        :type offer: Offer
+        :raises ValueError: if the offer does not fit the schema
+        :return: the compact offer
+        :rtype: CompactOffer
+        """
+        try:
+            return cls(schema, [schema.value_index(issue, offer.get_chosen_value(issue))
+                                for issue in schema.get_issues()])
+        except KeyError as err:
+            raise ValueError(f"Offer {offer} does not fit schema: {err}")
+
+    def to_offer(self) -> Offer:
+        """
+        Converts the compact offer back into a full :class:`Offer` over every value in the schema.
+
+        :return: The equivalent offer
+        :rtype: Offer
+        """
+        return offer_from_indices(self.schema, self.indices.tolist())
+
+    def to_nested_dict(self) -> NestedDict:
+        """
+        Returns the offer as a NestedDict containing every value in the schema.
+
+        :return: The offer represented as a NestedDict
+        :rtype: NestedDict
+        """
+        return {issue: self[issue] for issue in self.schema.get_issues()}
+
+    def get_chosen_value(self, issue: str) -> str:
+        """
+        Each issue has exactly one value that it "chooses" i.e. has assigned 1 to.
+        This one returns that value.
+
+        :param issue: The issue of which you want to get the chosen value.
+        :type issue: str
+        :return: the value chosen by the offer.
+        :rtype: str
+        """
+        issue_index = self.schema.issue_index(issue)
+        return self.schema.value_name(issue_index, self.indices[issue_index])
+
+    def is_assigned(self, issue: str, value: str) -> bool:
+        """
+        Checks whether the passed issue value pair is the
+        one chosen by this offer
+
+        :param issue: The issue to check
+        :type issue: str
+        :param value: The value to check
+        :type value: str
+        :return: True iff this offer poposes the asssignement of `value` to `issue`
+        :rtype: bool
+        """
+        issue_index = self.schema.issue_index(issue)
+        return self.schema.value_name(issue_index, self.indices[issue_index]) == value
+
+    def get_issues(self) -> Iterable[str]:
+        """
+        Returns all issues associated with this offer
+
+        :return: an iterable containting the issues associated with this offer
+        :rtype: Iterable[str]
+        """
+        return self.schema.get_issues()
+
+    def __getitem__(self, issue: str) -> Dict[str, float]:
+        chosen_value = self.get_chosen_value(issue)
+        return {value: 1.0 if value == chosen_value else 0.0
+                for value in self.schema.get_values(issue)}
+
+    def get_problog_dists(self) -> str:
+        """
+        Formats the offer as a distribution over the
+        atomic issue value pairs. See :func:`Offer.get_problog_dists`
+
+        :return: A string expressing the offer in valid ProbLog as \
+        a distribution over the atomic issue value pairs.
+        :rtype: str
+        """
+        return_string = ""
+        for issue_index, issue in enumerate(self.schema.get_issues()):
+            atom_list: List[str] = []
+            for value_index, value in enumerate(self.schema.values[issue_index]):
+                prob = 1.0 if value_index == self.indices[issue_index] else 0.0
+                atom_list.append("{prob}::{atom}".format(
+                    prob=prob, atom=atom_from_issue_value(issue, value)))
+
+            return_string += ";".join(atom_list) + ".\n"
+
+        return return_string
+
+    def get_sparse_repr(self) -> FrozenSet[Tuple[str, str]]:
+        """
+        returns a sparse reperesentation of itself. This means a frozenset of
+        issue value pairs, where the value is the one assigned byt the offer.
+        Equal to the sparse representation of the equivalent :class:`Offer`.
+
+        :return: A frozen set containt assigned issue value pairs
+        :rtype: FrozenSet[Tuple[str,str]]
+        """
+        return frozenset(zip(self.schema.issues,
+                             map(self.schema.value_name,
+                                 range(len(self.schema)), self.indices)))
+
+    def get_sparse_str_repr(self) -> str:
+        """
+        returns a sparse string reperesentation of itself. Mainly useful for logging
+
+        :return: A string of the mapping
+        :rtype: str
+        """
+        return "[" \
+            + ", ".join([f"{issue}->{self.schema.value_name(i, index)}" for
+                         i, (issue, index) in enumerate(zip(self.schema.issues, self.indices))]) \
+            + "]"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactOffer):
+            return False
+
+        if self._hash != other._hash:
+            return False
+
+        return self.schema == other.schema and np.array_equal(self.indices, other.indices)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return self.get_sparse_str_repr()
+
+
+def offer_from_indices(schema: NegSpaceSchema, indices: Sequence[int]) -> Offer:
+    """
+    Creates the :class:`Offer` that chooses the given value index for every issue of the
+    schema. Only the indices are checked, an offer built from valid indices is valid by
+    construction, so this skips the much slower checks of :func:`Offer.__init__`.
+
+    :param schema: The schema the indices refer to
+    :type schema: NegSpaceSchema
+    :param indices: One value index per issue, in issue order
+    :type indices: Sequence[int]
+    :raises ValueError: if there isn't one index per issue or an index is out of range
+    :return: The equivalent offer
+    :rtype: Offer
+    """
+    if len(indices) != len(schema):
+        raise ValueError(
+            f"Invalid offer, expected {len(schema)} indices but got {len(indices)}")
+
+    nested: NestedDict = {}
+    chosen_values: Dict[str, str] = {}
+    for issue, values, index in zip(schema.issues, schema.values, indices):
+        if not 0 <= index < len(values):
+            raise ValueError(f"Invalid offer, index {index} out of range for issue {issue}")
+        chosen = values[index]
+        assignments = dict.fromkeys(values, 0.0)
+        assignments[chosen] = 1.0
+        nested[issue] = assignments
+        chosen_values[issue] = chosen
+
+    # pylint: disable=protected-access
+    return Offer._from_valid(nested, chosen_values)
@@ -0,0 +1,197 @@
+"""
+This module defines the :class:`NegSpaceSchema` class, which maps the issues and values
+of a negotiation space to integers so offers can be stored as arrays of value indices.
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from pyneg.types import NegSpace
+
+
+class NegSpaceSchema:
+    """
+    An immutable index of a negotiation space. Every issue is assigned an integer
+    in the order they appear in the negotiation space, and every value is assigned an
+    integer relative to its issue. Compact representations such as
+    :class:`CompactOffer` store value indices against a schema instead of strings.
+    Schemas of the same negotiation space have the same `fingerprint`, across processes too.
+
+    >>> schema = NegSpaceSchema({"First":["A","B"], "Second":["C","D"]})
+    >>> schema.value_index("Second", "D")
+    1
+    >>> schema.value_name(0, 1)
+    'B'
+
+    """
+    __slots__ = ("issues", "values", "_issue_indices", "_value_indices",
+                 "index_dtype", "fingerprint", "_hash")
+
+    def __init__(self, neg_space: NegSpace):
+        if not neg_space:
+            raise ValueError("Cannot create a schema for an empty negotiation space")
+
+        self.issues: Tuple[str, ...] = tuple(str(issue) for issue in neg_space.keys())
+        self.values: Tuple[Tuple[str, ...], ...] = tuple(
+            tuple(map(str, neg_space[issue])) for issue in neg_space.keys())
+        self._issue_indices: Dict[str, int] = {
+            issue: i for i, issue in enumerate(self.issues)}
+        self._value_indices: Tuple[Dict[str, int], ...] = tuple(
+            {value: j for j, value in enumerate(values)} for values in self.values)
+
+        for issue, values in zip(self.issues, self.values):
+            if not values:
+                raise ValueError(f"Issue {issue} has no values")
+
+        # use the smallest integer type that can hold every value index
+        max_cardinality = max(len(values) for values in self.values)
+        if max_cardinality <= np.iinfo(np.uint8).max:
+            self.index_dtype = np.dtype(np.uint8)
+        elif max_cardinality <= np.iinfo(np.uint16).max:
+            self.index_dtype = np.dtype(np.uint16)
+        else:
+            self.index_dtype = np.dtype(np.uint32)
+
+        self._hash = hash((self.issues, self.values))
+        # unlike hash() this is the same in every process, so it can identify the schema
+        # on the wire, see :class:`MessageCodec`
+        self.fingerprint: bytes = hashlib.sha256(json.dumps(
+            [self.issues, self.values], separators=(",", ":")).encode("utf-8")).digest()[:8]
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    def get_issues(self) -> Iterable[str]:
+        """
+        Returns all issues of the negotiation space in index order.
+
+        :return: A tuple containing the issues
+        :rtype: Iterable[str]
+        """
+        return self.issues
+
+    def get_values(self, issue: str) -> List[str]:
+        """
+        Returns the values of the given issue in index order.
+
+        :param issue: The issue to retreive the values of
+        :type issue: str
+        :raises KeyError: if the issue is not part of the schema
+        :return: A list of the values of the issue
+        :rtype: List[str]
+        """
+        return list(self.values[self.issue_index(issue)])
+
+    def issue_index(self, issue: str) -> int:
+        """
+        Returns the integer associated with the given issue.
+
+        :param issue: The issue to look up
+        :type issue: str
+        :raises KeyError: if the issue is not part of the schema
+        :return: The index of the issue
+        :rtype: int
+        """
+        try:
+            return self._issue_indices[issue]
+        except KeyError:
+            raise KeyError(f"Issue {issue} is not known")
+
+    def value_index(self, issue: str, value: str) -> int:
+        """
+        Returns the integer associated with the given value, relative to its issue.
+
+        :param issue: The issue the value belongs to
+        :type issue: str
+        :param value: The value to look up
+        :type value: str
+        :raises KeyError: if the issue value pair is not part of the schema
+        :return: The index of the value
+        :rtype: int
+        """
+        try:
+            return self._value_indices[self.issue_index(issue)][value]
+        except KeyError:
+            raise KeyError(f"Value {value} is not known for issue {issue}")
+
+    def value_name(self, issue_index: int, value_index: int) -> str:
+        """
+        Inverse of :func:`value_index`, but indexed by integers on both levels.
+
+        :param issue_index: The index of the issue
+        :type issue_index: int
+        :param value_index: The index of the value
+        :type value_index: int
+        :return: The value the indices refer to
+        :rtype: str
+        """
+        return self.values[issue_index][value_index]
+
+    def offer_indices(self, offer) -> np.ndarray:
+        """
+        Returns the value indices chosen by an :class:`Offer` or :class:`CompactOffer`
+        in issue order. Compact offers indexed against this schema are returned as is.
+
+        :param offer: The offer to index
+        :type offer: Union[Offer, CompactOffer]
+        :raises KeyError: if the offer chooses a value that is not part of the schema
+        :return: An array containing one value index per issue
+        :rtype: np.ndarray
+        """
+        if getattr(offer, "schema", None) == self:
+            return offer.indices
+
+        return np.array([self._value_indices[i][offer.get_chosen_value(issue)]
+                         for i, issue in enumerate(self.issues)], dtype=self.index_dtype)
+
+    def index_matrix(self, offers: Iterable) -> np.ndarray:
+        """
+        Stacks the value indices of multiple offers into a matrix with one row per offer
+        and one column per issue, see :func:`offer_indices`.
+
+        :param offers: The offers to index
+        :type offers: Iterable[Union[Offer, CompactOffer]]
+        :return: An array of shape (number of offers, number of issues)
+        :rtype: np.ndarray
+        """
+        rows = [self.offer_indices(offer) for offer in offers]
+        if not rows:
+            return np.empty((0, len(self)), dtype=self.index_dtype)
+
+        return np.stack(rows)
+
+    def cardinalities(self) -> np.ndarray:
+        """
+        Returns the number of values of every issue in index order.
+
+        :return: An array with one entry per issue
+        :rtype: np.ndarray
+        """
+        return np.array([len(values) for values in self.values], dtype=np.int64)
+
+    def as_neg_space(self) -> NegSpace:
+        """
+        Returns the negotiation space this schema was created from.
+
+        :return: A negotiation space with string issues and values
+        :rtype: NegSpace
+        """
+        return {issue: list(values) for issue, values in zip(self.issues, self.values)}
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+
+        if not isinstance(other, NegSpaceSchema):
+            return False
+
+        return self.issues == other.issues and self.values == other.values
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return "NegSpaceSchema({})".format(self.as_neg_space())
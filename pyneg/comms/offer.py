@@ -1,7 +1,8 @@
 """
 Defines the Offer class.
 """
-from typing import Dict, Union, cast, List, Iterable, Tuple, FrozenSet
+from types import MappingProxyType
+from typing import Dict, Union, cast, List, Iterable, Mapping, Tuple, FrozenSet
 
 from numpy import isclose
 
@@ -17,7 +18,8 @@ class Offer:
     and the sum of all assignements for an issue should sum to 1.0
     (i.e. exactly one value should be assigned 1.0 and all others 0.0).
     Note that the assignements should be floats instead of ints or bools.
-    this is for compatibility with ProbLog.
+    this is for compatibility with ProbLog. Offers are immutable after construction,
+    attempting to change them raises an error.
 
     e.g.
     >>> nested = {"First": {"A":0.0, "B":1.0}, "Second":{"C":1.0,"D":0.0}}
@@ -26,43 +28,84 @@ class Offer:
     """
     def __init__(self, values_by_issue: Union[NestedDict, AtomicDict],
                  indent_level: int = 1):
-        self.indent_level = indent_level
         if not isinstance(values_by_issue, dict):
             raise TypeError(
                 "Expected a dictionary not {}".format(type(values_by_issue)))
 
         # is it a nested dictionary?
         if isinstance(next(iter(values_by_issue.values())), dict):
-            self.values_by_issue: NestedDict = cast(
-                NestedDict, values_by_issue)
+            # copy so the caller can't change the offer from the outside
+            nested: NestedDict = {issue: dict(values) for issue, values in cast(
+                NestedDict, values_by_issue).items()}
 
         # is it an Atomic dictionary?
         elif isinstance(next(iter(values_by_issue.values())), float):
             # convert to nested dict so checking for validity is easier
-            self.values_by_issue = nested_dict_from_atom_dict(
+            nested = nested_dict_from_atom_dict(
                 values_by_issue)
         else:
             raise ValueError(
                 "invalid offer structure: {}".format(values_by_issue))
 
         # check offer contents are valid
-        for issue in self.values_by_issue.keys():
-            if not isclose(sum(self.values_by_issue[issue].values()), 1):
+        for issue in nested.keys():
+            if not isclose(sum(nested[issue].values()), 1):
                 raise ValueError(
-                    f"Invalid offer, {issue} doesn't sum to 1 in dict {self.values_by_issue}")
-            for value, prob in self.values_by_issue[issue].items():
+                    f"Invalid offer, {issue} doesn't sum to 1 in dict {nested}")
+            for value, prob in nested[issue].items():
                 if not (isclose(prob, 1) or isclose(prob, 0)):
                     raise ValueError(
                         f"Invalid offer, {issue} has non-binary assignement")
-                if value not in self.values_by_issue[issue].keys():
+                if value not in nested[issue].keys():
                     raise ValueError(
                         f"Invalid offer, {issue} has unknown value: {value}")
 
-        for issue in self.values_by_issue.keys():
-            for value in self.values_by_issue[issue].keys():
-                if not isinstance(self.values_by_issue[issue][value], float):
-                    self.values_by_issue[issue][value] = float(
-                        self.values_by_issue[issue][value])
+        chosen_values: Dict[str, str] = {}
+        for issue in nested.keys():
+            for value in nested[issue].keys():
+                if not isinstance(nested[issue][value], float):
+                    nested[issue][value] = float(nested[issue][value])
+                if isclose(nested[issue][value], 1):
+                    chosen_values[issue] = value
+
+        self._freeze(nested, chosen_values, indent_level)
+
+    @classmethod
+    def _from_valid(cls, nested: NestedDict, chosen_values: Dict[str, str],
+                    indent_level: int = 1) -> 'Offer':
+        """
+        Creates an offer from parts that are valid by construction, e.g. because they were
+        built from value indices, without repeating the checks of the constructor.
+        The dictionaries are used as is, so they should not be shared with anything else.
+        """
+        offer = cls.__new__(cls)
+        offer._freeze(nested, chosen_values, indent_level)
+        return offer
+
+    def _freeze(self, nested: NestedDict, chosen_values: Dict[str, str],
+                indent_level: int) -> None:
+        # offers are immutable, so everything we need for lookups, comparisons
+        # and hashing can be computed once here.
+        self.indent_level = indent_level
+        self.values_by_issue: Mapping[str, Mapping[str, float]] = MappingProxyType(
+            {issue: MappingProxyType(values) for issue, values in nested.items()})
+        self._chosen_values: Mapping[str, str] = MappingProxyType(chosen_values)
+        self._sparse_repr: FrozenSet[Tuple[str, str]] = frozenset(chosen_values.items())
+        self._hash: int = hash(self._sparse_repr)
+        self._frozen = True
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Offer is immutable, cannot set {name}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Offer is immutable, cannot delete {name}")
+
+    def __reduce__(self):
+        # mapping proxies can't be pickled, so rebuild from plain dicts instead
+        return (Offer, ({issue: dict(values) for issue, values in self.values_by_issue.items()},
+                        self.indent_level))
 
     # will return the one value which is assigned 1
     # there is guaranteed to be exactly one value with a
@@ -74,17 +117,13 @@ class Offer:
 
         :param issue: The issue of which you want to get the chosen value.
         :type issue: str
-        :raises RuntimeError: raises when no choice is made
+        :raises KeyError: raises when the issue is not part of the offer
         :return: the value chosen by the offer.
         :rtype: str
         """
-        for val in self.values_by_issue[issue]:
-            if isclose(self.values_by_issue[issue][val], 1):
-                return val
+        return self._chosen_values[issue]
 
-        raise RuntimeError("invalid internal offer state.")
-
-    def __getitem__(self, key: str) -> Dict[str, float]:
+    def __getitem__(self, key: str) -> Mapping[str, float]:
         return self.values_by_issue[key]
 
     def is_assigned(self, issue: str, value: str) -> bool:
@@ -99,7 +138,7 @@ class Offer:
         :return: True iff this offer poposes the asssignement of `value` to `issue`
         :rtype: bool
         """
-        return cast(bool, isclose(self.values_by_issue[issue][value], 1))
+        return self._chosen_values[issue] == value
 
     def get_issues(self) -> Iterable[str]:
         """
@@ -116,13 +155,10 @@ class Offer:
 
         # This way sparse and dense offers can still be equal
         # but they must have the same issues
-        for issue in self.values_by_issue.keys():
-            my_chosen_value = self.get_chosen_value(issue)
-            their_chosen_value = other.get_chosen_value(issue)
-            if my_chosen_value != their_chosen_value:
-                return False
+        if self._hash != other._hash:
+            return False
 
-        return True
+        return self._sparse_repr == other._sparse_repr
 
     def __repr__(self) -> str:
         return self.get_sparse_str_repr()
@@ -167,8 +203,7 @@ class Offer:
         :return: A frozen set containt assigned issue value pairs
         :rtype: FrozenSet[Tuple[str,str]]
         """
-        return frozenset({(issue, self.get_chosen_value(issue))
-                          for issue in self.values_by_issue.keys()})
+        return self._sparse_repr
 
     def get_sparse_str_repr(self) -> str:
         """
@@ -181,9 +216,9 @@ class Offer:
         :rtype: str
         """
         return "[" \
-            + ", ".join([f"{issue}->{self.get_chosen_value(issue)}" for
-                         issue in self.values_by_issue.keys()]) \
+            + ", ".join([f"{issue}->{value}" for
+                         issue, value in self._chosen_values.items()]) \
             + "]"
 
     def __hash__(self):
-        return hash(self.get_sparse_repr())
+        return self._hash
@@ -0,0 +1,360 @@
+"""
+This module defines where the messages of a negotiation are recorded. By default agents keep
+them in memory, but for large sweeps they can be streamed to disk instead using one of the
+writers defined here, and read back lazily with :func:`read_transcript`.
+
+>>> schema = NegSpaceSchema(neg_space)
+>>> with BinaryTranscriptWriter("transcript.bin", schema) as sink:
+...     agent_a.set_transcript_sink(sink)
+...     agent_a.negotiate(agent_b)
+>>> for msg in read_transcript("transcript.bin"):
+...     print(msg)
+"""
+
+import json
+import struct
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from pyneg.types import MessageType, NegSpace
+from .atomic_constraint import AtomicConstraint
+from .compact_offer import offer_from_indices
+from .message import Message
+from .neg_space_schema import NegSpaceSchema
+
+FORMAT_NAME = "pyneg-transcript"
+FORMAT_VERSION = 1
+BINARY_MAGIC = b"PYNEGTR\x00"
+
+# record tags of the binary format
+_NAME_RECORD = 0
+_MESSAGE_RECORD = 1
+
+_HAS_OFFER = 1
+_HAS_CONSTRAINT = 2
+
+_NAME_HEADER = struct.Struct("<BHH")
+_MESSAGE_HEADER = struct.Struct("<BBHHB")
+_CONSTRAINT = struct.Struct("<HI")
+
+PathOrFile = Union[str, IO]
+
+
+class TranscriptSink:
+    """
+    Nothing but an abstract class. Agents hand every message they send
+    or receive to their sink through :func:`record`.
+    """
+
+    def record(self, msg: Message) -> None:
+        """
+        Records a single message.
+
+        :param msg: The message to record
+        :type msg: Message
+        :raises NotImplementedError:
+        """
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        """
+        Makes sure every recorded message is persisted.
+        """
+
+    def close(self) -> None:
+        """
+        Flushes and releases any resources held by the sink.
+        """
+        self.flush()
+
+    def __enter__(self) -> 'TranscriptSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class InMemoryTranscript(list, TranscriptSink):
+    """
+    The default sink, which simply keeps every message in a list.
+    Since it is a list it can be indexed and compared to lists of messages.
+    """
+
+    def record(self, msg: Message) -> None:
+        self.append(msg)
+
+
+def _schema_header(schema: NegSpaceSchema) -> Dict[str, Any]:
+    return {"format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "issues": list(schema.issues),
+            "values": [list(values) for values in schema.values]}
+
+
+def _schema_from_header(header: Dict[str, Any]) -> NegSpaceSchema:
+    if header.get("format") != FORMAT_NAME:
+        raise ValueError("Not a transcript file")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported transcript version: {header.get('version')}")
+
+    return NegSpaceSchema(dict(zip(header["issues"], header["values"])))
+
+
+class _FileTranscriptWriter(TranscriptSink):
+    """
+    Common logic of the writers: messages are encoded as soon as they are recorded but only
+    written to the file once `buffer_size` of them have accumulated, or when the
+    writer is flushed. Files given by path are closed with the writer, open files are not.
+    """
+
+    _binary = False
+
+    def __init__(self, target: PathOrFile,
+                 schema: Union[NegSpaceSchema, NegSpace],
+                 buffer_size: int = 1000):
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size should be at least 1, not {buffer_size}")
+
+        if not isinstance(schema, NegSpaceSchema):
+            schema = NegSpaceSchema(schema)
+        self.schema = schema
+        self.buffer_size = buffer_size
+        self.recorded = 0
+        self._buffer: List[Any] = []
+        if isinstance(target, str):
+            self._file: IO = open(target, "wb" if self._binary else "w")
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+        self._closed = False
+        self._write_header()
+
+    def _write_header(self) -> None:
+        raise NotImplementedError()
+
+    def _encode(self, msg: Message) -> Any:
+        raise NotImplementedError()
+
+    def _offer_indices(self, msg: Message) -> Optional[np.ndarray]:
+        if msg.offer is None:
+            return None
+        if len(list(msg.offer.get_issues())) != len(self.schema):
+            raise ValueError(f"Offer {msg.offer} does not fit the schema")
+        try:
+            return self.schema.offer_indices(msg.offer)
+        except KeyError as err:
+            raise ValueError(f"Offer {msg.offer} does not fit the schema: {err}")
+
+    def _constraint_indices(self, msg: Message) -> Optional[Tuple[int, int]]:
+        if msg.constraint is None:
+            return None
+
+        issue_index = self.schema.issue_index(msg.constraint.issue)
+        return issue_index, self.schema.value_index(msg.constraint.issue, msg.constraint.value)
+
+    def record(self, msg: Message) -> None:
+        if self._closed:
+            raise ValueError("Cannot record messages after the writer was closed")
+
+        self._buffer.append(self._encode(msg))
+        self.recorded += 1
+        if len(self._buffer) >= self.buffer_size:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self._file.write((b"" if self._binary else "").join(self._buffer))
+            self._buffer = []
+
+    def flush(self) -> None:
+        if self._closed:
+            return
+        self._write_buffer()
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._owns_file:
+            self._file.close()
+
+
+class JSONLTranscriptWriter(_FileTranscriptWriter):
+    """
+    Streams messages to a file with one JSON object per line. The first line describes the
+    negotiation space, every other line a message, e.g.
+
+    .. code-block:: json
+
+        {"sender": "A", "recipient": "B", "type": "OFFER", "offer": ["True", "9"], \
+"constraint": null}
+
+    where the offer lists the chosen value of every issue in schema order and the
+    constraint, if any, is an issue value pair.
+
+    :param target: Path of the file to write to, or an open text file
+    :type target: Union[str, IO]
+    :param schema: The negotiation space the offers are in
+    :type schema: Union[NegSpaceSchema, NegSpace]
+    :param buffer_size: The number of messages to buffer before writing them to the file
+    :type buffer_size: int
+    """
+
+    def _write_header(self) -> None:
+        self._file.write(json.dumps(_schema_header(self.schema)) + "\n")
+
+    def _encode(self, msg: Message) -> str:
+        indices = self._offer_indices(msg)
+        offer = None if indices is None else [
+            self.schema.value_name(i, index) for i, index in enumerate(indices)]
+        constraint = None if msg.constraint is None else [msg.constraint.issue,
+                                                          msg.constraint.value]
+        return json.dumps({"sender": msg.sender_name,
+                           "recipient": msg.recipient_name,
+                           "type": msg.type_.name,
+                           "offer": offer,
+                           "constraint": constraint}) + "\n"
+
+
+class BinaryTranscriptWriter(_FileTranscriptWriter):
+    """
+    Streams messages to a compact binary file. The file starts with a header containing
+    the negotiation space, after which offers are stored as one value index per issue,
+    using the index type of the :class:`NegSpaceSchema`. Agent names are stored once and
+    referred to by number afterwards. All integers are little endian.
+
+    :param target: Path of the file to write to, or an open binary file
+    :type target: Union[str, IO]
+    :param schema: The negotiation space the offers are in
+    :type schema: Union[NegSpaceSchema, NegSpace]
+    :param buffer_size: The number of messages to buffer before writing them to the file
+    :type buffer_size: int
+    """
+
+    _binary = True
+
+    def __init__(self, target: PathOrFile,
+                 schema: Union[NegSpaceSchema, NegSpace],
+                 buffer_size: int = 1000):
+        self._names: Dict[str, int] = {}
+        super().__init__(target, schema, buffer_size)
+
+    def _write_header(self) -> None:
+        header = json.dumps(_schema_header(self.schema)).encode("utf-8")
+        self._file.write(BINARY_MAGIC + struct.pack("<I", len(header)) + header)
+
+    def _name_id(self, name: str, records: List[bytes]) -> int:
+        if name not in self._names:
+            encoded = name.encode("utf-8")
+            self._names[name] = len(self._names)
+            records.append(_NAME_HEADER.pack(_NAME_RECORD, self._names[name], len(encoded))
+                           + encoded)
+        return self._names[name]
+
+    def _encode(self, msg: Message) -> bytes:
+        records: List[bytes] = []
+        sender = self._name_id(msg.sender_name, records)
+        recipient = self._name_id(msg.recipient_name, records)
+        indices = self._offer_indices(msg)
+        constraint = self._constraint_indices(msg)
+        flags = (_HAS_OFFER if indices is not None else 0) | \
+            (_HAS_CONSTRAINT if constraint is not None else 0)
+
+        record = _MESSAGE_HEADER.pack(_MESSAGE_RECORD, msg.type_.value, sender, recipient, flags)
+        if indices is not None:
+            record += indices.astype(self.schema.index_dtype.newbyteorder("<")).tobytes()
+        if constraint is not None:
+            record += _CONSTRAINT.pack(*constraint)
+        records.append(record)
+
+        return b"".join(records)
+
+
+def _message(schema: NegSpaceSchema, sender: str, recipient: str, type_: MessageType,
+             indices: Optional[List[int]], constraint: Optional[Tuple[int, int]]) -> Message:
+    offer = None if indices is None else offer_from_indices(schema, indices)
+    atomic_constraint = None if constraint is None else AtomicConstraint(
+        schema.issues[constraint[0]], schema.value_name(*constraint))
+    return Message(sender, recipient, type_, offer, atomic_constraint)
+
+
+def _read_exactly(file: IO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("Transcript file is truncated")
+    return data
+
+
+def _read_binary(file: IO) -> Iterator[Message]:
+    header_size, = struct.unpack("<I", _read_exactly(file, 4))
+    schema = _schema_from_header(json.loads(_read_exactly(file, header_size).decode("utf-8")))
+    index_dtype = schema.index_dtype.newbyteorder("<")
+    offer_size = index_dtype.itemsize * len(schema)
+    names: Dict[int, str] = {}
+
+    while True:
+        tag = file.read(1)
+        if not tag:
+            return
+
+        if tag[0] == _NAME_RECORD:
+            name_id, length = struct.unpack("<HH", _read_exactly(file, 4))
+            names[name_id] = _read_exactly(file, length).decode("utf-8")
+        elif tag[0] == _MESSAGE_RECORD:
+            type_value, sender, recipient, flags = struct.unpack(
+                "<BHHB", _read_exactly(file, _MESSAGE_HEADER.size - 1))
+            indices = None
+            constraint = None
+            if flags & _HAS_OFFER:
+                indices = np.frombuffer(_read_exactly(file, offer_size),
+                                        dtype=index_dtype).tolist()
+            if flags & _HAS_CONSTRAINT:
+                constraint = _CONSTRAINT.unpack(_read_exactly(file, _CONSTRAINT.size))
+            yield _message(schema, names[sender], names[recipient],
+                           MessageType(type_value), indices, constraint)
+        else:
+            raise ValueError(f"Unknown record type {tag[0]} in transcript")
+
+
+def _read_jsonl(file: IO) -> Iterator[Message]:
+    schema = _schema_from_header(json.loads(file.readline()))
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        indices = None
+        if record["offer"] is not None:
+            indices = [schema.value_index(issue, value)
+                       for issue, value in zip(schema.issues, record["offer"])]
+        constraint = None
+        if record["constraint"] is not None:
+            issue, value = record["constraint"]
+            constraint = (schema.issue_index(issue), schema.value_index(issue, value))
+        yield _message(schema, record["sender"], record["recipient"],
+                       MessageType[record["type"]], indices, constraint)
+
+
+def read_transcript(path: str) -> Iterator[Message]:
+    """
+    Lazily reads back a transcript written by :class:`JSONLTranscriptWriter` or
+    :class:`BinaryTranscriptWriter`. The format is detected from the contents of the file.
+    Messages are decoded one at a time, so arbitrarily large transcripts can be processed.
+
+    :param path: Path of the transcript file
+    :type path: str
+    :raises ValueError: if the file is not a valid transcript
+    :return: An iterator over the recorded messages, in the order they were recorded
+    :rtype: Iterator[Message]
+    """
+    with open(path, "rb") as file:
+        is_binary = file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        if is_binary:
+            yield from _read_binary(file)
+            return
+
+    with open(path, "r") as text_file:
+        yield from _read_jsonl(text_file)
@@ -0,0 +1,227 @@
+"""
+This module defines how messages travel between agents that negotiate asynchronously, see
+:class:`AsyncAgent`. A transport is one end of a connection between two agents: what is sent
+on one end is received on the other, in order. :class:`QueueTransport` connects agents in the
+same process, :class:`StreamTransport` connects them over sockets or pipes.
+
+>>> async def ping():
+...     left, right = QueueTransport.pair()
+...     await left.send(msg)
+...     return await right.receive()
+"""
+
+import asyncio
+import socket
+import struct
+from typing import Optional, Tuple
+
+from .codec import MessageCodec
+from .message import Message
+
+_FRAME_LENGTH = struct.Struct("<I")
+
+
+class Transport:
+    """
+    Nothing but an abstract class. Subclass it to let agents negotiate over other channels,
+    e.g. sockets.
+    """
+
+    async def send(self, msg: Message) -> None:
+        """
+        Sends a message to the other end.
+
+        :param msg: The message to send
+        :type msg: Message
+        :raises NotImplementedError:
+        """
+        raise NotImplementedError()
+
+    async def receive(self) -> Optional[Message]:
+        """
+        Waits for the next message from the other end.
+
+        :raises NotImplementedError:
+        :return: The message, or None if the other end was closed
+        :rtype: Optional[Message]
+        """
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        """
+        Closes this end, after which the other end receives None.
+        Closing an end more than once has no effect.
+        """
+
+
+class QueueTransport(Transport):
+    """
+    Connects two agents in the same process with a pair of :class:`asyncio.Queue` objects.
+    Messages are passed by reference, without being copied or serialised.
+    Use :func:`pair` to create both ends. On python versions before 3.10 queues are bound to
+    the event loop they are created in, so create them in the loop that will use them.
+
+    :param inbox: The queue messages are received from
+    :type inbox: asyncio.Queue
+    :param outbox: The queue messages are sent to
+    :type outbox: asyncio.Queue
+    """
+
+    def __init__(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        self.inbox = inbox
+        self.outbox = outbox
+        self.closed = False
+        self._peer_closed = False
+
+    @classmethod
+    def pair(cls, maxsize: int = 0) -> Tuple['QueueTransport', 'QueueTransport']:
+        """
+        Creates both ends of a connection.
+
+        :param maxsize: How many messages can be in flight in each direction before \
+            :func:`send` waits, 0 means no limit
+        :type maxsize: int
+        :return: The two ends
+        :rtype: Tuple[QueueTransport, QueueTransport]
+        """
+        left_to_right: asyncio.Queue = asyncio.Queue(maxsize)
+        right_to_left: asyncio.Queue = asyncio.Queue(maxsize)
+        return cls(right_to_left, left_to_right), cls(left_to_right, right_to_left)
+
+    async def send(self, msg: Message) -> None:
+        if self.closed:
+            raise RuntimeError("transport is closed")
+        await self.outbox.put(msg)
+
+    async def receive(self) -> Optional[Message]:
+        if self._peer_closed:
+            return None
+
+        msg = await self.inbox.get()
+        self._peer_closed = msg is None
+        return msg
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        # None tells the other end no more messages will follow
+        await self.outbox.put(None)
+
+
+class StreamTransport(Transport):
+    """
+    Connects two agents over an asyncio stream, such as a TCP or unix socket or a pipe, so they
+    can negotiate from different processes or machines. Messages are encoded with a
+    :class:`MessageCodec`, in its binary format unless `binary` is False, and every message is
+    preceded by its length. The other end must use a codec for the same negotiation space,
+    but may use either format.
+
+    Use :func:`connect` to connect to a server started with :func:`asyncio.start_server`, whose
+    callback wraps the streams it is given in a transport, or :func:`pair` for both ends of a
+    local socket pair.
+
+    :param reader: The stream messages are received from
+    :type reader: asyncio.StreamReader
+    :param writer: The stream messages are sent to
+    :type writer: asyncio.StreamWriter
+    :param codec: The codec to encode and decode messages with
+    :type codec: MessageCodec
+    :param binary: Whether to send messages in the binary or the JSON format
+    :type binary: bool
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 codec: MessageCodec, binary: bool = True):
+        self.reader = reader
+        self.writer = writer
+        self.codec = codec
+        self.binary = binary
+        self.closed = False
+
+    @classmethod
+    async def pair(cls, codec: MessageCodec,
+                   binary: bool = True) -> Tuple['StreamTransport', 'StreamTransport']:
+        """
+        Creates both ends of a connection over a new socket pair.
+
+        :param codec: The codec both ends use
+        :type codec: MessageCodec
+        :param binary: Whether to send messages in the binary or the JSON format
+        :type binary: bool
+        :return: The two ends
+        :rtype: Tuple[StreamTransport, StreamTransport]
+        """
+        left, right = socket.socketpair()
+        left_reader, left_writer = await asyncio.open_connection(sock=left)
+        right_reader, right_writer = await asyncio.open_connection(sock=right)
+        return (cls(left_reader, left_writer, codec, binary),
+                cls(right_reader, right_writer, codec, binary))
+
+    @classmethod
+    async def connect(cls, host: str, port: int, codec: MessageCodec,
+                      binary: bool = True) -> 'StreamTransport':
+        """
+        Opens a TCP connection to another agent.
+
+        :param host: The host the other agent listens on
+        :type host: str
+        :param port: The port the other agent listens on
+        :type port: int
+        :param codec: The codec to encode and decode messages with
+        :type codec: MessageCodec
+        :param binary: Whether to send messages in the binary or the JSON format
+        :type binary: bool
+        :return: This end of the connection
+        :rtype: StreamTransport
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, codec, binary)
+
+    async def send(self, msg: Message) -> None:
+        if self.closed:
+            raise RuntimeError("transport is closed")
+
+        frame = self.codec.encode(msg) if self.binary else \
+            self.codec.encode_json(msg).encode("utf-8")
+        self.writer.write(_FRAME_LENGTH.pack(len(frame)) + frame)
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            # like a queue, a closed end doesn't stop the other one from sending
+            pass
+
+    async def receive(self) -> Optional[Message]:
+        """
+        Waits for the next message from the other end.
+
+        :raises ValueError: if the other end sends something that isn't a message \
+            of this negotiation, or announces one longer than any such message can be
+        :return: The message, or None if the other end was closed
+        :rtype: Optional[Message]
+        """
+        try:
+            length, = _FRAME_LENGTH.unpack(await self.reader.readexactly(_FRAME_LENGTH.size))
+            if length > self.codec.max_message_size:
+                raise ValueError(f"Message of {length} bytes exceeds the maximum of "
+                                 f"{self.codec.max_message_size} bytes")
+            frame = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+        return self.codec.decode(frame)
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        self.writer.close()
+        # wait_closed was only added in python 3.7
+        wait_closed = getattr(self.writer, "wait_closed", None)
+        if wait_closed is not None:
+            try:
+                await wait_closed()
+            except ConnectionError:
+                pass
@@ -12,10 +12,16 @@ from pyneg.engine.dtp_generator import DTPGenerator
 from pyneg.engine.evaluator import Evaluator
 from pyneg.engine.linear_evaluator import LinearEvaluator
 from pyneg.engine.problog_evaluator import ProblogEvaluator
+from pyneg.engine.caching_evaluator import CachingEvaluator
+from pyneg.engine.constraint_store import ConstraintStore
+from pyneg.engine.knowledge_base import KnowledgeBase, KnowledgeChange
+from pyneg.engine.constraint_discovery import ConstraintDiscovery
 from pyneg.engine.constrained_enum_generator import ConstrainedEnumGenerator
 from pyneg.engine.constrained_random_generator import ConstrainedRandomGenerator
 from pyneg.engine.constrained_dtp_generator import ConstrainedDTPGenerator
 from pyneg.engine.constrained_linear_evaluator import ConstrainedLinearEvaluator
 from pyneg.engine.constrained_problog_evaluator import ConstrainedProblogEvaluator
 from pyneg.engine.engine import Engine, AbstractEngine
+from pyneg.engine.metrics import InMemoryMetrics, MetricsSink, TimingHistogram
+from pyneg.engine.problog_pool import ProblogPool
 
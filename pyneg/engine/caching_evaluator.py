@@ -0,0 +1,209 @@
+"""
+An evaluator that wraps another evaluator and remembers the utilities
+it calculated. Useful for evaluators where a single evaluation is expensive,
+such as the :class:`ProblogEvaluator`.
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, List, NamedTuple, Optional, Set, Union
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, CompactOffer, NegSpaceSchema, Offer
+from pyneg.types import AtomicDict
+
+from .evaluator import Evaluator, OfferBatch, batch_index_matrix
+from .knowledge_base import KnowledgeBase
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of a :class:`CachingEvaluator`, analogous to
+    :func:`functools.lru_cache`.
+    """
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+    version: int
+
+
+class CachingEvaluator(Evaluator):
+    """
+    Wraps any :class:`Evaluator` and caches the utilities it calculates, keyed on the
+    sparse representation of the offer, so :class:`Offer` and :class:`CompactOffer`
+    objects that choose the same values share an entry. At most `maxsize` entries are kept,
+    the least recently used ones are evicted first. If `maxsize` is None the cache is unbounded.
+
+    Every call that changes how offers are evaluated, i.e. :func:`add_utilities`,
+    :func:`set_utilities`, :func:`add_constraint` and :func:`add_constraints`, is passed on to
+    the wrapped evaluator and bumps :attr:`version`, which invalidates every cached utility.
+    If the wrapped evaluator keeps its knowledge in a :class:`KnowledgeBase`, changes made to
+    it elsewhere, e.g. by a generator sharing it, invalidate the cache as well.
+    Any other attribute is looked up on the wrapped evaluator.
+
+    >>> evaluator = CachingEvaluator(ProblogEvaluator(neg_space, utilities, -1000, kb))
+    >>> evaluator.calc_offer_utility(offer)
+    10.0
+    >>> evaluator.calc_offer_utility(offer)
+    10.0
+    >>> evaluator.cache_info()
+    CacheInfo(hits=1, misses=1, maxsize=1024, currsize=1, version=0)
+    """
+
+    def __init__(self, evaluator: Evaluator, maxsize: Optional[int] = 1024):
+        super().__init__()
+        if maxsize is not None and maxsize < 0:
+            raise ValueError(f"maxsize should not be negative, got {maxsize}")
+
+        self.evaluator = evaluator
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self._knowledge_version = self._current_knowledge_version()
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that aren't found on the wrapper itself
+        if name == "evaluator":
+            raise AttributeError(name)
+        return getattr(self.evaluator, name)
+
+    @property
+    def supports_batch(self) -> bool:  # type: ignore
+        # a batch only pays off if the wrapped evaluator can score the misses in bulk
+        return self.evaluator.supports_batch
+
+    def cache_info(self) -> CacheInfo:
+        """
+        :return: The hit and miss counts, the bounds and the current size of the cache.
+        :rtype: CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache), self.version)
+
+    def cache_clear(self) -> None:
+        """
+        Empties the cache and resets the statistics. Does not change the version.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self) -> None:
+        """
+        Bumps the version and drops every cached utility. This is done automatically
+        when the wrapped evaluator is changed through this wrapper or through its
+        :class:`KnowledgeBase`, but has to be called by hand if it is changed otherwise.
+        """
+        self.version += 1
+        self._cache.clear()
+        self._knowledge_version = self._current_knowledge_version()
+
+    def _current_knowledge_version(self) -> Optional[int]:
+        knowledge = getattr(self.evaluator, "knowledge", None)
+        return knowledge.version if isinstance(knowledge, KnowledgeBase) else None
+
+    def _check_knowledge(self) -> None:
+        if self._current_knowledge_version() != self._knowledge_version:
+            self.invalidate()
+
+    def _lookup(self, key: Hashable) -> Optional[float]:
+        try:
+            util = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return util
+
+    def _store(self, key: Hashable, util: float) -> None:
+        if self.maxsize == 0:
+            return
+
+        self._cache[key] = util
+        self._cache.move_to_end(key)
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def calc_offer_utility(self, offer: Union[Offer, CompactOffer]) -> float:
+        self._check_knowledge()
+        key = offer.get_sparse_repr()
+        util = self._lookup(key)
+        if util is None:
+            util = self.evaluator.calc_offer_utility(offer)
+            self._store(key, util)
+
+        return util
+
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Looks up every offer in the batch and passes only the ones that are not cached
+        on to the wrapped evaluator, in a single batch.
+        See :func:`Evaluator.calc_offer_utilities`
+
+        :param batch: An iterable of offers or a matrix of value indices relative to `schema`
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to. Only needed if \
+            the batch is an index matrix.
+        :type schema: Optional[NegSpaceSchema]
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        self._check_knowledge()
+        if isinstance(batch, np.ndarray):
+            schema, indices = batch_index_matrix(batch, schema)
+            keys = [frozenset(zip(schema.issues, map(schema.value_name,
+                                                      range(len(schema)), row)))
+                    for row in indices]
+            offers: Union[np.ndarray, List[Union[Offer, CompactOffer]]] = indices
+        else:
+            offers = list(batch)
+            keys = [offer.get_sparse_repr() for offer in offers]
+
+        utils = np.empty(len(keys), dtype=float)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            util = self._lookup(key)
+            if util is None:
+                missing.append(i)
+            else:
+                utils[i] = util
+
+        if missing:
+            if isinstance(offers, np.ndarray):
+                new_utils = self.evaluator.calc_offer_utilities(offers[missing], schema)
+            else:
+                new_utils = self.evaluator.calc_offer_utilities(
+                    [offers[i] for i in missing], schema)
+            for i, util in zip(missing, new_utils):
+                utils[i] = util
+                self._store(keys[i], float(util))
+
+        return utils
+
+    def calc_assignment_util(self, issue: str, value: str) -> float:
+        return self.evaluator.calc_assignment_util(issue, value)
+
+    def add_utilities(self, new_utils: AtomicDict) -> bool:
+        result = self.evaluator.add_utilities(new_utils)
+        self.invalidate()
+        return result
+
+    def set_utilities(self, new_utils: AtomicDict) -> bool:
+        result = self.evaluator.set_utilities(new_utils)
+        self.invalidate()
+        return result
+
+    def add_constraint(self, constraint: AtomicConstraint) -> bool:
+        result = self.evaluator.add_constraint(constraint)
+        self.invalidate()
+        return result
+
+    def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
+        result = self.evaluator.add_constraints(new_constraints)
+        self.invalidate()
+        return result
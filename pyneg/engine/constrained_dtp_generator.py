@@ -3,14 +3,19 @@ This module defines :class:`ConstrainedDTPGenerator` which is the constraint awa
 :class:`DTPGenerator`
 """
 
-from typing import Optional, Set, List
+from typing import TYPE_CHECKING, Optional, Set, List
 
 from pyneg.comms import AtomicConstraint
 from pyneg.comms import Offer
 from pyneg.types import NegSpace, AtomicDict
 from pyneg.utils import atom_from_issue_value
 from .constrained_problog_evaluator import ConstrainedProblogEvaluator
+from .constraint_discovery import ConstraintDiscovery
 from .dtp_generator import DTPGenerator
+from .knowledge_base import KnowledgeBase
+
+if TYPE_CHECKING:
+    from .problog_pool import ProblogPool # pylint: disable=cyclic-import
 
 
 class ConstrainedDTPGenerator(DTPGenerator):
@@ -18,6 +23,10 @@ class ConstrainedDTPGenerator(DTPGenerator):
     This class defines the constraint aware version of the DTPGenerator. This means that it
     also uses DTProbLog to generate optimal offers but adds additional logic to deal with
     constraints. For more information see :class:`DTPGenerator`
+
+    Constraints are checked by a :class:`ConstrainedProblogEvaluator` that shares the
+    :class:`KnowledgeBase` of the generator, which can be passed as `knowledge`.
+    See :class:`ConstraintDiscovery` for `tight_bounds`.
     """
     def __init__(self,
                  neg_space: NegSpace,
@@ -27,44 +36,46 @@ class ConstrainedDTPGenerator(DTPGenerator):
                  kb: List[str],
                  constr_value: float,
                  initial_constraints: Optional[Set[AtomicConstraint]],
-                 auto_constraints=True):
+                 auto_constraints=True,
+                 top_k: Optional[int] = None,
+                 pool: Optional['ProblogPool'] = None,
+                 knowledge: Optional[KnowledgeBase] = None,
+                 tight_bounds: bool = False):
         self.constr_value = constr_value
+        if knowledge is None:
+            knowledge = KnowledgeBase()
         self.evaluator = ConstrainedProblogEvaluator(
-            neg_space, utilities, non_agreement_cost, kb, constr_value, set())
-        self.constr_value = constr_value
-        self.constraints: Set[AtomicConstraint] = set([])
+            neg_space, utilities, non_agreement_cost, kb, constr_value, set(), pool,
+            knowledge)
         if initial_constraints:
-            self.constraints.update(initial_constraints)
+            knowledge.add_constraints(initial_constraints)
         self.auto_constraints = auto_constraints
-        super().__init__(neg_space, utilities, non_agreement_cost, acceptance_threshold, kb)
-        self._index_max_utilities()
+        super().__init__(neg_space, utilities, non_agreement_cost, acceptance_threshold, kb,
+                         top_k, pool, knowledge)
+        self.discovery = ConstraintDiscovery(self.neg_space, self.knowledge, tight_bounds)
         self.constraints_satisfiable = True
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
     def reset_generator(self):
         super().reset_generator()
-        self.constraints = set()
-        self._index_max_utilities()
+        self.knowledge.clear_constraints()
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
-        self.constraints.add(constraint)
         self.evaluator.add_constraint(constraint)
-        self._index_max_utilities()
-        if not self.get_unconstrained_values_by_issue(constraint.issue):
+        self._discard_queue()
+        if not self.constraints.unconstrained_values(constraint.issue):
             self.constraints_satisfiable = False
             return False
 
         return True
 
     def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
-        self.constraints.update(new_constraints)
-        self.evaluator.add_constraints(self.constraints)
-        self._index_max_utilities()
-        for issue in self.neg_space.keys():
-            if not self.get_unconstrained_values_by_issue(issue):
-                self.constraints_satisfiable = False
-                return False
+        self.evaluator.add_constraints(new_constraints)
+        self._discard_queue()
+        if not self.constraints.satisfiable():
+            self.constraints_satisfiable = False
+            return False
 
         return True
 
@@ -77,20 +88,14 @@ class ConstrainedDTPGenerator(DTPGenerator):
         :return: True iff the given offer satisfies all known constraints.
         :rtype: bool
         """
-        for constr in self.constraints:
-            if not constr.is_satisfied_by_offer(offer):
-                return False
-
-        return True
+        return self.constraints.satisfied_by_offer(offer)
 
     # def _add_utilities(self, new_utils):
     #     super().add_utilities(new_utils)
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = {
-            **self.utilities,
-            **new_utils
-        }
+        self.knowledge.add_utilities(new_utils)
+        self._discard_queue()
 
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
@@ -98,7 +103,8 @@ class ConstrainedDTPGenerator(DTPGenerator):
         return self.constraints_satisfiable
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
+        self.knowledge.set_utilities(new_utils)
+        self._discard_queue()
         if self.auto_constraints:
             self.add_constraints(self.discover_constraints())
 
@@ -121,57 +127,29 @@ class ConstrainedDTPGenerator(DTPGenerator):
             util = self.evaluator.calc_offer_utility(offer)
         return util >= self.acceptability_threshold and self.satisfies_all_constraints(offer)
 
-    def _compile_dtproblog_model(self):
-        model_string = super()._compile_dtproblog_model()
-
-        constr_string = ""
+    def _decision_utilities(self) -> AtomicDict:
+        utilities = super()._decision_utilities()
         for constr in self.constraints:
-            constr_atom = atom_from_issue_value(constr.issue, constr.value)
-            constr_string += "utility({},{}).\n".format(constr_atom,
-                                                        self.non_agreement_cost)
+            utilities[atom_from_issue_value(constr.issue, constr.value)] = \
+                self.non_agreement_cost
 
-        return model_string + constr_string
+        return utilities
 
     def discover_constraints(self) -> Set[AtomicConstraint]:
         """
         Attempts to deduce new constraints from the current knowledge base.
-        see :ref:`constraint-discovery` for more information.
+        see :ref:`constraint-discovery` and :class:`ConstraintDiscovery` for more information.
 
-        :return: A set containing all the newly discovered constraints.
+        :return: A set containing the constraints that weren't known yet.
         :rtype: Set[AtomicConstraint]
         """
-        new_constraints = set()
-        for issue in self.neg_space.keys():
-            best_case = sum(
-                [bc for i, bc in self.max_utility_by_issue.items() if i != issue])
-
-            for value in self.neg_space[issue]:
-                atom = atom_from_issue_value(issue, value)
-                if atom in self.utilities.keys():
-                    value_util = self.utilities[atom]
-                else:
-                    value_util = 0
-
-                if best_case + value_util < self.acceptability_threshold:
-                    new_constraints.add(AtomicConstraint(issue, value))
-
-        return new_constraints
+        return self.discovery.discover(self.acceptability_threshold)
 
     def get_unconstrained_values_by_issue(self, issue: str):
-        issue_constrained_values = set(
-            constr.value for constr in self.constraints if constr.issue == issue)
-        issue_unconstrained_values = set(
-            self.neg_space[issue]) - issue_constrained_values
-        return issue_unconstrained_values
+        return set(self.constraints.unconstrained_values(issue))
 
     def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
-        for constr in self.constraints:
-            for issue in offer.get_issues():
-                chosen_value = offer.get_chosen_value(issue)
-                if not constr.is_satisfied_by_assignment(issue, chosen_value):
-                    return AtomicConstraint(issue, chosen_value)
-
-        return None
+        return self.constraints.find_violation(offer)
 
     def generate_offer(self) -> Offer:
         if not self.constraints_satisfiable:
@@ -186,26 +164,5 @@ class ConstrainedDTPGenerator(DTPGenerator):
             raise RuntimeError()
         return offer
 
-    def _index_max_utilities(self):
-        """
-        Index the currently known utilities so we can use this as a heuristic during
-        the constraint discovery process. See :ref:`constraint-discovery` for more information.
-        """
-        self.max_utility_by_issue = {
-            issue: 0 for issue in self.neg_space.keys()}
-        for issue in self.neg_space.keys():
-            unconstrained_values = self.get_unconstrained_values_by_issue(
-                issue)
-            if not unconstrained_values:
-                self.constraints_satisfiable = False
-                return
-
-            max_issue_util = -(2 ** 31)
-            for value in self.neg_space[issue]:
-                util = self.evaluator.calc_assignment_util(issue, value)
-                if util > max_issue_util:
-                    max_issue_util = util
-                    self.max_utility_by_issue[issue] = max_issue_util
-
     def get_constraints(self):
         return self.constraints
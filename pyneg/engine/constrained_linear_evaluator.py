@@ -3,10 +3,14 @@ Defines the :class:`ConstrainedLinearEvaluator` class, the contraint aware versi
 :class:`LinearEvaluator`
 """
 
-from typing import Dict, Set, Union
+from typing import Dict, Optional, Set, Union
 
-from pyneg.comms import Offer, AtomicConstraint
+import numpy as np
+
+from pyneg.comms import Offer, AtomicConstraint, NegSpaceSchema
 from pyneg.types import AtomicDict
+from pyneg.engine.evaluator import OfferBatch, batch_index_matrix
+from pyneg.engine.knowledge_base import KnowledgeBase
 from pyneg.engine.linear_evaluator import LinearEvaluator, Strategy
 
 
@@ -14,32 +18,62 @@ class ConstrainedLinearEvaluator(LinearEvaluator):
     """
     This class is the contraint aware version of :class:`LinearEvaluator`. It works the
     same except that for any offer that violates one of the known constraints
-    it returns a utility of constr_value.
+    it returns a utility of constr_value. The constraints are kept in the
+    :class:`ConstraintStore` of its :class:`KnowledgeBase`.
     """
     def __init__(self, utilities: AtomicDict,
                  issue_weights: Dict[str, float],
                  non_agreement_cost: float,
                  constr_value: float,
-                 initial_constraints: Set[AtomicConstraint]):
+                 initial_constraints: Set[AtomicConstraint],
+                 knowledge: Optional[KnowledgeBase] = None):
         self.constr_value = constr_value
-        super().__init__(utilities, issue_weights, non_agreement_cost)
-        self.constraints: Set[AtomicConstraint] = set()
+        super().__init__(utilities, issue_weights, non_agreement_cost, knowledge)
         if initial_constraints:
-            self.constraints.update(initial_constraints)
-
-
+            self.knowledge.add_constraints(initial_constraints)
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
-        self.constraints.add(constraint)
+        self.knowledge.add_constraints({constraint})
         return True
 
     def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
-        self.constraints.update(new_constraints)
+        self.knowledge.add_constraints(new_constraints)
         return True
 
+    def get_constraint_mask(self, schema: NegSpaceSchema) -> np.ndarray:
+        """
+        Returns a boolean matrix with the same shape as the utility matrix
+        (see :func:`get_utility_matrix`) that is True for every assignment that violates
+        a known constraint. The mask is cached per schema until new constraints are added.
+
+        :param schema: The schema that determines the order of issues and values
+        :type schema: NegSpaceSchema
+        :return: The constraint mask
+        :rtype: np.ndarray
+        """
+        return self.constraints.mask(schema)
+
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Batch version of :func:`calc_offer_utility`. Offers that violate a constraint
+        according to :func:`get_constraint_mask` get a utility of constr_value.
+
+        :param batch: An iterable of offers or a matrix of value indices relative to `schema`
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to. Can be omitted if the \
+            batch consists of :class:`CompactOffer` objects
+        :type schema: Optional[NegSpaceSchema]
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        schema, indices = batch_index_matrix(batch, schema)
+        utils = super().calc_offer_utilities(indices, schema)
+        violating = self.get_constraint_mask(schema)[np.arange(len(schema)), indices].any(axis=1)
+        return np.where(violating, self.constr_value, utils)
+
     def calc_assignment_util(self, issue: str, value: str) -> float:
-        if not all([constr.is_satisfied_by_assignment(issue, value)
-                    for constr in self.constraints]):
+        if not self.constraints.is_allowed(issue, value):
             return self.constr_value
 
         return super().calc_assignment_util(issue, value)
@@ -66,16 +100,4 @@ class ConstrainedLinearEvaluator(LinearEvaluator):
         :return: True iff the given offer or strategy satisfies all known constraints.
         :rtype: bool
         """
-        if isinstance(to_check, Offer):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_offer(to_check):
-                    return False
-        elif isinstance(to_check, Strategy):
-            for constr in self.constraints:
-                if not constr.is_satisfied_by_strat(to_check):
-                    return False
-        else:
-            raise TypeError(f"""object is of type {type(to_check)} instead of
-                                Union[Offer, Strategy]. Object: {to_check}""")
-
-        return True
+        return self.constraints.satisfied_by(to_check)
@@ -0,0 +1,159 @@
+"""
+Defines the :class:`ConstraintDiscovery` class, which deduces atomic constraints from the
+utilities in a :class:`KnowledgeBase`. See :ref:`constraint-discovery` for the theory.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+from pyneg.comms import AtomicConstraint
+from pyneg.types import NegSpace
+from pyneg.utils import atom_from_issue_value
+
+from .knowledge_base import KnowledgeBase, KnowledgeChange
+
+
+class ConstraintDiscovery:
+    """
+    An assignment can never be part of an acceptable offer if its utility plus the best utility
+    every other issue can contribute is below the acceptability threshold. Rather than summing
+    those bounds for every issue on every call, this class keeps the values of every issue
+    sorted by utility, the bound of every issue and the running total of the bounds.
+    It subscribes to the knowledge base, so only issues whose utilities changed are re-sorted.
+    Discovering constraints then takes a binary search per issue, plus time linear in the number
+    of constraints found. Assignments with unknown utilities are assigned 0 utility.
+    If not even the best possible offer is acceptable, only the values of the issue with the
+    lowest bound are ruled out, rather than every value of every issue.
+
+    By default the bound of an issue is the best utility of any of its values. If `tight_bounds`
+    is set, values ruled out by a known constraint are skipped, so the bound is that of the
+    second best value if the best one is forbidden and so on. Offers violating a constraint are
+    never acceptable, so this is just as sound and it discovers more constraints.
+
+    >>> discovery = ConstraintDiscovery({"First": ["A", "B"], "Second": ["C", "D"]},
+    ...                                 KnowledgeBase({"First_A": 10, "Second_C": 5}))
+    >>> discovery.discover(12)
+    {First!=B, Second!=D}
+
+    :param neg_space: The negotiation space to discover constraints in
+    :type neg_space: NegSpace
+    :param knowledge: The knowledge base holding the utilities and known constraints
+    :type knowledge: KnowledgeBase
+    :param tight_bounds: Whether to ignore forbidden values when bounding an issue
+    :type tight_bounds: bool
+    """
+
+    def __init__(self, neg_space: NegSpace, knowledge: KnowledgeBase,
+                 tight_bounds: bool = False):
+        self.neg_space = {str(issue): list(map(str, values))
+                          for issue, values in neg_space.items()}
+        self.knowledge = knowledge
+        self.tight_bounds = tight_bounds
+        self.bounds: Dict[str, Optional[float]] = {}
+        self.best_case = 0.0
+        self._atom_issues = {atom_from_issue_value(issue, value): issue
+                             for issue, values in self.neg_space.items() for value in values}
+        # the values of every issue sorted by increasing utility
+        self._sorted_values: Dict[str, List[str]] = {}
+        self._sorted_utils: Dict[str, List[float]] = {}
+        # number of lowest values of every issue that are known to be forbidden already
+        self._checked: Dict[str, int] = {}
+        self._unbounded: Set[str] = set()
+        self._resort: Set[str] = set(self.neg_space)
+        self._rebound: Set[str] = set()
+        knowledge.subscribe(self._on_change)
+
+    def _on_change(self, change: KnowledgeChange) -> None:
+        if change.replaced:
+            self._resort.update(self.neg_space)
+        for atom in change.utilities:
+            issue = self._atom_issues.get(atom)
+            if issue is not None:
+                self._resort.add(issue)
+
+        if change.constraints:
+            # the constrained values will be skipped over when they're checked next time
+            if self.tight_bounds:
+                self._rebound.update(constr.issue for constr in change.constraints
+                                     if constr.issue in self.neg_space)
+        elif not (change.utilities or change.rules or change.replaced):
+            # the constraints were cleared
+            self._checked = dict.fromkeys(self.neg_space, 0)
+            if self.tight_bounds:
+                self._rebound.update(self.neg_space)
+
+    def _refresh(self) -> None:
+        utilities = self.knowledge.utilities
+        for issue in self._resort:
+            ranked = sorted(((utilities.get(atom_from_issue_value(issue, value), 0), value)
+                             for value in self.neg_space[issue]), key=lambda tup: tup[0])
+            self._sorted_utils[issue] = [util for util, _ in ranked]
+            self._sorted_values[issue] = [value for _, value in ranked]
+            self._checked[issue] = 0
+        self._rebound.update(self._resort)
+        self._resort = set()
+
+        for issue in self._rebound:
+            self._set_bound(issue, self._issue_bound(issue))
+        self._rebound = set()
+
+    def _issue_bound(self, issue: str) -> Optional[float]:
+        utils = self._sorted_utils[issue]
+        if not self.tight_bounds:
+            return utils[-1] if utils else None
+
+        values = self._sorted_values[issue]
+        for index in reversed(range(len(values))):
+            if self.knowledge.constraints.is_allowed(issue, values[index]):
+                return utils[index]
+
+        return None
+
+    def _set_bound(self, issue: str, bound: Optional[float]) -> None:
+        old_bound = self.bounds.get(issue)
+        if old_bound is not None:
+            self.best_case -= old_bound
+        if bound is None:
+            self._unbounded.add(issue)
+        else:
+            self._unbounded.discard(issue)
+            self.best_case += bound
+        self.bounds[issue] = bound
+
+    def discover(self, threshold: float) -> Set[AtomicConstraint]:
+        """
+        Deduces the constraints that follow from the current utilities.
+        Only constraints that aren't known yet are returned.
+
+        :param threshold: The lowest utility an acceptable offer can have
+        :type threshold: float
+        :return: The newly discovered constraints. Empty if, with `tight_bounds`, an issue \
+            has no allowed values left.
+        :rtype: Set[AtomicConstraint]
+        """
+        self._refresh()
+        if self._unbounded:
+            return set()
+
+        constraints = self.knowledge.constraints
+        if self.best_case < threshold:
+            # no offer is acceptable, ruling out the worst issue is enough to show that
+            worst_issue = min(self.bounds, key=self.bounds.get)
+            return {AtomicConstraint(worst_issue, value)
+                    for value in self._sorted_values[worst_issue]
+                    if constraints.is_allowed(worst_issue, value)}
+
+        new_constraints = set()
+        for issue, values in self._sorted_values.items():
+            # values below the limit can't be part of an acceptable offer
+            limit = threshold - (self.best_case - self.bounds[issue])
+            end = bisect_left(self._sorted_utils[issue], limit)
+            checked = self._checked[issue]
+            for index in range(checked, end):
+                if constraints.is_allowed(issue, values[index]):
+                    new_constraints.add(AtomicConstraint(issue, values[index]))
+                elif index == checked:
+                    checked += 1
+            self._checked[issue] = checked
+
+        return new_constraints
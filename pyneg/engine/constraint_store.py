@@ -0,0 +1,299 @@
+"""
+Defines the :class:`ConstraintStore` class, which keeps the atomic constraints an agent knows
+about indexed by issue so they can be checked without scanning all of them.
+"""
+
+from collections.abc import Set as AbstractSet
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+import numpy as np
+from numpy import isclose
+
+from pyneg.comms import AtomicConstraint, NegSpaceSchema, Offer
+from pyneg.types import NegSpace
+from .strategy import Strategy
+
+
+class ConstraintStore(AbstractSet):
+    """
+    A set of :class:`AtomicConstraint` objects that also keeps, for every issue, a bitset of
+    the values that are forbidden. Values are numbered per issue in the order of the negotiation
+    space if one is registered, and in the order they are first seen otherwise.
+    This means checking an assignment takes constant time, checking an offer or strategy takes
+    time linear in the number of issues and finding the unconstrained values of an issue takes
+    time linear in the number of values of that issue, regardless of the number of constraints.
+
+    The store is part of a :class:`KnowledgeBase`, so constrained generators and their
+    evaluator always agree on which constraints are known.
+    Since it is a set, it can be compared to and iterated over like one.
+    Every change increments :attr:`version`, which can be used to invalidate caches.
+
+    >>> store = ConstraintStore({"First": ["A", "B"], "Second": ["C", "D"]})
+    >>> store.add(AtomicConstraint("First", "A"))
+    True
+    >>> store.is_allowed("First", "A")
+    False
+    >>> store.unconstrained_values("First")
+    ['B']
+
+    :param neg_space: The negotiation space the constraints will refer to, if known
+    :type neg_space: Optional[NegSpace]
+    :param constraints: Constraints the store should start out with
+    :type constraints: Optional[Iterable[AtomicConstraint]]
+    """
+
+    def __init__(self, neg_space: Optional[NegSpace] = None,
+                 constraints: Optional[Iterable[AtomicConstraint]] = None):
+        self.version = 0
+        self._constraints: Set[AtomicConstraint] = set()
+        self._forbidden: Dict[str, int] = {}
+        self._value_bits: Dict[str, Dict[str, int]] = {}
+        self._value_names: Dict[str, List[str]] = {}
+        # bitsets of the values that are part of the registered negotiation space
+        self._registered: Dict[str, int] = {}
+        self._masks: Dict[NegSpaceSchema, np.ndarray] = {}
+        if neg_space:
+            self.register_neg_space(neg_space)
+        if constraints:
+            self.update(constraints)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # results of set operations such as `store - other` are plain sets
+        return set(iterable)
+
+    def _bit(self, issue: str, value: str) -> int:
+        bits = self._value_bits.setdefault(issue, {})
+        if value not in bits:
+            bits[value] = len(bits)
+            self._value_names.setdefault(issue, []).append(value)
+        return bits[value]
+
+    def register_neg_space(self, neg_space: NegSpace) -> None:
+        """
+        Makes the values of the given negotiation space known to the store, so
+        :func:`unconstrained_values` and :func:`satisfiable` know which values exist.
+        Registering a negotiation space doesn't change the constraints.
+
+        :param neg_space: The negotiation space to register
+        :type neg_space: NegSpace
+        """
+        for issue, values in neg_space.items():
+            issue = str(issue)
+            registered = self._registered.get(issue, 0)
+            for value in values:
+                registered |= 1 << self._bit(issue, str(value))
+            self._registered[issue] = registered
+
+    def add(self, constraint: AtomicConstraint) -> bool:
+        """
+        Adds a single constraint.
+
+        :param constraint: The constraint to add
+        :type constraint: AtomicConstraint
+        :return: True iff the constraint wasn't known yet
+        :rtype: bool
+        """
+        if constraint in self._constraints:
+            return False
+
+        self._constraints.add(constraint)
+        bit = self._bit(constraint.issue, constraint.value)
+        self._forbidden[constraint.issue] = self._forbidden.get(constraint.issue, 0) | 1 << bit
+        self.version += 1
+        self._masks = {}
+        return True
+
+    def update(self, constraints: Iterable[AtomicConstraint]) -> Set[AtomicConstraint]:
+        """
+        Adds multiple constraints.
+
+        :param constraints: The constraints to add
+        :type constraints: Iterable[AtomicConstraint]
+        :return: The constraints that weren't known yet
+        :rtype: Set[AtomicConstraint]
+        """
+        return {constraint for constraint in list(constraints) if self.add(constraint)}
+
+    def clear(self) -> None:
+        """
+        Forgets all constraints. Registered values are kept.
+        """
+        self._constraints = set()
+        self._forbidden = {}
+        self.version += 1
+        self._masks = {}
+
+    def __contains__(self, constraint: object) -> bool:
+        return constraint in self._constraints
+
+    def __iter__(self) -> Iterator[AtomicConstraint]:
+        return iter(self._constraints)
+
+    def __len__(self) -> int:
+        return len(self._constraints)
+
+    def __repr__(self) -> str:
+        return "ConstraintStore({})".format(self._constraints)
+
+    def is_allowed(self, issue: str, value: str) -> bool:
+        """
+        Checks whether an assignment satisfies all constraints.
+
+        :param issue: The issue of the assignment
+        :type issue: str
+        :param value: The value of the assignment
+        :type value: str
+        :return: True iff no constraint forbids the assignment
+        :rtype: bool
+        """
+        forbidden = self._forbidden.get(issue)
+        if not forbidden:
+            return True
+
+        bit = self._value_bits[issue].get(value)
+        return bit is None or not forbidden >> bit & 1
+
+    def constrained_issues(self) -> List[str]:
+        """
+        :return: The issues that have at least one forbidden value
+        :rtype: List[str]
+        """
+        return [issue for issue, forbidden in self._forbidden.items() if forbidden]
+
+    def forbidden_values(self, issue: str) -> List[str]:
+        """
+        :param issue: The issue to look up
+        :type issue: str
+        :return: The values of the issue that are ruled out by a constraint
+        :rtype: List[str]
+        """
+        forbidden = self._forbidden.get(issue, 0)
+        return [value for bit, value in enumerate(self._value_names.get(issue, []))
+                if forbidden >> bit & 1]
+
+    def unconstrained_values(self, issue: str) -> List[str]:
+        """
+        Returns the values of an issue that are not ruled out by a constraint. Only values of
+        a registered negotiation space (see :func:`register_neg_space`) are considered.
+
+        :param issue: The issue to look up
+        :type issue: str
+        :return: The allowed values in the order of the negotiation space. Could be empty.
+        :rtype: List[str]
+        """
+        allowed = self._registered.get(issue, 0) & ~self._forbidden.get(issue, 0)
+        return [value for bit, value in enumerate(self._value_names.get(issue, []))
+                if allowed >> bit & 1]
+
+    def satisfiable(self) -> bool:
+        """
+        Checks whether every issue of the registered negotiation space still has a value
+        that isn't ruled out by a constraint.
+
+        :return: False iff there is an issue all of whose values are forbidden
+        :rtype: bool
+        """
+        for issue, registered in self._registered.items():
+            if registered and not registered & ~self._forbidden.get(issue, 0):
+                return False
+
+        return True
+
+    def find_violation(self, offer: Offer) -> Optional[AtomicConstraint]:
+        """
+        Returns a constraint violated by the given offer, if any.
+
+        :param offer: The offer to check
+        :type offer: Offer
+        :return: A known constraint the offer violates, or None if it satisfies all of them
+        :rtype: Optional[AtomicConstraint]
+        """
+        if not self._constraints:
+            return None
+
+        for issue in offer.get_issues():
+            value = offer.get_chosen_value(issue)
+            if not self.is_allowed(issue, value):
+                return AtomicConstraint(issue, value)
+
+        return None
+
+    def satisfied_by_offer(self, offer: Offer) -> bool:
+        """
+        Checks whether an offer satisfies all known constraints.
+
+        :param offer: The offer to check
+        :type offer: Offer
+        :return: True iff the offer doesn't choose any forbidden value
+        :rtype: bool
+        """
+        return self.find_violation(offer) is None
+
+    def satisfied_by_strategy(self, strat: Strategy) -> bool:
+        """
+        Checks whether a strategy satisfies all known constraints,
+        i.e. whether it assigns 0 probability to every forbidden value.
+
+        :param strat: The strategy to check
+        :type strat: Strategy
+        :return: True iff no forbidden value has a non zero probability
+        :rtype: bool
+        """
+        for issue in strat.get_issues():
+            if not self._forbidden.get(issue):
+                continue
+            for value, prob in strat.get_value_dist(issue).items():
+                if not isclose(prob, 0) and not self.is_allowed(issue, str(value)):
+                    return False
+
+        return True
+
+    def satisfied_by(self, to_check: Union[Offer, Strategy]) -> bool:
+        """
+        Checks whether the given offer or strategy satisfies all known constraints.
+
+        :param to_check: The offer or strategy to check
+        :type to_check: Union[Offer, Strategy]
+        :raises TypeError: if an object of unknown type is passed.
+        :return: True iff the given offer or strategy satisfies all known constraints.
+        :rtype: bool
+        """
+        if isinstance(to_check, Offer):
+            return self.satisfied_by_offer(to_check)
+        if isinstance(to_check, Strategy):
+            return self.satisfied_by_strategy(to_check)
+
+        raise TypeError(f"""object is of type {type(to_check)} instead of
+                            Union[Offer, Strategy]. Object: {to_check}""")
+
+    def mask(self, schema: NegSpaceSchema) -> np.ndarray:
+        """
+        Returns a read only boolean matrix with one row per issue of the schema and as many
+        columns as the largest issue has values, that is True for every forbidden assignment.
+        Constraints on assignments the schema doesn't know are ignored.
+        The mask is cached per schema until the constraints change.
+
+        :param schema: The schema that determines the order of issues and values
+        :type schema: NegSpaceSchema
+        :return: The constraint mask
+        :rtype: np.ndarray
+        """
+        if schema not in self._masks:
+            mask = np.zeros((len(schema), max(schema.cardinalities())), dtype=bool)
+            for issue in self.constrained_issues():
+                try:
+                    issue_index = schema.issue_index(issue)
+                except KeyError:
+                    continue
+                for value in self.forbidden_values(issue):
+                    try:
+                        mask[issue_index, schema.value_index(issue, value)] = True
+                    except KeyError:
+                        # constraints on unknown assignments can never be violated
+                        continue
+            mask.setflags(write=False)
+            self._masks[schema] = mask
+
+        return self._masks[schema]
+
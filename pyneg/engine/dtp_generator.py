@@ -4,33 +4,124 @@ which uses DTProbLog to generate optimal offers in
 settings that include probabalistic knowledge bases.
 """
 
-from copy import deepcopy
-from re import search
-from typing import TYPE_CHECKING, Dict, List, Optional, Set
+from itertools import product
+from typing import (TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Sequence,
+                    Tuple)
 
+import numpy as np
 from numpy import isclose
-from problog.program import PrologString
-from problog.tasks.dtproblog import dtproblog
 
-from pyneg.comms import AtomicConstraint, Offer
+from pyneg.comms import Offer
 from pyneg.types import AtomicDict, NegSpace
-from pyneg.utils import (atom_dict_from_nested_dict, atom_from_issue_value,
-                         nested_dict_from_atom_dict)
+from pyneg.utils import atom_from_issue_value, nested_dict_from_atom_dict
 
 from .generator import Generator
+from .knowledge_base import KnowledgeBase
+from .problog_evaluator import ProblogEvaluator
 
-# Help out MyPy a bit
 if TYPE_CHECKING:
-    from problog.logic import Term # pylint: disable=ungrouped-imports
+    from .problog_pool import ProblogPool # pylint: disable=cyclic-import
+
+SparseOffer = FrozenSet[Tuple[str, str]]
+# one entry per issue, either a relevant value or None for "any of the other values"
+OfferClass = Tuple[Optional[str], ...]
+
+
+def class_member(neg_space: Dict[str, List[str]],
+                 offer_class: Sequence[Optional[str]],
+                 free_choice: Sequence[str]) -> Offer:
+    """
+    Builds the offer of the class that assigns the values in `free_choice`, in issue order,
+    to the issues that the class leaves open.
+
+    :param neg_space: The negotiation space with string values
+    :type neg_space: Dict[str, List[str]]
+    :param offer_class: The value of every issue, or None if the class leaves it open
+    :type offer_class: Sequence[Optional[str]]
+    :param free_choice: The values to assign to the open issues
+    :type free_choice: Sequence[str]
+    :return: The offer
+    :rtype: Offer
+    """
+    free_iter = iter(free_choice)
+    atom_dict: Dict[str, float] = {}
+    for (issue, values), value in zip(neg_space.items(), offer_class):
+        chosen = next(free_iter) if value is None else value
+        for other in values:
+            atom_dict[atom_from_issue_value(issue, other)] = float(other == chosen)
+
+    return Offer(nested_dict_from_atom_dict(atom_dict))
+
+
+def index_offer_classes(session: ProblogEvaluator, atoms: List[str]) -> Dict[str, Any]:
+    """
+    Splits the negotiation space of `session` into classes of offers that the knowledge base
+    can't tell apart, and calculates the probability of each of the `atoms` for every class.
+    The result only contains plain python objects so it can be sent between processes:
+    `free_values` maps every issue to the values that don't influence any of the atoms,
+    `classes` contains one list per class with a value per issue, or None for any of
+    the free values, and `probabilities` contains one row per class with one entry per atom.
+
+    :param session: The evaluator holding the negotiation space, knowledge base and utilities
+    :type session: ProblogEvaluator
+    :param atoms: The atoms to calculate the probabilities of
+    :type atoms: List[str]
+    :return: The classes and their probabilities
+    :rtype: Dict[str, Any]
+    """
+    neg_space = {str(issue): list(map(str, values))
+                 for issue, values in session.neg_space.items()}
+    relevant_values = session.get_relevant_values()
+    options: List[List[Optional[str]]] = []
+    free_values: Dict[str, List[str]] = {}
+    for issue, values in neg_space.items():
+        if relevant_values is None:
+            relevant = values
+        else:
+            relevant = [value for value in values if value in relevant_values[issue]]
+        free_values[issue] = [value for value in values if value not in relevant]
+        options.append(list(relevant) + ([None] if free_values[issue] else []))
+
+    classes: List[List[Optional[str]]] = []
+    probabilities: List[List[float]] = []
+    for offer_class in product(*options):
+        # any of the free values will do since they all behave the same
+        free_choice = [free_values[issue][0] for issue, value
+                       in zip(neg_space.keys(), offer_class) if value is None]
+        atom_probabilities = session.calc_probabilities_of_utilities(
+            class_member(neg_space, offer_class, free_choice))
+        classes.append(list(offer_class))
+        probabilities.append([float(atom_probabilities.get(atom, 0.0)) for atom in atoms])
+
+    return {"free_values": free_values, "classes": classes, "probabilities": probabilities}
 
 
 class DTPGenerator(Generator):
     """
-    This generator class uses DTProbLog to generate optimal offers.
-    Since it uses DTProbLog it can reason about offers using utilities,
+    This generator class solves the same decision problem as DTProbLog to generate
+    optimal offers. Since it uses ProbLog it can reason about offers using utilities,
     both atomic and compound and also using arbitrary knowledge bases.
-    It does mean that it is very slow and prone to memory leaks due to the
-    python implementation of DTProbLog
+
+    Rather than building and solving a new DTProbLog program for every offer, the generator
+    keeps a session open for the whole negotiation. The knowledge base is ground and compiled
+    once (see :class:`ProblogEvaluator`) and the probabilities of the utilities are calculated
+    once for every class of offers that can be told apart by the knowledge base.
+    Values that don't influence any utility are lumped together, much like DTProbLog leaves
+    those decisions open. Solving then only takes a matrix product with the current utilities,
+    and offers that were already generated are excluded by adjusting their utility by
+    `non_agreement_cost` minus their old utility instead of adding rules to the program.
+    The session is only rebuilt when the knowledge base or the set of utility atoms changes,
+    and it is released by :func:`reset_generator`.
+
+    By default every solve queues all offers that are tied for the highest utility. If `top_k`
+    is given, every solve instead queues the `top_k` best offers at once, in descending order of
+    expected utility, so agents that make a lot of offers need far fewer solves.
+
+    If a :class:`ProblogPool` is given, the knowledge base is compiled and the classes are
+    evaluated in one of its worker processes instead, see :func:`index_offer_classes`.
+
+    Pass the :class:`KnowledgeBase` of the agent's evaluator as `knowledge` to have
+    both work from the same utilities and knowledge base.
     """
 
     def __init__(self,
@@ -38,8 +129,15 @@ class DTPGenerator(Generator):
                  utilities: AtomicDict,
                  non_agreement_cost: float,
                  acceptability_threshold: float,
-                 knowledge_base: List[str]):
-        super().__init__()
+                 knowledge_base: List[str],
+                 top_k: Optional[int] = None,
+                 pool: Optional['ProblogPool'] = None,
+                 knowledge: Optional[KnowledgeBase] = None):
+        super().__init__(knowledge)
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k should be at least 1, not {top_k}")
+        self.top_k = top_k
+        self.pool = pool
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = {issue: list(map(str, values))
@@ -51,170 +149,223 @@ class DTPGenerator(Generator):
     def reset_generator(self):
         """
         Reset the internals of the generator so we can start anew for a new negotiaton.
+        This also releases the compiled knowledge base.
         """
-        self.generated_offers = {}
-        self.offer_queue = []
+        self.generated_offers: Dict[SparseOffer, float] = {}
+        self.offer_queue: List[Offer] = []
         self.active = True
+        self._session: Optional[ProblogEvaluator] = None
+        self._session_key: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None
+        self._atoms: List[str] = []
+        self._free_values: Dict[str, List[str]] = {}
+        self._offer_classes: List[OfferClass] = []
+        self._class_probabilities: np.ndarray = np.empty((0, 0))
+        self._generated_by_class: Dict[OfferClass, Dict[SparseOffer, float]] = {}
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = {
-            **self.utilities,
-            **new_utils
-        }
+        self.knowledge.add_utilities(new_utils)
+        self._discard_queue()
 
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
+        self.knowledge.set_utilities(new_utils)
+        self._discard_queue()
         return True
 
-    def _compile_dtproblog_model(self) -> str:
+    def _discard_queue(self) -> None:
         """
-        Takes the internal knowledge of the agent and complies it into a string representing
-        a valid DTProbLog model that it can use to generate the next offer.
+        Forgets the offers that were queued but not proposed yet since
+        they might not be optimal anymore.
+        """
+        for offer in self.offer_queue:
+            sparse_offer = offer.get_sparse_repr()
+            self.generated_offers.pop(sparse_offer, None)
+            if self._free_values:
+                self._generated_by_class.get(self._class_of(sparse_offer), {}).pop(
+                    sparse_offer, None)
+        self.offer_queue = []
 
-        :return: A string representing a valid DTProbLog model
-        :rtype: str
+    def _decision_utilities(self) -> AtomicDict:
         """
-        dtp_decision_vars = ""
-        for issue in self.neg_space.keys():
-            atom_list = []
-            for value in self.neg_space[issue]:
-                atom_list.append("?::{atom}".format(
-                    atom=atom_from_issue_value(issue, value)))
-            dtp_decision_vars += ";".join(
-                atom_list) + ".\n"
-
-        utility_string = ""
-        for utility, reward in self.utilities.items():
-            utility_string += "utility({},{}).\n".format(utility, reward)
-
-        # we have to make sure we offset the utility of previously generated
-        # offers so dtproblog won't generate them again
-        offer_count = 0
+        The utilities that should be optimised when generating offers.
+
+        :return: An atomic dictionary of the utilities
+        :rtype: AtomicDict
+        """
+        return dict(self.utilities)
+
+    def _update_session(self, utilities: AtomicDict) -> None:
+        """
+        Makes sure the session reflects the current knowledge base and utility atoms,
+        (re)calculating the probabilities of the utilities for every class of offers
+        if either changed. If the generator has a pool this is done in one of its workers.
+
+        :param utilities: The utilities that will be optimised
+        :type utilities: AtomicDict
+        """
+        key = (tuple(self.knowledge_base), tuple(utilities.keys()))
+        if key == self._session_key:
+            return
+
+        atoms = list(utilities.keys())
+        if self.pool is not None:
+            index = self.pool.index_offer_classes(self.neg_space, self.knowledge_base, atoms)
+        else:
+            if self._session is None:
+                self._session = ProblogEvaluator(self.neg_space, utilities,
+                                                 self.non_agreement_cost, self.knowledge_base)
+            else:
+                self._session.knowledge_base = self.knowledge_base
+                self._session.set_utilities(utilities)
+            index = index_offer_classes(self._session, atoms)
+
+        self._atoms = atoms
+        self._free_values = index["free_values"]
+        self._offer_classes = [tuple(offer_class) for offer_class in index["classes"]]
+        self._class_probabilities = np.array(
+            index["probabilities"], dtype=float).reshape(len(self._offer_classes), len(atoms))
+
+        self._generated_by_class = {}
         for sparse_offer, util in self.generated_offers.items():
-            config_string = ",".join(
-                list(map(
-                    lambda x: atom_from_issue_value(x[0], x[1]),
-                    sparse_offer)))  + "."
-            utility_string += "offer{} :- {}\n".format(
-                offer_count, config_string)
-            utility_string += "utility(offer{},{}).\n".format(
-                offer_count, -util + self.non_agreement_cost)
-            offer_count += 1
-
-        kb_string = "\n".join(self.knowledge_base) + "\n"
-        return dtp_decision_vars + kb_string + utility_string
-
-    def _extend_partial_offer(self, partial_offer: Dict[str, float]) -> Set[Offer]:
+            self._generated_by_class.setdefault(
+                self._class_of(sparse_offer), {})[sparse_offer] = util
+        self._session_key = key
+
+    def _class_of(self, sparse_offer: SparseOffer) -> OfferClass:
+        chosen = dict(sparse_offer)
+        return tuple(None if chosen[issue] in self._free_values[issue] else chosen[issue]
+                     for issue in self.neg_space.keys())
+
+    def _class_member(self, offer_class: OfferClass, free_choice: List[str]) -> Offer:
+        return class_member(self.neg_space, offer_class, free_choice)
+
+    def _class_size(self, offer_class: OfferClass) -> int:
+        size = 1
+        for issue, value in zip(self.neg_space.keys(), offer_class):
+            if value is None:
+                size *= len(self._free_values[issue])
+
+        return size
+
+    def _solve(self, numb: Optional[int] = None) -> List[Tuple[float, Offer, bool]]:
         """
-        When some decision variables have no impact on the final utility DTProbLog will
-        generate partial answers. This function will expand those final offers into all of their
-        full options so we can propose them. e.g.
-
-        >>> gen = DTPGenerator(
-            neg_space = {"boolean":["True","False"], "dummy":["1","2"]},
-            utilities = {"boolean_True":100},
-            non_agreement_cost = -100,
-            acceptability_threshold = 10,
-            knowledge_base = []
-        )
-        >>> program = PrologString(gen._compile_dtproblog_model())
-        >>> query_output, score, _ = dtproblog(program)
-        >>> query_output
-        {boolean_True: 1}
-        >>> cleaned_query_output = gen.clean_query_output(query_output)
-        >>> gen._extend_partial_offer(cleaned_query_output)
-        {[boolean->True, dummy->1], [boolean->True, dummy->2]}
-
-
-        :param partial_offer:
-        :type partial_offer: [type]
-        :raises valueerror: [description]
-        :return: [description]
-        :rtype: Set[Offer]
+        Ranks the offers by expected utility, taking the adjustments for the
+        offers that were already generated into account. Only the top of the
+        ranking is worked out: the `numb` best offers, or every offer that is tied
+        for the highest utility if `numb` is None.
+
+        :param numb: The number of offers to return
+        :type numb: Optional[int]
+        :return: The utility of every offer, the offer and whether it is new, \
+            in descending order of utility
+        :rtype: List[Tuple[float, Offer, bool]]
         """
-        partial_offer_queue = []
-        partial_offer_queue.append(partial_offer)
-        full_offers = set()
-        while partial_offer_queue:
-            nested_partial_offer = nested_dict_from_atom_dict(
-                partial_offer_queue.pop())
-            # make sure we cover all of the issues
-            for issue in self.neg_space.keys():
-                if issue not in nested_partial_offer.keys():
-                    nested_partial_offer[issue] = {
-                        value: 0.0 for value in self.neg_space[issue]}
-
-            # make sure the issues cover all values
-            for issue in self.neg_space.keys():
-                for value in self.neg_space[issue]:
-                    if value not in nested_partial_offer[issue].keys():
-                        nested_partial_offer[issue][value] = 0.0
-
-            # if an issue didn't have any utilities we can use that
-            # to make lateral moves for free.
-            for issue in self.neg_space.keys():
-                if isclose(sum(nested_partial_offer[issue].values()), 0):
-                    for value in self.neg_space[issue]:
-                        partial_offer_copy = deepcopy(nested_partial_offer)
-                        partial_offer_copy[issue][value] = 1.0
-                        partial_atom_dict = atom_dict_from_nested_dict(
-                            partial_offer_copy)
-                        partial_offer_queue.append(partial_atom_dict)
-
-            try:
-                # is the partial offer valid? (Offer will raise valueerror if not)
-                full_offer = Offer(nested_partial_offer)
-                full_offers.add(full_offer)
-            except ValueError:
-                continue
-
-        return full_offers
-
-    def _clean_query_output(self, query_output: Dict['Term', float]) -> Dict[str, float]:
+        utilities = self._decision_utilities()
+        self._update_session(utilities)
+        class_utils = self._class_probabilities @ np.array(
+            [float(utilities[atom]) for atom in self._atoms])
+
+        adjustments = [self.non_agreement_cost - util for util in self.generated_offers.values()]
+        max_adjustment = max([0.0] + adjustments)
+
+        # every entry is the utility, the class, the previously generated offer from that
+        # class or None if the ones that weren't generated yet are meant, and the number of offers
+        ranked: List[Tuple[float, OfferClass, Optional[SparseOffer], int]] = []
+        ranked_offers = 0
+        for i in np.argsort(-class_utils, kind="stable"):
+            offer_class = self._offer_classes[i]
+            class_util = float(class_utils[i])
+            cutoff = self._cutoff(ranked, ranked_offers, numb)
+            if cutoff is not None and class_util + max_adjustment < cutoff and \
+                    not isclose(class_util + max_adjustment, cutoff):
+                break
+
+            generated = self._generated_by_class.get(offer_class, {})
+            new_offers = self._class_size(offer_class) - len(generated)
+            if new_offers > 0:
+                ranked.append((class_util, offer_class, None, new_offers))
+                ranked_offers += new_offers
+            for sparse_offer, util in generated.items():
+                ranked.append((class_util + self.non_agreement_cost - util,
+                               offer_class, sparse_offer, 1))
+                ranked_offers += 1
+
+        ranked.sort(key=lambda entry: -entry[0])
+        offers: List[Tuple[float, Offer, bool]] = []
+        for util, offer_class, sparse_offer, _ in ranked:
+            if numb is None and offers and not isclose(util, offers[0][0]):
+                break
+
+            if sparse_offer is not None:
+                offers.append((util, Offer(nested_dict_from_atom_dict({
+                    atom_from_issue_value(issue, value): float(
+                        (issue, value) in sparse_offer)
+                    for issue, values in self.neg_space.items() for value in values})), False))
+            else:
+                generated = self._generated_by_class.get(offer_class, {})
+                free_issues = [issue for issue, value
+                               in zip(self.neg_space.keys(), offer_class) if value is None]
+                for free_choice in product(*(self._free_values[issue]
+                                             for issue in free_issues)):
+                    offer = self._class_member(offer_class, list(free_choice))
+                    if offer.get_sparse_repr() not in generated:
+                        offers.append((util, offer, True))
+                        if numb is not None and len(offers) >= numb:
+                            break
+
+            if numb is not None and len(offers) >= numb:
+                return offers[:numb]
+
+        return offers
+
+    @staticmethod
+    def _cutoff(ranked: List[Tuple[float, OfferClass, Optional[SparseOffer], int]],
+                ranked_offers: int,
+                numb: Optional[int]) -> Optional[float]:
         """
-        sometimes dtproblog can return things such as "choice(0,0,boolean_true)" under certain
-        circumstances so we need to filter these. This function also casts the keys from
-        problog.logic.Term to str so we can manipulate them.
-
-        :param query_output: the raw output dictionary from DTProbLog
-        :type query_output: Dict[problog.logic.Term, float]
-        :return: A dictionary containing the cleaned assignements of the optimal offer
-        :rtype: Dict[str, float]
+        Returns the utility an offer needs to make it into the top `numb` of what was
+        ranked so far, or None if anything would.
         """
-        return_dict = {}
-        for atom, prob in query_output.items():
-            # sometimes dtproblog can return things
-            # like "choice(0,0,boolean_true)" so we need to filter that out
-            reg_search = search(r"(\'?[A-z0-9|\.]+\_[A-z0-9|\.]+\'?)", str(atom))
-            if not reg_search:
-                raise ValueError(f"Could not parse query output: {query_output}")
+        if not ranked:
+            return None
+
+        if numb is None:
+            return max(entry[0] for entry in ranked)
 
-            clean_atom = reg_search.group(0)
-            return_dict[clean_atom] = prob
+        if ranked_offers < numb:
+            return None
 
-        return return_dict
+        count = 0
+        for util, _, _, entry_offers in sorted(ranked, key=lambda entry: -entry[0]):
+            count += entry_offers
+            if count >= numb:
+                return util
+
+        return None
 
     def generate_offer(self) -> Offer:
         if not self.offer_queue:
-            program = PrologString(self._compile_dtproblog_model())
-            query_output, score, _ = dtproblog(program)
-
-            # score of offers are now below acceptability threshold
-            # so we should terminate
-            if score < self.acceptability_threshold:
+            batch: List[Tuple[float, Offer]] = []
+            for util, offer, new in self._solve(self.top_k):
+                # offers below the acceptability threshold mean we should terminate
+                if util < self.acceptability_threshold:
+                    break
+                if new:
+                    batch.append((util, offer))
+
+            # no offers left that we'd accept ourselves
+            if not batch:
                 self.active = False
                 raise StopIteration()
-            cleaned_query_output = self._clean_query_output(query_output)
-            extended_offers = self._extend_partial_offer(cleaned_query_output)
 
-            for offer in extended_offers:
-                if offer not in self.generated_offers:
-                    self.generated_offers[offer.get_sparse_repr()] = score
-                    self.offer_queue.append(offer)
+            for util, offer in batch:
+                sparse_offer = offer.get_sparse_repr()
+                self.generated_offers[sparse_offer] = util
+                self._generated_by_class.setdefault(
+                    self._class_of(sparse_offer), {})[sparse_offer] = util
 
-        if not self.offer_queue:
-            raise RuntimeError()
+            # the queue is popped from the back, so the best offer goes last
+            self.offer_queue.extend(offer for _, offer in reversed(batch))
 
         return self.offer_queue.pop()
@@ -6,9 +6,14 @@ Engine is just a wrapper/addaptor for an Evaluator and Generator.
 
 from typing import Optional, Set
 
-from pyneg.comms import AtomicConstraint, Offer
-from pyneg.engine.evaluator import Evaluator
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, NegSpaceSchema, Offer
+from pyneg.engine.constraint_store import ConstraintStore
+from pyneg.engine.evaluator import Evaluator, OfferBatch
 from pyneg.engine.generator import Generator
+from pyneg.engine.knowledge_base import KnowledgeBase
+from pyneg.engine.metrics import MetricsSink
 from pyneg.types import AtomicDict
 
 
@@ -42,6 +47,21 @@ class AbstractEngine:
         """
         raise NotImplementedError()
 
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Calculates the utilities of a batch of offers at once.
+
+        :param batch: An iterable of offers or a matrix of value indices relative to `schema`
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to
+        :type schema: Optional[NegSpaceSchema]
+        :raises NotImplementedError: self-explanatory
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        raise NotImplementedError()
+
     def add_utilities(self, new_utils: AtomicDict) -> bool:
         """
         Add utilities to the knowledge base. Returns true if there are \
@@ -175,17 +195,47 @@ class AbstractEngine:
         """
         raise NotImplementedError()
 
+    def set_metrics_sink(self, sink: Optional[MetricsSink]) -> None:
+        """
+        Sets the sink that the engine reports timings and counters to, or disables
+        reporting if it's None. See :mod:`pyneg.engine.metrics`.
+
+        :param sink: The sink to report to
+        :type sink: Optional[MetricsSink]
+        :raises NotImplementedError:
+        """
+        raise NotImplementedError()
+
 
 class Engine(AbstractEngine):
     """
     This class is where all of the reasoning about offers
-    happens. Mostly it's a wrapper for the Generator and Evaluator class
+    happens. Mostly it's a wrapper for the Generator and Evaluator class.
+    If a metrics sink is set, the time spent in every method that reasons about
+    offers or constraints is reported to it, otherwise nothing is measured.
+
+    The utilities, knowledge base and constraints of the engine are kept in
+    :attr:`knowledge`, the :class:`KnowledgeBase` of the generator. Generators share the
+    knowledge base of their evaluator, so updates are only applied once, through the
+    generator. Evaluators with a knowledge base of their own are updated separately.
     """
     def __init__(self, generator: Generator, evaluator: Evaluator):
         super().__init__()
         self.generator: Generator = generator
         self.evaluator: Evaluator = evaluator
+        self.knowledge: KnowledgeBase = generator.knowledge
         self._accepts_all = False
+        self.metrics: Optional[MetricsSink] = None
+
+    def set_metrics_sink(self, sink: Optional[MetricsSink]) -> None:
+        """
+        Sets the sink that the engine reports timings and counters to, or disables
+        reporting if it's None. See :mod:`pyneg.engine.metrics`.
+
+        :param sink: The sink to report to
+        :type sink: Optional[MetricsSink]
+        """
+        self.metrics = sink
 
     def generate_offer(self) -> Offer:
         """
@@ -194,7 +244,11 @@ class Engine(AbstractEngine):
         :return: The offer the agent should propose
         :rtype: Offer
         """
-        return self.generator.generate_offer()
+        if self.metrics is None:
+            return self.generator.generate_offer()
+
+        with self.metrics.timer("engine.generate_offer"):
+            return self.generator.generate_offer()
 
     def calc_offer_utility(self, offer: Offer) -> float:
         """
@@ -205,7 +259,30 @@ class Engine(AbstractEngine):
         :return: The utility of the offer
         :rtype: float
         """
-        return self.evaluator.calc_offer_utility(offer)
+        if self.metrics is None:
+            return self.evaluator.calc_offer_utility(offer)
+
+        with self.metrics.timer("engine.calc_offer_utility"):
+            return self.evaluator.calc_offer_utility(offer)
+
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Calculates the utilities of a batch of offers at once.
+        See :func:`Evaluator.calc_offer_utilities`
+
+        :param batch: An iterable of offers or a matrix of value indices relative to `schema`
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to
+        :type schema: Optional[NegSpaceSchema]
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        if self.metrics is None:
+            return self.evaluator.calc_offer_utilities(batch, schema)
+
+        with self.metrics.timer("engine.calc_offer_utilities"):
+            return self.evaluator.calc_offer_utilities(batch, schema)
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
         """
@@ -220,7 +297,8 @@ class Engine(AbstractEngine):
         possible.
         :rtype: bool
         """
-        self.evaluator.add_utilities(new_utils)
+        if not self.generator.shares_knowledge(self.evaluator):
+            self.evaluator.add_utilities(new_utils)
         return self.generator.add_utilities(new_utils)
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
@@ -237,7 +315,8 @@ class Engine(AbstractEngine):
         possible.
         :rtype: bool
         """
-        self.evaluator.add_utilities(new_utils)
+        if not self.generator.shares_knowledge(self.evaluator):
+            self.evaluator.add_utilities(new_utils)
         return self.generator.add_utilities(new_utils)
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
@@ -251,7 +330,11 @@ class Engine(AbstractEngine):
         :return: Whether there are still potential acceptable solutions
         :rtype: bool
         """
-        return self.generator.add_constraint(constraint)
+        if self.metrics is None:
+            return self.generator.add_constraint(constraint)
+
+        with self.metrics.timer("engine.add_constraint"):
+            return self.generator.add_constraint(constraint)
 
     def add_constraints(self, new_constraints: Set[AtomicConstraint]) -> bool:
         """
@@ -264,7 +347,11 @@ class Engine(AbstractEngine):
         :return: Whether there are still potential acceptable solutions
         :rtype: bool
         """
-        return self.generator.add_constraints(new_constraints)
+        if self.metrics is None:
+            return self.generator.add_constraints(new_constraints)
+
+        with self.metrics.timer("engine.add_constraints"):
+            return self.generator.add_constraints(new_constraints)
 
     def find_violated_constraint(self, offer: Offer) -> Optional[AtomicConstraint]:
         """
@@ -275,7 +362,14 @@ class Engine(AbstractEngine):
         :return: The constraint that is being violated by the offer if any.
         :rtype: Optional[AtomicConstraint]
         """
-        return self.generator.find_violated_constraint(offer)
+        if self.metrics is None:
+            return self.generator.find_violated_constraint(offer)
+
+        with self.metrics.timer("engine.find_violated_constraint"):
+            constraint = self.generator.find_violated_constraint(offer)
+        if constraint is not None:
+            self.metrics.increment("engine.violations_found")
+        return constraint
 
     def get_unconstrained_values_by_issue(self, issue: str) -> Set[str]:
         """
@@ -307,7 +401,11 @@ class Engine(AbstractEngine):
         :return: True if the offer is allowed under the constraints.
         :rtype: bool
         """
-        for constr in self.generator.get_constraints():
+        constraints = self.generator.get_constraints()
+        if isinstance(constraints, ConstraintStore):
+            return constraints.satisfied_by_offer(offer)
+
+        for constr in constraints:
             if not constr.is_satisfied_by_offer(offer):
                 return False
 
@@ -325,10 +423,17 @@ class Engine(AbstractEngine):
         known criteria.
         :rtype: bool
         """
-        if self._accepts_all:
-            return True
-
-        return self.evaluator.calc_offer_utility(offer) >= self.generator.acceptability_threshold
+        if self.metrics is None:
+            if self._accepts_all:
+                return True
+            return self.evaluator.calc_offer_utility(offer) >= \
+                self.generator.acceptability_threshold
+
+        with self.metrics.timer("engine.accepts"):
+            accepted = self._accepts_all or self.evaluator.calc_offer_utility(
+                offer) >= self.generator.acceptability_threshold
+        self.metrics.increment("engine.offers_accepted" if accepted else "engine.offers_rejected")
+        return accepted
 
     def can_continue(self) -> bool:
         """
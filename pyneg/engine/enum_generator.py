@@ -4,16 +4,25 @@ offers in order of preference. Uses breath first search.
 see :class:`EnumGenerator` for more information.
 """
 
-from copy import deepcopy
-from queue import PriorityQueue
-from typing import Dict, List, Set, Tuple, cast, Optional
-from uuid import uuid4
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import Dict, Iterator, List, Set, Tuple, cast, Optional
 
-from pyneg.comms import Offer, AtomicConstraint
+import numpy as np
+from numpy import isclose
+
+from pyneg.comms import Offer, AtomicConstraint, CompactOffer, NegSpaceSchema
 from pyneg.engine.evaluator import Evaluator
 from pyneg.engine.generator import Generator
-from pyneg.types import AtomicDict, NegSpace, NestedDict
-from pyneg.utils import nested_dict_from_atom_dict
+from pyneg.engine.knowledge_base import shared_knowledge
+from pyneg.engine.linear_evaluator import LinearEvaluator
+from pyneg.engine.constrained_linear_evaluator import ConstrainedLinearEvaluator
+from pyneg.types import AtomicDict, NegSpace
+from pyneg.utils import issue_value_tuple_from_atom, nested_dict_from_atom_dict
+
+# (-utility, insertion order, indices into the sorted value lists,
+#  linear utility ignoring constraints, number of constrained assignments)
+FrontierEntry = Tuple[float, int, Tuple[int, ...], float, int]
 
 
 class EnumGenerator(Generator):
@@ -25,37 +34,47 @@ class EnumGenerator(Generator):
     Raises `StopIteration` exception when it cannot find any
     new acceptable offers.
 
+    Internally the frontier is a heap of tuples of indices into the sorted value lists,
+    ties in utility are broken by the order in which they were discovered.
+    Offers are only constructed once they are actually generated. When the evaluator is a
+    :class:`LinearEvaluator` the utility of a new candidate is derived from its parent in
+    constant time, other evaluators are asked to evaluate every candidate.
     """
     def __init__(self, neg_space: NegSpace,
                  utilities: AtomicDict,
                  evaluator: Evaluator,
                  acceptability_threshold: float) -> None:
-        super().__init__()
+        super().__init__(shared_knowledge(evaluator))
         self.sorted_utils: Dict[str, List[str]] = {}
         self.neg_space = {issue: list(map(str, values))
                           for issue, values in neg_space.items()}
+        self.schema = NegSpaceSchema(self.neg_space)
         self.utilities = utilities
         self.evaluator = evaluator
         self.acceptability_threshold = acceptability_threshold
-        self.assignement_frontier: PriorityQueue = PriorityQueue()
+        self.assignement_frontier: List[FrontierEntry] = []
+        self._frontier_counter: Iterator[int] = count()
+        self._sorted_value_indices: np.ndarray = np.empty((0, 0), dtype=np.int64)
+        self._sorted_util_table: Optional[np.ndarray] = None
+        self._sorted_violation_table: Optional[np.ndarray] = None
         self.offer_counter: int = 0
-        self.generated_offers: Set[Offer] = set()
+        self.visited: Set[Tuple[int, ...]] = set()
+        # value indices of the schema, so they survive re-sorting
+        self.proposed: Set[Tuple[int, ...]] = set()
         self.init_generator()
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = {
-            **self.utilities,
-            **new_utils
-        }
-
-        self.evaluator.add_utilities(new_utils)
-        self.init_generator()
+        old_utilities = self.knowledge.add_utilities(new_utils)
+        if not self.shares_knowledge(self.evaluator):
+            self.evaluator.add_utilities(new_utils)
+        self._update_generator(old_utilities, new_utils)
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
-        self.evaluator.set_utilities(new_utils)
-        self.init_generator()
+        self.knowledge.set_utilities(new_utils)
+        if not self.shares_knowledge(self.evaluator):
+            self.evaluator.set_utilities(new_utils)
+        self._restart_generator()
         return True
 
     def init_generator(self) -> None:
@@ -66,12 +85,52 @@ class EnumGenerator(Generator):
         >>> neg_space = {"boolean":["True", "False"]}
         the utility function {"boolean_True":10,"boolean_False":100} would be converted to
         {"boolean": ["False","True"]}
+
+        This also forgets which offers were already proposed.
         """
-        self.assignement_frontier = PriorityQueue()
-        nested_utils = nested_dict_from_atom_dict(self.utilities)
+        self.proposed = set()
+        self._restart_generator()
+
+    def _restart_generator(self) -> None:
+        """
+        Re-sorts every issue and restarts the search from the best offer,
+        skipping offers that were already proposed.
+        """
+        nested_utils = self._nested_utilities()
+        # translate positions in the sorted lists to value indices of the schema
+        # so we can evaluate whole batches of candidates at once
+        self._sorted_value_indices = np.zeros(
+            (len(self.schema), max(self.schema.cardinalities())), dtype=np.int64)
+        for issue in self.neg_space:
+            self._set_sorted_values(issue, self._sort_issue(issue, nested_utils))
+        self._index_sorted_utilities()
+
+        # Now we can find offers by simply incrementig the indices
+        # for this list and looking up the corresponding values
+        self.assignement_frontier = []
+        self._frontier_counter = count()
+        best_offer_indices = tuple(0 for _ in self.schema.get_issues())
+        self.offer_counter = 0
+        self.visited = set()
+
+        offer = self._offer_from_indices(best_offer_indices)
+        if self.accepts(offer):
+            util = self.evaluator.calc_offer_utility(offer)
+            linear_util, violations = self._calc_linear_utility(best_offer_indices, util)
+            # index by -util to get a max heap instead of the standard min
+            # use the counter to break ties
+            heappush(self.assignement_frontier,
+                     (-util, next(self._frontier_counter), best_offer_indices,
+                      linear_util, violations))
+            self.visited.add(best_offer_indices)
+            self.active = True
 
-        # Setup a grid of assignments and their utilities so
-        # we can explore them later
+    def _nested_utilities(self) -> Dict[str, Dict[str, float]]:
+        """
+        Setup a grid of assignments and their utilities so
+        we can explore them later. Values we don't know the utility of are worth 0.
+        """
+        nested_utils = nested_dict_from_atom_dict(self.utilities)
         for issue in self.neg_space:
             if issue not in nested_utils.keys():
                 nested_utils[issue] = {value:0.0 for value in self.neg_space[issue]}
@@ -80,43 +139,214 @@ class EnumGenerator(Generator):
                 if value not in nested_utils[issue].keys():
                     nested_utils[issue][value] = 0.0
 
-        # function to sort a list of tuples according to the second tuple field
-        # in decreasing order so we can quickly identify candidates for the next offer
+        return nested_utils
 
-        def sorter(issue: str) -> List[Tuple[str, int]]:
-            return cast(List[Tuple[str, int]],
-                        sorted(
-                            nested_utils[issue].items(),
-                            reverse=True,
-                            key=lambda tup: tup[1]))
-
-        # Create dictionary of lists of value assignments by issue sorted
-        # by utility in dec order
-        # example: {"boolean_True":10,"boolean_False":100} => {"boolean": ["False","True"]}
-
-        self.sorted_utils = {
-            issue:
-            list(map(
-                lambda tup: tup[0],
-                sorter(issue)))
-            for issue in nested_utils}
+    def _sort_issue(self, issue: str, nested_utils: Dict[str, Dict[str, float]]) -> List[str]:
+        """
+        Sorts the values of an issue by utility in dec order. values that are not part
+        of the negotiation space can never be offered so we leave them out.
+        example: {"boolean_True":10,"boolean_False":100} => ["False","True"]
+        """
+        return [value for value, _ in sorted(nested_utils[issue].items(),
+                                             reverse=True,
+                                             key=lambda tup: tup[1])
+                if value in self.neg_space[issue]]
+
+    def _set_sorted_values(self, issue: str, values: List[str]) -> None:
+        self.sorted_utils[issue] = values
+        issue_index = self.schema.issue_index(issue)
+        for j, value in enumerate(values):
+            self._sorted_value_indices[issue_index, j] = self.schema.value_index(issue, value)
+
+    def _update_generator(self, old_utilities: AtomicDict, new_utils: AtomicDict) -> None:
+        """
+        Updates the search after `new_utils` were added to the knowledge base
+        without starting over. Only the issues that `new_utils` touches are re-sorted
+        and the frontier is carried over to the new ordering. Entries that have become
+        inadmissible are dropped and expanded offers are given the children they would
+        have had under the new ordering, which keeps every remaining offer reachable.
+        Offers that were already proposed won't be proposed again.
+
+        This is only possible if the update can't have raised the utility of an offer we might
+        still propose and doesn't reorder the admissible values of an issue, otherwise
+        the search is restarted (still skipping proposed offers).
+
+        :param old_utilities: The utilities before the update, at least the ones \
+            that are part of `new_utils`
+        :type old_utilities: AtomicDict
+        :param new_utils: The utilities that were added
+        :type new_utils: AtomicDict
+        """
+        changed_issues: Set[str] = set()
+        for atom, util in new_utils.items():
+            increased = util > old_utilities.get(atom, 0.0)
+            try:
+                issue, value = issue_value_tuple_from_atom(atom)
+            except ValueError:
+                issue, value = atom, ""
+            if issue not in self.neg_space or value not in self.neg_space[issue]:
+                # only non linear evaluators can care about other atoms
+                if increased and self._sorted_util_table is None:
+                    self._restart_generator()
+                    return
+                continue
+            changed_issues.add(issue)
+            if increased and self._is_admissible(issue, value):
+                self._restart_generator()
+                return
+
+        nested_utils = self._nested_utilities()
+        old_sorted_utils = dict(self.sorted_utils)
+        reordered_issues: List[int] = []
+        for issue in changed_issues:
+            new_values = self._sort_issue(issue, nested_utils)
+            old_values = old_sorted_utils[issue]
+            if [value for value in old_values if self._is_admissible(issue, value)] != \
+                    [value for value in new_values if self._is_admissible(issue, value)]:
+                self._restart_generator()
+                return
+            if new_values != old_values:
+                reordered_issues.append(self.schema.issue_index(issue))
+                self._set_sorted_values(issue, new_values)
+        self._index_sorted_utilities()
+
+        # positions of the reordered issues in the old order mapped to their new position
+        position_maps: Dict[int, List[int]] = {}
+        for i in reordered_issues:
+            issue = self.schema.issues[i]
+            new_positions = {value: j for j, value in enumerate(self.sorted_utils[issue])}
+            position_maps[i] = [new_positions[value] for value in old_sorted_utils[issue]]
+
+        if position_maps:
+            self.visited = {self._remap_positions(indices, position_maps)
+                            for indices in self.visited}
+
+        # if we never got to the best admissible offer we haven't done any work worth keeping
+        root = tuple(self._next_admissible(i, -1) for i in range(len(self.schema)))
+        if root not in self.visited:
+            self._restart_generator()
+            return
+
+        carried_over: List[Tuple[int, Tuple[int, ...]]] = []
+        for _, counter, indices, _, _ in self.assignement_frontier:
+            indices = self._remap_positions(indices, position_maps)
+            if self._is_admissible_assignment(indices):
+                carried_over.append((counter, indices))
+
+        # anything we already expanded might have had a child that was inadmissible or
+        # unacceptable before, if so the next admissible value of that issue takes its place
+        frontier_indices = {indices for _, indices in carried_over}
+        changed_issue_indices = [self.schema.issue_index(issue) for issue in changed_issues]
+        for indices in list(self.visited):
+            if indices in frontier_indices or not self._is_admissible_assignment(indices):
+                continue
+            for i in changed_issue_indices:
+                next_index = self._next_admissible(i, indices[i])
+                if next_index >= len(self.sorted_utils[self.schema.issues[i]]):
+                    continue
+                candidate = indices[:i] + (next_index,) + indices[i + 1:]
+                if candidate not in self.visited:
+                    self.visited.add(candidate)
+                    carried_over.append((next(self._frontier_counter), candidate))
+
+        self.assignement_frontier = []
+        if not carried_over:
+            return
+
+        for (counter, indices), (util, linear_util, violations) in zip(
+                carried_over, self._evaluate_candidates([c for _, c in carried_over])):
+            if util >= self.acceptability_threshold:
+                self.assignement_frontier.append(
+                    (-util, counter, indices, linear_util, violations))
+        heapify(self.assignement_frontier)
+
+    def _next_admissible(self, issue_index: int, position: int) -> int:
+        """
+        Returns the first position after `position` in the sorted values of the issue
+        that holds an admissible value, or the number of values if there is none.
+        """
+        issue = self.schema.issues[issue_index]
+        values = self.sorted_utils[issue]
+        next_index = position + 1
+        while next_index < len(values) and not self._is_admissible(issue, values[next_index]):
+            next_index += 1
+        return next_index
+
+    def _is_admissible_assignment(self, indices: Tuple[int, ...]) -> bool:
+        return all(self._is_admissible(issue, self.sorted_utils[issue][index])
+                   for issue, index in zip(self.schema.issues, indices))
+
+    @staticmethod
+    def _remap_positions(indices: Tuple[int, ...],
+                         position_maps: Dict[int, List[int]]) -> Tuple[int, ...]:
+        if not position_maps:
+            return indices
+
+        remapped = list(indices)
+        for i, position_map in position_maps.items():
+            remapped[i] = position_map[indices[i]]
+        return tuple(remapped)
+
+    def _evaluate_candidates(self,
+                             candidates: List[Tuple[int, ...]]) -> List[Tuple[float, float, int]]:
+        """
+        Evaluates candidates from scratch.
 
-        # Now we can find offers by simply incrementig the indices
-        # for this list and looking up the corresponding values
-        best_offer_indices = {issue: 0 for issue in self.neg_space}
-        self.offer_counter = 0
-        self.generated_offers = set()
+        :return: For every candidate its utility, linear utility and number of \
+            constrained assignments. see :func:`_calc_linear_utility`
+        :rtype: List[Tuple[float, float, int]]
+        """
+        if self._sorted_util_table is None or self._sorted_violation_table is None:
+            return [(util, util, 0) for util in self._calc_utilities(candidates)]
+
+        rows = np.arange(len(self.schema))
+        positions = np.array(candidates)
+        linear_utils = self._sorted_util_table[rows, positions].sum(axis=1)
+        violations = self._sorted_violation_table[rows, positions].sum(axis=1)
+        constr_value = getattr(self.evaluator, "constr_value", None)
+        return [(constr_value if violation else float(linear_util),
+                 float(linear_util), int(violation))
+                for linear_util, violation in zip(linear_utils, violations)]
+
+    def _index_sorted_utilities(self) -> None:
+        """
+        For linear evaluators, store the utility of every position in the sorted
+        value lists (and whether it is constrained) so the utility of a
+        candidate can be derived from its parent by looking up a single difference.
+        """
+        if not isinstance(self.evaluator, LinearEvaluator):
+            self._sorted_util_table = None
+            self._sorted_violation_table = None
+            return
+
+        rows = np.arange(len(self.schema))[:, np.newaxis]
+        self._sorted_util_table = self.evaluator.get_utility_matrix(
+            self.schema)[rows, self._sorted_value_indices]
+        if isinstance(self.evaluator, ConstrainedLinearEvaluator):
+            self._sorted_violation_table = self.evaluator.get_constraint_mask(
+                self.schema)[rows, self._sorted_value_indices].astype(np.int64)
+        else:
+            self._sorted_violation_table = np.zeros_like(
+                self._sorted_value_indices, dtype=np.int64)
+
+    def _calc_linear_utility(self, indices: Tuple[int, ...], util: float) -> Tuple[float, int]:
+        """
+        Calculates the constraint agnostic utility and number of constrained assignments
+        of the given indices from scratch. For non linear evaluators we just pass `util` through.
+
+        :param indices: The sorted indices to evaluate
+        :type indices: Tuple[int, ...]
+        :param util: The utility according to the evaluator
+        :type util: float
+        :return: The linear utility and the number of constrained assignments
+        :rtype: Tuple[float, int]
+        """
+        if self._sorted_util_table is None or self._sorted_violation_table is None:
+            return util, 0
 
-        offer = self._offer_from_index_dict(best_offer_indices)
-        if self.accepts(offer):
-            util = self.evaluator.calc_offer_utility(offer)
-            # index by -util to get a max priority queue instead of the standard min
-            # use offer_counter to break ties
-            self.assignement_frontier.put(
-                (-util, self.offer_counter, best_offer_indices))
-            self.generated_offers.add(
-                self._offer_from_index_dict(best_offer_indices))
-            self.active = True
+        rows = np.arange(len(self.schema))
+        return (float(self._sorted_util_table[rows, indices].sum()),
+                int(self._sorted_violation_table[rows, indices].sum()))
 
     def accepts(self, offer: Offer) -> bool:
         """
@@ -131,7 +361,23 @@ class EnumGenerator(Generator):
         util = self.evaluator.calc_offer_utility(offer)
         return util >= self.acceptability_threshold
 
-    def _expand_assignment(self, sorted_offer_indices: Dict[str, int]) -> None:
+    def _is_admissible(self, issue: str, value: str) -> bool:
+        """
+        Hook for subclasses to rule out assignments during the search.
+        Called whenever a candidate differs from an admitted offer by the given assignment.
+
+        :param issue: The issue of the assignment
+        :type issue: str
+        :param value: The value of the assignment
+        :type value: str
+        :return: True iff candidates with this assignment may be put on the frontier
+        :rtype: bool
+        """
+        return True
+
+    def _expand_assignment(self, sorted_offer_indices: Tuple[int, ...],
+                           linear_util: Optional[float] = None,
+                           violations: int = 0) -> None:
         """
         Takes a typle of offer indices and generates new valid offer
         indices from them, to be used in offer generation, and
@@ -151,32 +397,93 @@ class EnumGenerator(Generator):
         don't correspond to the indices in the negotiation space
         but to the indices of the internal list of values sorted
         by utility. See :func:`init_generator` for more info.
+        For linear evaluators the utilities of the candidates are derived from
+        the utility of the parent, otherwise all candidates are evaluated in a single batch.
 
         :param sorted_offer_indices: a tuple of indices corresponding to entries \
         in the internal list refering to vaues
         :type sorted_offer_indices: Tuple[int]
+        :param linear_util: The constraint agnostic utility of the parent, \
+            calculated from scratch if not given
+        :type linear_util: Optional[float]
+        :param violations: The number of constrained assignments in the parent
+        :type violations: int
         """
-        for issue in self.neg_space.keys():
-            copied_offer_indices = deepcopy(sorted_offer_indices)
-            if copied_offer_indices[issue] + 1 >= len(self.sorted_utils[issue]):
+        candidates: List[Tuple[int, ...]] = []
+        changed_issues: List[int] = []
+        for i, issue in enumerate(self.schema.get_issues()):
+            # skipping inadmissible values keeps the values after them reachable
+            next_index = self._next_admissible(i, sorted_offer_indices[i])
+            if next_index >= len(self.sorted_utils[issue]):
                 continue
-            copied_offer_indices[issue] += 1
-            offer = self._offer_from_index_dict(copied_offer_indices)
-            util = self.evaluator.calc_offer_utility(offer)
-            if util >= self.acceptability_threshold and self._offer_from_index_dict(
-                    copied_offer_indices) not in self.generated_offers:
-                self.assignement_frontier.put(
-                    (-util, str(uuid4())[-8:], copied_offer_indices))
-                self.generated_offers.add(
-                    self._offer_from_index_dict(copied_offer_indices))
+            candidate = sorted_offer_indices[:i] + (next_index,) + sorted_offer_indices[i + 1:]
+            if candidate in self.visited:
+                continue
+            candidates.append(candidate)
+            changed_issues.append(i)
+
+        if not candidates:
+            return
+
+        if self._sorted_util_table is None or self._sorted_violation_table is None:
+            utils = self._calc_utilities(candidates)
+            for candidate, util in zip(candidates, utils):
+                self._push_candidate(candidate, util, util, 0)
+            return
+
+        if linear_util is None:
+            linear_util, violations = self._calc_linear_utility(sorted_offer_indices, 0.0)
+
+        for candidate, i in zip(candidates, changed_issues):
+            old_index, new_index = sorted_offer_indices[i], candidate[i]
+            candidate_linear_util = linear_util \
+                + self._sorted_util_table[i, new_index] - self._sorted_util_table[i, old_index]
+            candidate_violations = violations \
+                - self._sorted_violation_table[i, old_index] \
+                + self._sorted_violation_table[i, new_index]
+
+            # the running sum can drift a little, so make sure candidates right at the
+            # threshold get the same verdict they would get from a full evaluation
+            if isclose(candidate_linear_util, self.acceptability_threshold):
+                candidate_linear_util, _ = self._calc_linear_utility(candidate, 0.0)
+
+            if candidate_violations:
+                util = cast(ConstrainedLinearEvaluator, self.evaluator).constr_value
+            else:
+                util = candidate_linear_util
+            self._push_candidate(candidate, util, candidate_linear_util, candidate_violations)
+
+    def _push_candidate(self, candidate: Tuple[int, ...], util: float,
+                        linear_util: float, violations: int) -> None:
+        """
+        Puts the candidate on the frontier if it is acceptable.
+        """
+        if util >= self.acceptability_threshold:
+            heappush(self.assignement_frontier,
+                     (-util, next(self._frontier_counter), candidate, linear_util, violations))
+            self.visited.add(candidate)
+
+    def _calc_utilities(self, candidates: List[Tuple[int, ...]]) -> np.ndarray:
+        """
+        Evaluates a list of sorted index tuples in one batch by translating them
+        to value indices of the schema first.
+
+        :param candidates: The index tuples to evaluate
+        :type candidates: List[Tuple[int, ...]]
+        :return: The utility of every candidate
+        :rtype: np.ndarray
+        """
+        value_indices = self._sorted_value_indices[
+            np.arange(len(self.schema)), np.array(candidates)]
+        return self.evaluator.calc_offer_utilities(value_indices, self.schema)
 
     def generate_offer(self) -> Offer:
         """
         Generates offer in breath first manner. Most of the work is done in
         :func:`init_generator`,
         :func:`expand_assignement` and
-        :func:`_offer_from_index_dict`
-        this function just takes the next offer from the priorityQueue and converts
+        :func:`_offer_from_indices`
+        this function just takes the next offer from the frontier and converts
         it into an offer.
 
         :raises StopIteration: Raised when no acceptable offers can be found.\
@@ -185,22 +492,39 @@ class EnumGenerator(Generator):
         :return: The next best offer with the current knowledge base.
         :rtype: Offer
         """
-        if self.assignement_frontier.empty():
-            self.active = False
-            raise StopIteration()
-
         self.offer_counter += 1
 
-        # the second index is just to ensure stable ordering in the priorityQueue
-        negative_util, _, indices = self.assignement_frontier.get()
-        if -negative_util <= self.acceptability_threshold:
-            self.active = False
-            raise StopIteration()
+        while True:
+            if not self.assignement_frontier:
+                self.active = False
+                raise StopIteration()
 
-        self._expand_assignment(indices)
-        return self._offer_from_index_dict(indices)
+            # the second index is just to ensure stable ordering in the heap
+            negative_util, _, indices, linear_util, violations = heappop(
+                self.assignement_frontier)
+            if -negative_util <= self.acceptability_threshold:
+                self.active = False
+                raise StopIteration()
 
-    def _offer_from_index_dict(self, index_dict: Dict[str, int]) -> Offer:
+            self._expand_assignment(indices, linear_util, violations)
+            if self._mark_proposed(indices):
+                return self._offer_from_indices(indices)
+
+    def _mark_proposed(self, indices: Tuple[int, ...]) -> bool:
+        """
+        Remembers that the offer corresponding to `indices` is proposed.
+
+        :return: False if it was proposed before.
+        :rtype: bool
+        """
+        value_indices = tuple(self._sorted_value_indices[np.arange(len(self.schema)), indices])
+        if value_indices in self.proposed:
+            return False
+
+        self.proposed.add(value_indices)
+        return True
+
+    def _offer_from_indices(self, indices: Tuple[int, ...]) -> Offer:
         """
         converts indicies corresponding to the internal list of values
         into actuall offers. e.g. assume we have
@@ -211,26 +535,17 @@ class EnumGenerator(Generator):
         [A->"first",B->"forth",C->"seventh"] would have utility 1+4+7 = 12 then
         we would have
 
-        >>> _offer_from_index_dict({"A":2,"C":0,"B":1}).get_sparse_str_repr()
+        >>> _offer_from_indices((2,1,0)).get_sparse_str_repr()
         [A->"first",B->"fifth", C->"ninth"]
 
-        :param index_dict: The dictionarry mapping issues to the corresponding \
+        :param indices: A tuple containing for every issue the \
         index in the internal list
-        :type index_dict: Dict[str, int]
+        :type indices: Tuple[int, ...]
         :return: An offer with the mapping corresponding to the indices passed in
         :rtype: Offer
         """
-        offer: NestedDict = {}
-        for issue in index_dict.keys():
-            offer[issue] = {}
-            chosen_value: str = self.sorted_utils[issue][index_dict[issue]]
-            for value in self.neg_space[issue]:
-                if value == chosen_value:
-                    offer[issue][value] = 1
-                else:
-                    offer[issue][value] = 0
-
-        return Offer(offer)
+        value_indices = self._sorted_value_indices[np.arange(len(self.schema)), indices]
+        return CompactOffer(self.schema, value_indices).to_offer()
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
         print("""WARNING: attempting to use a constraint mechanism
@@ -5,11 +5,49 @@ agent engines use to evaluate offers. All logic relating to reasoning
 and evaluating potential offers should be located here.
 """
 
-from typing import Set
+from typing import Iterable, Optional, Set, Tuple, Union
 
-from pyneg.comms import AtomicConstraint, Offer
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, CompactOffer, NegSpaceSchema, Offer
 from pyneg.types import AtomicDict
 
+OfferBatch = Union[np.ndarray, Iterable[Union[Offer, CompactOffer]]]
+
+
+def batch_index_matrix(batch: OfferBatch,
+                       schema: Optional[NegSpaceSchema] = None
+                       ) -> Tuple[NegSpaceSchema, np.ndarray]:
+    """
+    Converts a batch of offers into a matrix of value indices with one row per offer.
+    The batch can either be such an index matrix already, or an iterable of offers.
+    If no schema is given, the schema of the first :class:`CompactOffer` is used.
+
+    :param batch: The offers to convert
+    :type batch: OfferBatch
+    :param schema: The schema the indices should refer to.
+    :type schema: Optional[NegSpaceSchema]
+    :raises ValueError: if no schema is given and none can be inferred from the batch
+    :return: The schema and the index matrix of shape (number of offers, number of issues)
+    :rtype: Tuple[NegSpaceSchema, np.ndarray]
+    """
+    if not isinstance(batch, np.ndarray):
+        batch = list(batch)
+        if schema is None and batch and isinstance(batch[0], CompactOffer):
+            schema = batch[0].schema
+
+    if schema is None:
+        raise ValueError("A schema is needed to evaluate this batch of offers")
+
+    if isinstance(batch, np.ndarray):
+        indices = np.atleast_2d(batch)
+        if indices.shape[1] != len(schema):
+            raise ValueError(
+                f"Expected {len(schema)} indices per offer but got {indices.shape[1]}")
+        return schema, indices
+
+    return schema, schema.index_matrix(batch)
+
 
 class Evaluator():
     """
@@ -17,7 +55,13 @@ class Evaluator():
     and as a template for implementing your own. Evaluators are what
     agent engines use to evaluate offers. All logic relating to reasoning
     and evaluating potential offers should be located here.
+
+    Evaluators that score a batch of offers faster than one by one override
+    :func:`calc_offer_utilities` and set `supports_batch`, so generators know
+    that it pays off to score their candidates in bulk.
     """
+    supports_batch = False
+
     def __init__(self):
         pass
 
@@ -33,6 +77,32 @@ class Evaluator():
         """
         raise NotImplementedError()
 
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Calculates the utilities of a batch of offers at once. The batch can be
+        an iterable of offers or a matrix of value indices relative to `schema`.
+        This default implementation simply calls :func:`calc_offer_utility` for
+        every offer, evaluators that can do better should override it and
+        set `supports_batch`.
+
+        :param batch: the offers you want to know the utility of
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to. Only needed if \
+            the batch is an index matrix.
+        :type schema: Optional[NegSpaceSchema]
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        if isinstance(batch, np.ndarray):
+            schema, indices = batch_index_matrix(batch, schema)
+            offers: Iterable[Union[Offer, CompactOffer]] = (
+                CompactOffer(schema, row).to_offer() for row in indices)
+        else:
+            offers = batch
+
+        return np.array([self.calc_offer_utility(offer) for offer in offers], dtype=float)
+
     def calc_assignment_util(self, issue: str, value: str) -> float:
         """
         Calculates the utility of a single issue value assignement.
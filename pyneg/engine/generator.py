@@ -9,9 +9,10 @@ from typing import Optional, Set
 
 from pyneg.comms import AtomicConstraint, Offer
 from pyneg.types import AtomicDict
+from .knowledge_base import KnowledgeBase, SharedKnowledge
 
 
-class Generator:
+class Generator(SharedKnowledge):
     """
     Nothing but an abstract class. Sometimes used for type annotations
     and as a template for implementing your own. Generators are what
@@ -22,12 +23,13 @@ class Generator:
     - knowledge_base: a knowledge base. only supported if the generator uses ProbLog
     - acceptability_threshold: minimum utility needed for the agent to accept an offer
 
+    The utilities, knowledge base and constraints are kept in `knowledge`, a
+    :class:`KnowledgeBase` that is usually shared with the evaluator.
     """
 
 
-    def __init__(self):
-        self.utilities = {}
-        self.knowledge_base = []
+    def __init__(self, knowledge: Optional[KnowledgeBase] = None):
+        self.knowledge = knowledge if knowledge is not None else KnowledgeBase()
         self.neg_space = {}
         self.acceptability_threshold = 0.0
         self.active = False
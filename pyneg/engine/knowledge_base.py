@@ -0,0 +1,243 @@
+"""
+Defines the :class:`KnowledgeBase` class, which holds everything an agent knows about the
+negotiation: its utilities, its ProbLog rules and the constraints it knows about.
+The generator and evaluator of an :class:`Engine` share a single knowledge base,
+so every update is applied exactly once and both always reason about the same state.
+"""
+
+from typing import Callable, FrozenSet, Iterable, List, NamedTuple, Optional
+
+from pyneg.comms import AtomicConstraint
+from pyneg.types import AtomicDict, NegSpace
+from .constraint_store import ConstraintStore
+
+
+class KnowledgeChange(NamedTuple):
+    """
+    Describes a single update of a :class:`KnowledgeBase`, as passed to its listeners.
+    `utilities` contains the new value of every utility that was given, `previous_utilities`
+    the value those had before, if they were known. If `replaced` is True the utilities were
+    replaced as a whole and `previous_utilities` contains all of the old ones.
+    """
+    version: int
+    utilities: AtomicDict
+    previous_utilities: AtomicDict
+    constraints: FrozenSet[AtomicConstraint]
+    rules: bool
+    replaced: bool = False
+
+
+Listener = Callable[[KnowledgeChange], None]
+
+
+class KnowledgeBase:
+    """
+    The utilities, rules and constraints of an agent. Updates are applied in place and
+    every one of them increments the matching version counter, so anything derived from the
+    knowledge base, such as a utility matrix, can be rebuilt lazily by remembering the version
+    it was built for. Listeners registered with :func:`subscribe` are called after every
+    update that changed something.
+
+    The constraints live in a :class:`ConstraintStore`. Adding them through
+    :func:`add_constraints` rather than through the store directly also notifies the listeners.
+
+    >>> knowledge = KnowledgeBase({"boolean_True": 10})
+    >>> knowledge.add_utilities({"boolean_True": 5, "integer_1": 3})
+    {'boolean_True': 10}
+    >>> knowledge.utilities
+    {'boolean_True': 5, 'integer_1': 3}
+
+    :param utilities: The utilities to start with. They are copied.
+    :type utilities: Optional[AtomicDict]
+    :param rules: The ProbLog rules to start with. They are copied.
+    :type rules: Optional[List[str]]
+    :param constraints: The constraints to start with
+    :type constraints: Optional[Iterable[AtomicConstraint]]
+    :param neg_space: The negotiation space, see :func:`ConstraintStore.register_neg_space`
+    :type neg_space: Optional[NegSpace]
+    """
+
+    def __init__(self, utilities: Optional[AtomicDict] = None,
+                 rules: Optional[List[str]] = None,
+                 constraints: Optional[Iterable[AtomicConstraint]] = None,
+                 neg_space: Optional[NegSpace] = None):
+        self.utilities: AtomicDict = dict(utilities) if utilities else {}
+        self.rules: List[str] = list(rules) if rules else []
+        self.constraints = ConstraintStore(neg_space, constraints)
+        self.utilities_version = 0
+        self.rules_version = 0
+        self._listeners: List[Listener] = []
+
+    @property
+    def version(self) -> int:
+        """
+        A counter that changes with every update of the utilities, rules or constraints.
+
+        :rtype: int
+        """
+        return self.utilities_version + self.rules_version + self.constraints.version
+
+    def subscribe(self, listener: Listener) -> None:
+        """
+        Registers a function that is called with a :class:`KnowledgeChange`
+        after every update that changed something.
+
+        :param listener: The function to call
+        :type listener: Callable[[KnowledgeChange], None]
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        """
+        Stops calling a function registered with :func:`subscribe`.
+
+        :param listener: The function to stop calling
+        :type listener: Callable[[KnowledgeChange], None]
+        :raises ValueError: if the function was not registered
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, utilities: AtomicDict, previous_utilities: AtomicDict,
+                constraints: FrozenSet[AtomicConstraint], rules: bool,
+                replaced: bool = False) -> None:
+        if not self._listeners:
+            return
+
+        change = KnowledgeChange(self.version, utilities, previous_utilities,
+                                 constraints, rules, replaced)
+        for listener in list(self._listeners):
+            listener(change)
+
+    def add_utilities(self, new_utils: AtomicDict) -> AtomicDict:
+        """
+        Adds utilities, overwriting the ones that were already known.
+
+        :param new_utils: The utilities to add
+        :type new_utils: AtomicDict
+        :return: The previous value of every given utility that was already known
+        :rtype: AtomicDict
+        """
+        previous = {atom: self.utilities[atom] for atom in new_utils if atom in self.utilities}
+        changed = len(previous) != len(new_utils) or any(
+            previous[atom] != util for atom, util in new_utils.items())
+        if not changed:
+            return previous
+
+        self.utilities.update(new_utils)
+        self.utilities_version += 1
+        self._notify(dict(new_utils), previous, frozenset(), False)
+        return previous
+
+    def set_utilities(self, new_utils: AtomicDict) -> AtomicDict:
+        """
+        Replaces all utilities.
+
+        :param new_utils: The new utilities
+        :type new_utils: AtomicDict
+        :return: The previous utilities
+        :rtype: AtomicDict
+        """
+        if new_utils == self.utilities:
+            return dict(self.utilities)
+
+        previous = dict(self.utilities)
+        self.utilities.clear()
+        self.utilities.update(new_utils)
+        self.utilities_version += 1
+        self._notify(dict(new_utils), previous, frozenset(), False, replaced=True)
+        return previous
+
+    def set_rules(self, rules: List[str]) -> None:
+        """
+        Replaces the ProbLog rules.
+
+        :param rules: The new rules
+        :type rules: List[str]
+        """
+        if list(rules) == self.rules:
+            return
+
+        self.rules[:] = rules
+        self.rules_version += 1
+        self._notify({}, {}, frozenset(), True)
+
+    def add_constraints(self, new_constraints: Iterable[AtomicConstraint]
+                        ) -> FrozenSet[AtomicConstraint]:
+        """
+        Adds constraints to the :class:`ConstraintStore`.
+
+        :param new_constraints: The constraints to add
+        :type new_constraints: Iterable[AtomicConstraint]
+        :return: The constraints that weren't known yet
+        :rtype: FrozenSet[AtomicConstraint]
+        """
+        added = frozenset(self.constraints.update(new_constraints))
+        if added:
+            self._notify({}, {}, added, False)
+        return added
+
+    def clear_constraints(self) -> None:
+        """
+        Forgets all constraints.
+        """
+        if not self.constraints:
+            return
+
+        self.constraints.clear()
+        self._notify({}, {}, frozenset(), False)
+
+
+def shared_knowledge(evaluator: object) -> KnowledgeBase:
+    """
+    Returns the :class:`KnowledgeBase` of the given evaluator, so a generator can share it,
+    or a new one if the evaluator doesn't keep its knowledge in one.
+
+    :param evaluator: The evaluator the generator uses
+    :type evaluator: Evaluator
+    :return: The knowledge base the generator should use
+    :rtype: KnowledgeBase
+    """
+    knowledge = getattr(evaluator, "knowledge", None)
+    if isinstance(knowledge, KnowledgeBase):
+        return knowledge
+
+    return KnowledgeBase()
+
+
+class SharedKnowledge:
+    """
+    Mixin for generators and evaluators that keep their utilities, rules and constraints in
+    the :class:`KnowledgeBase` stored in their `knowledge` attribute. Assigning to
+    `utilities` or `knowledge_base` replaces the contents of the knowledge base in place.
+    """
+    knowledge: KnowledgeBase
+
+    @property
+    def utilities(self) -> AtomicDict:
+        return self.knowledge.utilities
+
+    @utilities.setter
+    def utilities(self, new_utils: AtomicDict) -> None:
+        self.knowledge.set_utilities(new_utils)
+
+    @property
+    def knowledge_base(self) -> List[str]:
+        return self.knowledge.rules
+
+    @knowledge_base.setter
+    def knowledge_base(self, rules: List[str]) -> None:
+        self.knowledge.set_rules(rules)
+
+    @property
+    def constraints(self) -> ConstraintStore:
+        return self.knowledge.constraints
+
+    def shares_knowledge(self, other: object) -> bool:
+        """
+        :param other: A generator or evaluator
+        :type other: object
+        :return: True iff `other` uses the same :class:`KnowledgeBase`, in which case \
+            updates don't have to be passed on to it
+        :rtype: bool
+        """
+        return getattr(other, "knowledge", None) is self.knowledge
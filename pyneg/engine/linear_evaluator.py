@@ -3,46 +3,98 @@ A simple evaluator that calculates the utility of an offer
 assuming :ref:`linear-additivity`
 """
 
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 
-from pyneg.comms import Offer, AtomicConstraint
+import numpy as np
+
+from pyneg.comms import Offer, AtomicConstraint, NegSpaceSchema
 from pyneg.types import AtomicDict
 from pyneg.utils import atom_from_issue_value
 
 from .engine import Evaluator
+from .evaluator import OfferBatch, batch_index_matrix
+from .knowledge_base import KnowledgeBase, SharedKnowledge
 from .strategy import Strategy
 
 
-class LinearEvaluator(Evaluator):
+class LinearEvaluator(SharedKnowledge, Evaluator):
     """
     Evaluates offers using linear additive calculations.
     (see :ref:`linear-additivity`)
     Utilities should be a utility function represented
     as an AtomicDict, issue weights should be a distribution over the
     issues and non_agreement_cost should be the cost of unsuccessfully
-    terminating the negotiation.
+    terminating the negotiation. The utilities are kept in a :class:`KnowledgeBase`,
+    which can be shared with a generator by passing it as `knowledge`.
     """
+    supports_batch = True
 
     def __init__(self, utilities: AtomicDict,
                  issue_weights: Dict[str, float],
-                 non_agreement_cost: float):
+                 non_agreement_cost: float,
+                 knowledge: Optional[KnowledgeBase] = None):
         super().__init__()
+        self.knowledge = knowledge if knowledge is not None else KnowledgeBase()
         self.utilities = utilities
         self.issue_weights = issue_weights
         self.non_agreement_cost = non_agreement_cost
+        self._utility_matrices: Dict[NegSpaceSchema, np.ndarray] = {}
+        self._matrices_version = -1
 
     def add_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = {
-            **self.utilities,
-            **new_utils
-        }
-
+        self.knowledge.add_utilities(new_utils)
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
+        self.knowledge.set_utilities(new_utils)
         return True
 
+    def get_utility_matrix(self, schema: NegSpaceSchema) -> np.ndarray:
+        """
+        Returns a matrix of shape (number of issues, maximum number of values) where
+        each entry is the weighted utility of assigning that value to that issue.
+        Entries past the number of values of an issue are 0. Constraints are not taken
+        into account here. The matrix is cached per schema until the utilities
+        in the knowledge base change.
+
+        :param schema: The schema that determines the order of issues and values
+        :type schema: NegSpaceSchema
+        :return: The weighted utility matrix
+        :rtype: np.ndarray
+        """
+        if self._matrices_version != self.knowledge.utilities_version:
+            self._utility_matrices = {}
+            self._matrices_version = self.knowledge.utilities_version
+
+        if schema not in self._utility_matrices:
+            matrix = np.zeros((len(schema), max(schema.cardinalities())))
+            for i, issue in enumerate(schema.get_issues()):
+                for j, value in enumerate(schema.get_values(issue)):
+                    matrix[i, j] = LinearEvaluator.calc_assignment_util(self, issue, value)
+            matrix.setflags(write=False)
+            self._utility_matrices[schema] = matrix
+
+        return self._utility_matrices[schema]
+
+    def calc_offer_utilities(self, batch: OfferBatch,
+                             schema: Optional[NegSpaceSchema] = None) -> np.ndarray:
+        """
+        Calculates the utilities of a batch of offers at once by looking up the
+        chosen values in the utility matrix (see :func:`get_utility_matrix`) and summing
+        over the issues.
+
+        :param batch: An iterable of offers or a matrix of value indices relative to `schema`
+        :type batch: OfferBatch
+        :param schema: the schema the value indices refer to. Can be omitted if the \
+            batch consists of :class:`CompactOffer` objects
+        :type schema: Optional[NegSpaceSchema]
+        :return: A vector containing the utility of every offer in the batch
+        :rtype: np.ndarray
+        """
+        schema, indices = batch_index_matrix(batch, schema)
+        matrix = self.get_utility_matrix(schema)
+        return matrix[np.arange(len(schema)), indices].sum(axis=1)
+
     def calc_assignment_util(self, issue: str, value: str) -> float:
         """
         calculates the utility gained from a perticular signed assignment
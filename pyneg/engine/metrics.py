@@ -0,0 +1,217 @@
+"""
+This module defines the metrics sinks that engines, agents and negotiation sessions report
+counters and timings to, so it's possible to see where a negotiation spends its time
+without an external profiler. Nothing is measured unless a sink is set, see
+:func:`Agent.set_metrics_sink`.
+
+>>> metrics = InMemoryMetrics()
+>>> agent_a.set_metrics_sink(metrics)
+>>> agent_a.negotiate(agent_b)
+>>> metrics.histograms["engine.generate_offer"].mean
+0.00012
+>>> metrics.counters["negotiation.rounds"]
+4
+
+The following names are reported:
+    - engine.generate_offer, engine.calc_offer_utility, engine.calc_offer_utilities, \
+      engine.accepts, engine.add_constraint, engine.add_constraints and \
+      engine.find_violated_constraint: time spent in those methods of :class:`Engine`
+    - engine.offers_accepted, engine.offers_rejected and engine.violations_found: counters
+    - agent.receive_message and agent.generate_next_message: time an agent spends handling \
+      incoming messages and generating its responses
+    - negotiation.round: time taken by every round of a :class:`NegotiationSession`
+    - negotiation.rounds: counter of the number of rounds
+"""
+
+import math
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+# histogram bucket i holds durations up to 2**i microseconds
+_SMALLEST_BUCKET = 1e-6
+_NUMB_BUCKETS = 40
+
+
+class TimingHistogram:
+    """
+    Keeps track of the distribution of a duration using buckets that double in size, starting
+    at one microsecond, so recording a duration takes constant time and memory.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * _NUMB_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Records a single duration.
+
+        :param seconds: The duration to record
+        :type seconds: float
+        """
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if seconds <= _SMALLEST_BUCKET:
+            bucket = 0
+        else:
+            mantissa, exponent = math.frexp(seconds / _SMALLEST_BUCKET)
+            bucket = exponent - 1 if mantissa == 0.5 else exponent
+        self.buckets[min(bucket, _NUMB_BUCKETS - 1)] += 1
+
+    @property
+    def mean(self) -> float:
+        """
+        :return: The mean of the recorded durations, or 0 if there are none
+        :rtype: float
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentage: float) -> float:
+        """
+        Estimates a percentile of the recorded durations.
+
+        :param percentage: The percentile to estimate, between 0 and 100
+        :type percentage: float
+        :return: The upper bound of the bucket the percentile falls in, \
+            never more than the largest duration recorded
+        :rtype: float
+        """
+        if not self.count:
+            return 0.0
+
+        rank = percentage / 100 * self.count
+        seen = 0
+        for bucket, numb in enumerate(self.buckets):
+            seen += numb
+            if seen >= rank and numb:
+                return min(_SMALLEST_BUCKET * 2 ** bucket, self.max)
+
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """
+        :return: The count, total, mean, min, max and the estimated 50th, 90th and 99th \
+            percentile of the durations
+        :rtype: Dict[str, float]
+        """
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self.mean,
+                "min": self.min if self.count else 0.0,
+                "max": self.max,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99)}
+
+
+class _Timer:
+    __slots__ = ("sink", "name", "start")
+
+    def __init__(self, sink: 'MetricsSink', name: str):
+        self.sink = sink
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.sink.observe(self.name, perf_counter() - self.start)
+
+
+class MetricsSink:
+    """
+    Nothing but an abstract class. Subclass it to send metrics elsewhere,
+    e.g. to a monitoring system.
+    """
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Increments a counter.
+
+        :param name: The name of the counter
+        :type name: str
+        :param value: How much to increment it by
+        :type value: int
+        :raises NotImplementedError:
+        """
+        raise NotImplementedError()
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records a duration.
+
+        :param name: The name of what was timed
+        :type name: str
+        :param seconds: How long it took
+        :type seconds: float
+        :raises NotImplementedError:
+        """
+        raise NotImplementedError()
+
+    def timer(self, name: str) -> _Timer:
+        """
+        Returns a context manager that records how long its body takes, including when the body
+        raises an exception.
+
+        >>> with sink.timer("engine.generate_offer"):
+        ...     generator.generate_offer()
+
+        :param name: The name of what is timed
+        :type name: str
+        :return: The context manager
+        :rtype: _Timer
+        """
+        return _Timer(self, name)
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Keeps counters and a :class:`TimingHistogram` per name in memory.
+    Every recorded duration also counts as a call.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, TimingHistogram] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = TimingHistogram()
+        histogram.record(seconds)
+
+    def reset(self) -> None:
+        """
+        Forgets everything recorded so far.
+        """
+        self.counters = {}
+        self.histograms = {}
+
+    def summary(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns everything recorded as a dictionary that can be serialised to JSON.
+
+        :param name: If given only the timings with this name are returned
+        :type name: Optional[str]
+        :return: The counters and a summary of every histogram, \
+            see :func:`TimingHistogram.summary`
+        :rtype: Dict[str, Any]
+        """
+        if name is not None:
+            return self.histograms[name].summary() if name in self.histograms else {}
+
+        return {"counters": dict(self.counters),
+                "timings": {name: histogram.summary()
+                            for name, histogram in self.histograms.items()}}
@@ -1,7 +1,7 @@
 """
 This module defines the :class:`ProblogEvaluator` class.
 """
-from typing import Dict, List, Set
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
 from problog import get_evaluatable
 from problog.program import PrologString
@@ -11,10 +11,18 @@ from pyneg.types import AtomicDict
 from pyneg.types import NegSpace
 from pyneg.utils import atom_from_issue_value
 from .engine import Evaluator
+from .knowledge_base import KnowledgeBase, SharedKnowledge
 from .strategy import Strategy
 
+if TYPE_CHECKING:
+    from .problog_pool import ProblogPool # pylint: disable=cyclic-import
 
-class ProblogEvaluator(Evaluator):
+# predicate of the decision facts in the compiled model, and the label to find them by
+_CHOICE_PREDICATE = "pyneg_choice"
+_DECISION_LABEL = "pyneg_decision"
+
+
+class ProblogEvaluator(SharedKnowledge, Evaluator):
     """
     This evaluator uses ProbLog to calculate the utility of offers.
     That means that it can deal with probabalistic as well as deterministic
@@ -22,17 +30,39 @@ class ProblogEvaluator(Evaluator):
     This is however, much slower than the other classes. The knowledge base
     should be represented as valid ProbLog statements see
     https://dtai.cs.kuleuven.be/problog/ for more information.
+
+    To avoid grounding and compiling a model for every offer, the knowledge base and
+    queries are compiled once, with every value in the negotiation space as an independent
+    probabilistic fact. Offers are then evaluated by setting the weights of those facts to 1 or 0.
+    The compiled model is only rebuilt when the knowledge base or the set of utility atoms changes.
+
+    If a :class:`ProblogPool` is given, the probabilities are calculated in one of its worker
+    processes instead, which keep their own compiled models.
+
+    The utilities and knowledge base are kept in a :class:`KnowledgeBase`,
+    which can be shared with a generator by passing it as `knowledge`.
     """
     def __init__(self,
                  neg_space: NegSpace,
                  utilities: AtomicDict,
                  non_agreement_cost: float,
-                 knowledge_base: List[str]):
+                 knowledge_base: List[str],
+                 pool: Optional['ProblogPool'] = None,
+                 knowledge: Optional[KnowledgeBase] = None):
         super().__init__()
+        self.pool = pool
+        self.knowledge = knowledge if knowledge is not None else KnowledgeBase()
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = neg_space
         self.non_agreement_cost = non_agreement_cost
+        self._compiled_key: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None
+        self._compiled_model = None
+        # for every issue value pair the node of its decision fact in the compiled model
+        self._decision_nodes: Dict[Tuple[str, str], int] = {}
+        self._decision_values: Dict[str, Set[str]] = {}
+        # the values whose decision fact the queries depend on
+        self._relevant_values: Dict[str, Set[str]] = {}
 
     def calc_probabilities_of_utilities(self, offer: Offer) -> Dict[str, float]:
         """
@@ -46,12 +76,118 @@ class ProblogEvaluator(Evaluator):
             they will be fufilled as values.
         :rtype: Dict[str, float]
         """
-        model = self.compile_problog_model(offer)
-        probability_of_facts = {str(atom): util for atom, util in
-                                get_evaluatable("sdd").create_from(
-                                    PrologString(model)).evaluate().items()}
+        if self.pool is not None:
+            return self.pool.calc_probabilities_of_utilities(
+                self.neg_space, self.knowledge_base, list(self.utilities.keys()), [offer])[0]
+
+        compiled_model = self._get_compiled_model()
+        if compiled_model is None or not self._covers(offer):
+            model = self.compile_problog_model(offer)
+            return {str(atom): util for atom, util in
+                    get_evaluatable("sdd").create_from(
+                        PrologString(model)).evaluate().items()}
+
+        weights = {node: 0.0 for node in self._decision_nodes.values()}
+        for issue in offer.get_issues():
+            node = self._decision_nodes.get((issue, offer.get_chosen_value(issue)))
+            if node is not None:
+                weights[node] = 1.0
+
+        # only evaluate the queries, the decision facts are labelled as well
+        evaluator = compiled_model.get_evaluator(weights=weights)
+        return {str(atom): evaluator.evaluate(node) for atom, node in compiled_model.queries()}
+
+    def get_relevant_values(self) -> Optional[Dict[str, Set[str]]]:
+        """
+        Returns, for every issue, the values that can influence the probability of one of the
+        utilities under the current knowledge base. Choosing between any of the other values
+        of an issue never changes the utility of an offer. Returns None if this can't
+        be determined, in which case every value should be assumed to matter.
+
+        :return: The relevant values of every issue, or None
+        :rtype: Optional[Dict[str, Set[str]]]
+        """
+        if self._get_compiled_model() is None:
+            return None
 
-        return probability_of_facts
+        return {issue: set(values) for issue, values in self._relevant_values.items()}
+
+    def _covers(self, offer: Offer) -> bool:
+        """
+        Checks whether every value chosen by the offer has a decision fact in the compiled model.
+        """
+        for issue in offer.get_issues():
+            if offer.get_chosen_value(issue) not in self._decision_values.get(issue, ()):
+                return False
+
+        return True
+
+    def _get_compiled_model(self):
+        """
+        Returns the compiled model for the current knowledge base and utilities,
+        compiling it if either changed since the last time. Returns None if the
+        decision facts can't be identified in the model, in which case every
+        offer has to be compiled separately.
+
+        :return: The compiled model
+        :rtype: Optional[problog.sdd_formula.SDD]
+        """
+        key = (tuple(self.knowledge_base), tuple(self.utilities.keys()))
+        if key == self._compiled_key:
+            return self._compiled_model
+
+        decision_atoms = {
+            (str(issue), str(value)): atom_from_issue_value(str(issue), str(value))
+            for issue in self.neg_space for value in self.neg_space[issue]}
+        # every decision is a fact of its own that implies the atom, so the knowledge base
+        # can't rename or merge its node, e.g. through an alias like `bad :- b_2.`,
+        # and the label lets us find that node in the model
+        decision_facts_string = "".join(
+            "0.5::{choice}({atom}).\n{atom} :- {choice}({atom}).\n{label}({choice}({atom})).\n"
+            .format(atom=atom, choice=_CHOICE_PREDICATE, label=_DECISION_LABEL)
+            for atom in decision_atoms.values())
+        model = decision_facts_string + self._compile_kb_and_queries()
+        compiled_model = get_evaluatable("sdd").create_from(
+            PrologString(model), labels=[(_DECISION_LABEL, 1)])
+        decision_nodes = {str(name.args[0]): node for name, node
+                          in compiled_model.get_names(_DECISION_LABEL)}
+
+        self._compiled_key = key
+        self._decision_nodes = {}
+        self._decision_values = {}
+        self._relevant_values = {str(issue): set() for issue in self.neg_space}
+        self._compiled_model = compiled_model
+        reachable = self._reachable_nodes(compiled_model)
+        for (issue, value), atom in decision_atoms.items():
+            node = decision_nodes.get(atom)
+            if node is None or node <= 0 or \
+                    type(compiled_model.get_node(node)).__name__ != "atom":
+                self._compiled_model = None
+                break
+            self._decision_nodes[(issue, value)] = node
+            self._decision_values.setdefault(issue, set()).add(value)
+            if node in reachable:
+                self._relevant_values[issue].add(value)
+
+        return self._compiled_model
+
+    @staticmethod
+    def _reachable_nodes(compiled_model) -> Set[int]:
+        """
+        Returns the nodes that the queries and evidence of a compiled model depend on.
+        """
+        stack = [node for _, node in compiled_model.queries()] + \
+            [node for _, node, _ in compiled_model.evidence_all()]
+        reachable: Set[int] = set()
+        while stack:
+            node = stack.pop()
+            # 0 and None are the constants true and false, negative keys are negations
+            if node is None or node == 0 or abs(node) in reachable:
+                continue
+            reachable.add(abs(node))
+            stack.extend(getattr(compiled_model.get_node(abs(node)), "children", ()))
+
+        return reachable
 
     def compile_problog_model(self, offer: Offer) -> str:
         """
@@ -65,6 +201,15 @@ class ProblogEvaluator(Evaluator):
         """
         decision_facts_string = offer.get_problog_dists()
 
+        return decision_facts_string + self._compile_kb_and_queries()
+
+    def _compile_kb_and_queries(self) -> str:
+        """
+        Compiles the knowledge base and the queries for the known utilities into ProbLog.
+
+        :return: A string representation of the knowledge base and queries
+        :rtype: str
+        """
         query_string = ""
         for util_atom in self.utilities.keys():
             # we shouldn't ask problog for facts that we currently have no rules for
@@ -75,7 +220,7 @@ class ProblogEvaluator(Evaluator):
 
         kb_string = "\n".join(self.knowledge_base) + "\n"
 
-        return decision_facts_string + kb_string + query_string
+        return kb_string + query_string
 
     def calc_offer_utility(self, offer: Offer) -> float:
         probability_of_utilities = self.calc_probabilities_of_utilities(offer)
@@ -113,8 +258,12 @@ class ProblogEvaluator(Evaluator):
 
         return 0.0
 
+    def add_utilities(self, new_utils: AtomicDict) -> bool:
+        self.knowledge.add_utilities(new_utils)
+        return True
+
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
+        self.knowledge.set_utilities(new_utils)
         return True
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
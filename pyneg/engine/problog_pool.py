@@ -0,0 +1,321 @@
+"""
+This module defines the :class:`ProblogPool` class, which runs ProbLog work for
+:class:`ProblogEvaluator` and :class:`DTPGenerator` in separate worker processes.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pyneg.comms import Offer
+from pyneg.types import NegSpace
+
+from .dtp_generator import index_offer_classes
+from .problog_evaluator import ProblogEvaluator
+
+# number of compiled sessions every worker keeps around
+SESSIONS_PER_WORKER = 4
+
+SessionKey = Tuple[Tuple[Tuple[str, Tuple[str, ...]], ...], Tuple[str, ...], Tuple[str, ...]]
+
+
+def _current_rss() -> Optional[int]:
+    """
+    Returns the resident set size of the current process in bytes, or None if it can't be
+    determined. Where /proc isn't available the peak resident set size is used instead.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _get_session(sessions: 'OrderedDict[SessionKey, ProblogEvaluator]',
+                 neg_space: NegSpace,
+                 knowledge_base: List[str],
+                 atoms: List[str]) -> ProblogEvaluator:
+    key = (tuple((str(issue), tuple(map(str, values))) for issue, values in neg_space.items()),
+           tuple(knowledge_base), tuple(atoms))
+    if key in sessions:
+        sessions.move_to_end(key)
+        return sessions[key]
+
+    session = ProblogEvaluator(neg_space, {atom: 0.0 for atom in atoms}, 0.0, list(knowledge_base))
+    sessions[key] = session
+    if len(sessions) > SESSIONS_PER_WORKER:
+        sessions.popitem(last=False)
+
+    return session
+
+
+def _calc_probabilities(sessions: 'OrderedDict[SessionKey, ProblogEvaluator]',
+                        neg_space: NegSpace,
+                        knowledge_base: List[str],
+                        atoms: List[str],
+                        offers: List[Dict[str, str]]) -> List[Dict[str, float]]:
+    session = _get_session(sessions, neg_space, knowledge_base, atoms)
+    results: List[Dict[str, float]] = []
+    for chosen in offers:
+        offer = Offer({str(issue): {str(value): float(str(value) == chosen[str(issue)])
+                                    for value in values}
+                       for issue, values in neg_space.items()})
+        results.append({atom: float(prob) for atom, prob in
+                        session.calc_probabilities_of_utilities(offer).items()})
+
+    return results
+
+
+def _index_offer_classes(sessions: 'OrderedDict[SessionKey, ProblogEvaluator]',
+                         neg_space: NegSpace,
+                         knowledge_base: List[str],
+                         atoms: List[str]) -> Dict[str, Any]:
+    return index_offer_classes(_get_session(sessions, neg_space, knowledge_base, atoms), atoms)
+
+
+_TASKS: Dict[str, Callable[..., Any]] = {
+    "probabilities": _calc_probabilities,
+    "offer_classes": _index_offer_classes,
+}
+
+
+def _worker_main(conn: Connection) -> None:
+    """
+    The loop every worker process runs. It answers every task with the status,
+    the result and its current resident set size until it receives None.
+    """
+    sessions: 'OrderedDict[SessionKey, ProblogEvaluator]' = OrderedDict()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        task, args = message
+        try:
+            result = _TASKS[task](sessions, *args)
+            conn.send(("ok", result, _current_rss()))
+        except Exception as err: # pylint: disable=broad-except
+            try:
+                conn.send(("error", err, _current_rss()))
+            except Exception: # pylint: disable=broad-except
+                # the exception itself couldn't be pickled
+                conn.send(("error", RuntimeError(repr(err)), _current_rss()))
+
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.solves = 0
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class ProblogPool:
+    """
+    A pool of long lived worker processes that do the grounding, compilation and evaluation of
+    ProbLog models. Each worker keeps the models it compiled so repeated work for the same
+    knowledge base stays cheap. Pass the pool to :class:`ProblogEvaluator` or
+    :class:`DTPGenerator` to use it, their API stays synchronous: every call blocks until
+    a worker has answered. The pool is thread safe, so agents negotiating in different threads
+    are served by different workers and can use several cores.
+
+    To keep the memory use bounded, workers are replaced by a fresh process after `max_solves`
+    tasks or once their resident set size exceeds `max_rss` bytes. Workers are only started
+    when they are needed. Results come back as plain dictionaries and lists.
+
+    >>> with ProblogPool(max_workers=2, max_solves=100) as pool:
+    ...     evaluator = ProblogEvaluator(neg_space, utilities, -1000, kb, pool=pool)
+    ...     evaluator.calc_offer_utility(offer)
+    10.0
+
+    :param max_workers: The maximum number of worker processes, defaults to the number of cores
+    :type max_workers: Optional[int]
+    :param max_solves: The number of tasks after which a worker is replaced, \
+        or None to never replace them because of that
+    :type max_solves: Optional[int]
+    :param max_rss: The resident set size in bytes above which a worker is replaced, \
+        or None to never replace them because of that
+    :type max_rss: Optional[int]
+    :param mp_context: The multiprocessing context to start the workers with
+    :type mp_context: Optional[multiprocessing.context.BaseContext]
+    """
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_solves: Optional[int] = 100,
+                 max_rss: Optional[int] = None,
+                 mp_context=None):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers should be at least 1, not {max_workers}")
+        if max_solves is not None and max_solves < 1:
+            raise ValueError(f"max_solves should be at least 1, not {max_solves}")
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_solves = max_solves
+        self.max_rss = max_rss
+        self.solves = 0
+        self.recycled = 0
+        self._context = mp_context or multiprocessing.get_context()
+        # the most recently used worker is reused first
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        # notified whenever a worker becomes idle or stops, or the pool is closed
+        self._available = threading.Condition(self._lock)
+        self._started = 0
+        self._closed = False
+
+    def __enter__(self) -> 'ProblogPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops all idle workers. Workers that are still busy are stopped when
+        they finish their task.
+        """
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            # threads waiting for a worker raise instead
+            self._available.notify_all()
+        for worker in idle:
+            self._discard(worker)
+
+    def _acquire(self) -> _Worker:
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("The pool has been closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._started < self.max_workers:
+                    self._started += 1
+                    break
+                self._available.wait()
+
+        try:
+            return _Worker(self._context)
+        except BaseException:
+            with self._available:
+                self._started -= 1
+                self._available.notify()
+            raise
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.stop()
+        with self._available:
+            self._started -= 1
+            # someone waiting can start a replacement
+            self._available.notify()
+
+    def _release(self, worker: _Worker, rss: Optional[int]) -> None:
+        worker.solves += 1
+        with self._lock:
+            self.solves += 1
+            closed = self._closed
+        exhausted = self.max_solves is not None and worker.solves >= self.max_solves
+        too_big = self.max_rss is not None and rss is not None and rss > self.max_rss
+        if closed or exhausted or too_big:
+            self._discard(worker)
+            if not closed:
+                with self._lock:
+                    self.recycled += 1
+        else:
+            with self._available:
+                self._idle.append(worker)
+                self._available.notify()
+
+    def _run(self, task: str, args: Tuple[Any, ...]) -> Any:
+        worker = self._acquire()
+        try:
+            worker.conn.send((task, args))
+            status, result, rss = worker.conn.recv()
+        except (EOFError, OSError) as err:
+            self._discard(worker)
+            raise RuntimeError(f"ProbLog worker died while running {task}") from err
+        except BaseException:
+            # we don't know what state the worker is in so we don't reuse it
+            self._discard(worker)
+            raise
+
+        self._release(worker, rss)
+        if status == "error":
+            raise result
+
+        return result
+
+    def calc_probabilities_of_utilities(self,
+                                        neg_space: NegSpace,
+                                        knowledge_base: List[str],
+                                        atoms: List[str],
+                                        offers: Sequence[Offer]) -> List[Dict[str, float]]:
+        """
+        Calculates the probabilities of the atoms for every offer in a worker.
+        See :func:`ProblogEvaluator.calc_probabilities_of_utilities`
+
+        :param neg_space: The negotiation space the offers are in
+        :type neg_space: NegSpace
+        :param knowledge_base: The knowledge base as a list of ProbLog statements
+        :type knowledge_base: List[str]
+        :param atoms: The atoms to calculate the probabilities of
+        :type atoms: List[str]
+        :param offers: The offers to evaluate
+        :type offers: Sequence[Offer]
+        :raises RuntimeError: if the worker died or the pool is closed
+        :return: A dictionary from atom to probability for every offer
+        :rtype: List[Dict[str, float]]
+        """
+        chosen = [{str(issue): offer.get_chosen_value(str(issue)) for issue in neg_space}
+                  for offer in offers]
+        return self._run("probabilities", (neg_space, list(knowledge_base), list(atoms), chosen))
+
+    def index_offer_classes(self,
+                            neg_space: NegSpace,
+                            knowledge_base: List[str],
+                            atoms: List[str]) -> Dict[str, Any]:
+        """
+        Splits the negotiation space in classes of offers that the knowledge base can't
+        tell apart in a worker. See :func:`pyneg.engine.dtp_generator.index_offer_classes`
+
+        :param neg_space: The negotiation space to split
+        :type neg_space: NegSpace
+        :param knowledge_base: The knowledge base as a list of ProbLog statements
+        :type knowledge_base: List[str]
+        :param atoms: The atoms to calculate the probabilities of
+        :type atoms: List[str]
+        :raises RuntimeError: if the worker died or the pool is closed
+        :return: The classes and their probabilities
+        :rtype: Dict[str, Any]
+        """
+        return self._run("offer_classes", (neg_space, list(knowledge_base), list(atoms)))
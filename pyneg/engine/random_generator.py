@@ -4,13 +4,15 @@ Defines the :class:`RandomGenerator` class.
 
 from typing import Dict, List, Optional, Set
 
-from numpy.random import choice
+import numpy as np
 
-from pyneg.comms import AtomicConstraint, Offer
-from pyneg.types import AtomicDict, NegSpace
+from pyneg.comms import AtomicConstraint, CompactOffer, NegSpaceSchema, Offer
+from pyneg.types import AtomicDict, NegSpace, RandomSeed
+from pyneg.utils import make_rng
 
 from .evaluator import Evaluator
 from .generator import Generator
+from .knowledge_base import shared_knowledge
 from .strategy import Strategy
 
 
@@ -18,6 +20,9 @@ class RandomGenerator(Generator):
     """
     This generator generates random offers without any reasoning.
     By default it uses uniform distriutions across all issues and values.
+    Candidates are drawn in blocks of `batch_size` as a matrix of value indices
+    which is scored in one go if the evaluator supports it. All randomness comes from
+    `rng`, pass a seed or numpy Generator to make the offers reproducible.
 
     :raises StopIteration: when maximum number of samples for one offer or \
         maximum total number offers generated is exceded
@@ -30,12 +35,16 @@ class RandomGenerator(Generator):
                  knowledge_base: List[str],
                  acceptability_threshold: float,
                  max_rounds: int,
-                 max_generation_tries: int = 1000):
-        super().__init__()
+                 max_generation_tries: int = 1000,
+                 batch_size: int = 100,
+                 rng: RandomSeed = None):
+        super().__init__(shared_knowledge(evaluator))
+        self.rng = make_rng(rng)
         self.utilities = utilities
         self.knowledge_base = knowledge_base
         self.neg_space = {issue: list(map(str, values))
                           for issue, values in neg_space.items()}
+        self.schema = NegSpaceSchema(self.neg_space)
         self.non_agreement_cost = non_agreement_cost
         self.evaluator = evaluator
         self.init_uniform_strategy(neg_space)
@@ -43,6 +52,7 @@ class RandomGenerator(Generator):
         self.round_counter = 0
         self.active = True
         self.max_generation_tries = max_generation_tries
+        self.batch_size = batch_size
         self.acceptability_threshold = acceptability_threshold
 
     def init_uniform_strategy(self, neg_space: NegSpace) -> None:
@@ -78,22 +88,16 @@ class RandomGenerator(Generator):
             raise StopIteration()
 
         return_offer = None
-        for _ in range(self.max_generation_tries):
-            offer: Dict[str, Dict[str, float]] = {}
-            for issue in self.neg_space.keys():
-                # convert to two lists so we can use numpy's choice
-                values, probs = zip(
-                    *self.strategy.get_value_dist(issue).items())
-                chosen_value = choice(values, p=probs)
-
-                offer[issue] = {
-                    key: 0 for key in self.strategy.get_value_dist(issue).keys()}
-                offer[issue][chosen_value] = 1
-            possible_offer = Offer(offer)
-            util = self.evaluator.calc_offer_utility(possible_offer)
-            if util >= self.acceptability_threshold:
-                return_offer = possible_offer
-                break
+        cumulative_dists = self._cumulative_distributions()
+        tries_left = self.max_generation_tries
+        while tries_left > 0 and return_offer is None:
+            candidates = self._sample_indices(
+                cumulative_dists, min(self.batch_size, tries_left))
+            tries_left -= len(candidates)
+            acceptable_index = self._first_acceptable(candidates)
+            if acceptable_index is not None:
+                return_offer = CompactOffer(
+                    self.schema, candidates[acceptable_index]).to_offer()
 
         if not return_offer:
             self.active = False
@@ -104,16 +108,78 @@ class RandomGenerator(Generator):
             self.active = False
         return return_offer
 
-    def add_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = {
-            **self.utilities,
-            **new_utils
-        }
+    def _cumulative_distributions(self) -> np.ndarray:
+        """
+        Returns the cumulative distribution of every issue in the current strategy
+        in the order of the value indices of the schema. Rows are padded with 1.
+
+        :return: An array of shape (number of issues, maximum number of values)
+        :rtype: np.ndarray
+        """
+        cumulative_dists = np.ones(
+            (len(self.schema), max(self.schema.cardinalities())), dtype=np.float64)
+        for i, issue in enumerate(self.schema.get_issues()):
+            value_dist = self.strategy.get_value_dist(issue)
+            probs = [value_dist.get(value, 0.0) for value in self.schema.get_values(issue)]
+            cumulative_dists[i, :len(probs)] = np.cumsum(probs)
+
+        return cumulative_dists
+
+    def _sample_indices(self, cumulative_dists: np.ndarray, numb_samples: int) -> np.ndarray:
+        """
+        Draws a block of offers from the cumulative distributions by inverse transform sampling.
+
+        :param cumulative_dists: see :func:`_cumulative_distributions`
+        :type cumulative_dists: np.ndarray
+        :param numb_samples: How many offers to draw
+        :type numb_samples: int
+        :return: A matrix of value indices with one row per offer and one column per issue
+        :rtype: np.ndarray
+        """
+        cardinalities = self.schema.cardinalities()
+        # scale by the total so slightly unnormalised strategies still work
+        totals = cumulative_dists[np.arange(len(self.schema)), cardinalities - 1]
+        uniform_samples = self.rng.random((numb_samples, len(self.schema))) * totals
+        indices = np.empty((numb_samples, len(self.schema)), dtype=np.int64)
+        for i in range(len(self.schema)):
+            indices[:, i] = np.searchsorted(
+                cumulative_dists[i, :cardinalities[i]], uniform_samples[:, i], side="right")
+
+        # guard against rounding errors at the top of the distribution
+        return np.minimum(indices, cardinalities - 1)
+
+    def _first_acceptable(self, candidates: np.ndarray) -> Optional[int]:
+        """
+        Finds the first candidate that is acceptable.
 
+        :param candidates: A matrix of value indices, see :func:`_sample_indices`
+        :type candidates: np.ndarray
+        :return: The row of the first acceptable candidate or None if there isn't one
+        :rtype: Optional[int]
+        """
+        if not self.evaluator.supports_batch:
+            # the evaluator would score them one by one anyway
+            # so we might as well stop at the first acceptable one
+            for i, candidate in enumerate(candidates):
+                offer = CompactOffer(self.schema, candidate).to_offer()
+                if self.evaluator.calc_offer_utility(offer) >= self.acceptability_threshold:
+                    return i
+            return None
+
+        acceptable = np.flatnonzero(
+            self.evaluator.calc_offer_utilities(candidates, self.schema)
+            >= self.acceptability_threshold)
+        if acceptable.size == 0:
+            return None
+
+        return int(acceptable[0])
+
+    def add_utilities(self, new_utils: AtomicDict) -> bool:
+        self.knowledge.add_utilities(new_utils)
         return True
 
     def set_utilities(self, new_utils: AtomicDict) -> bool:
-        self.utilities = new_utils
+        self.knowledge.set_utilities(new_utils)
         return True
 
     def add_constraint(self, constraint: AtomicConstraint) -> bool:
@@ -0,0 +1,11 @@
+"""
+This submodule contains the logic for running many negotiations at once,
+e.g. round robin tournaments over generated scenarios across a pool of processes.
+"""
+
+from pyneg.tournament.tournament import AgentSpec
+from pyneg.tournament.tournament import NegotiationJob
+from pyneg.tournament.tournament import NegotiationResult
+from pyneg.tournament.tournament import make_jobs
+from pyneg.tournament.tournament import run_negotiation
+from pyneg.tournament.tournament import run_tournament
@@ -0,0 +1,237 @@
+"""
+This module defines functions to run many negotiations in parallel, e.g. to sweep
+over generated scenarios. Negotiations are described by :class:`NegotiationJob` objects
+which only hold the scenario and how to build the agents, so they can be shipped to
+worker processes. The agents themselves are only constructed inside the workers.
+
+>>> specs = [AgentSpec(make_linear_concession_agent,
+...                    {"reservation_value": 0.5, "non_agreement_cost": -1000})]
+>>> scenarios = [generate_random_scenario((4, 4), 1, rng=seed) for seed in range(10)]
+>>> for result in run_tournament(make_jobs(scenarios, specs), max_workers=4):
+...     print(result.job_id, result.success, result.utility_a, result.utility_b)
+
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from inspect import signature
+from itertools import product
+from time import perf_counter
+from typing import (Any, Callable, Dict, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple, Union)
+
+import numpy as np
+
+from pyneg.agent import Agent, NegotiationSession
+from pyneg.comms import Message
+from pyneg.types import AtomicDict, NegSpace, RandomSeed
+from pyneg.utils import neg_scenario_from_util_matrices, spawn_seeds
+
+Scenario = Tuple[NegSpace, AtomicDict, AtomicDict]
+
+
+class AgentSpec(NamedTuple):
+    """
+    Describes how to build an agent. `factory` is called as
+    `factory(name=..., neg_space=..., utilities=..., **kwargs)` so any of the factories in
+    :mod:`pyneg.agent.agent_factory` can be used. It has to be picklable, which module level
+    functions are. If the factory accepts an `rng` argument every agent gets its own
+    random stream, see :func:`make_jobs`.
+    """
+    factory: Callable[..., Agent]
+    kwargs: Dict[str, Any]
+    name: str = ""
+
+    def get_name(self) -> str:
+        """
+        :return: The name of the spec, defaults to the name of the factory
+        :rtype: str
+        """
+        return self.name or self.factory.__name__
+
+    def build(self, name: str, neg_space: NegSpace, utilities: AtomicDict,
+              rng: RandomSeed = None) -> Agent:
+        """
+        Constructs the agent.
+
+        :param name: Name of the agent
+        :type name: str
+        :param neg_space: The negotiation space the agent will negotiate in
+        :type neg_space: NegSpace
+        :param utilities: The utilities of the agent
+        :type utilities: AtomicDict
+        :param rng: Seed to pass to the factory if it accepts one
+        :type rng: RandomSeed
+        :return: The agent
+        :rtype: Agent
+        """
+        kwargs = dict(self.kwargs)
+        if rng is not None and "rng" in signature(self.factory).parameters:
+            kwargs["rng"] = rng
+        return self.factory(name=name, neg_space=neg_space, utilities=utilities, **kwargs)
+
+
+class NegotiationJob(NamedTuple):
+    """
+    A single negotiation between an agent built from `spec_a` using `utilities_a`
+    and one built from `spec_b` using `utilities_b`. `spec_a` opens the negotiation.
+    """
+    job_id: int
+    scenario_id: int
+    neg_space: NegSpace
+    utilities_a: AtomicDict
+    utilities_b: AtomicDict
+    spec_a: AgentSpec
+    spec_b: AgentSpec
+    rng_a: RandomSeed = None
+    rng_b: RandomSeed = None
+
+
+class NegotiationResult(NamedTuple):
+    """
+    The outcome of a :class:`NegotiationJob`. `rounds` is the number of rounds that were
+    started, the same count as `rounds` of :class:`NegotiationSession` and the
+    `negotiation.rounds` metric. The utilities are those of the agreement, or the non agreement
+    costs if there was none. `wall_time` is in seconds and includes setting up the agents.
+    """
+    job_id: int
+    scenario_id: int
+    name_a: str
+    name_b: str
+    success: bool
+    rounds: int
+    utility_a: float
+    utility_b: float
+    wall_time: float
+
+
+def make_jobs(scenarios: Sequence[Union[Scenario, Tuple[np.ndarray, np.ndarray]]],
+              agent_specs: Sequence[AgentSpec],
+              matchups: Optional[Sequence[Tuple[int, int]]] = None,
+              rng: RandomSeed = None) -> List[NegotiationJob]:
+    """
+    Creates a job for every matchup in every scenario. Scenarios can be given as returned
+    by :func:`pyneg.utils.neg_scenario_from_util_matrices` or as a pair of utility
+    matrices as returned by :func:`pyneg.utils.generate_random_scenario`.
+
+    :param scenarios: The scenarios to negotiate in
+    :type scenarios: Sequence[Union[Scenario, Tuple[np.ndarray, np.ndarray]]]
+    :param agent_specs: The agents that take part in the tournament
+    :type agent_specs: Sequence[AgentSpec]
+    :param matchups: Pairs of indices into `agent_specs`. Defaults to every ordered pair,\
+        including agents negotiating against themselves.
+    :type matchups: Optional[Sequence[Tuple[int, int]]]
+    :param rng: Seed from which every agent gets its own stream, \
+        see :func:`pyneg.utils.spawn_seeds`
+    :type rng: RandomSeed
+    :return: The jobs, in scenario major order.
+    :rtype: List[NegotiationJob]
+    """
+    if matchups is None:
+        matchups = list(product(range(len(agent_specs)), repeat=2))
+
+    jobs: List[NegotiationJob] = []
+    for scenario_id, scenario in enumerate(scenarios):
+        if len(scenario) == 2:
+            neg_space, utilities_a, utilities_b = neg_scenario_from_util_matrices(*scenario)
+        else:
+            neg_space, utilities_a, utilities_b = scenario
+
+        for index_a, index_b in matchups:
+            jobs.append(NegotiationJob(len(jobs), scenario_id, neg_space,
+                                       utilities_a, utilities_b,
+                                       agent_specs[index_a], agent_specs[index_b]))
+
+    # seeds rather than Generators so every job can be replayed
+    streams = spawn_seeds(rng, 2 * len(jobs))
+    return [job._replace(rng_a=streams[2 * i], rng_b=streams[2 * i + 1])
+            for i, job in enumerate(jobs)]
+
+
+def run_negotiation(job: NegotiationJob) -> NegotiationResult:
+    """
+    Builds the agents of the job and lets them negotiate in the current process.
+
+    :param job: The negotiation to run
+    :type job: NegotiationJob
+    :return: The outcome of the negotiation
+    :rtype: NegotiationResult
+    """
+    start = perf_counter()
+    agent_a = job.spec_a.build("A", job.neg_space, job.utilities_a, job.rng_a)
+    agent_b = job.spec_b.build("B", job.neg_space, job.utilities_b, job.rng_b)
+    # pylint: disable=protected-access
+    session = NegotiationSession(agent_a, agent_b, metrics=agent_a._metrics)
+    success = session.run()
+
+    transcript: List[Message] = agent_a._transcript
+    if success:
+        agreement = transcript[-1].offer
+        utility_a = agent_a._engine.calc_offer_utility(agreement)
+        utility_b = agent_b._engine.calc_offer_utility(agreement)
+    else:
+        utility_a = job.spec_a.kwargs.get("non_agreement_cost", 0.0)
+        utility_b = job.spec_b.kwargs.get("non_agreement_cost", 0.0)
+
+    return NegotiationResult(
+        job.job_id,
+        job.scenario_id,
+        job.spec_a.get_name(),
+        job.spec_b.get_name(),
+        success,
+        session.rounds,
+        utility_a,
+        utility_b,
+        perf_counter() - start)
+
+
+def _run_chunk(jobs: List[NegotiationJob]) -> List[NegotiationResult]:
+    return [run_negotiation(job) for job in jobs]
+
+
+def run_tournament(jobs: Sequence[NegotiationJob],
+                   max_workers: Optional[int] = None,
+                   chunksize: int = 1,
+                   executor: Optional[Executor] = None) -> Iterator[NegotiationResult]:
+    """
+    Runs all jobs across a pool of processes. Jobs are sent to the workers in chunks of
+    `chunksize` to amortise the communication overhead of many short negotiations.
+    Results are yielded as soon as their chunk completes so they are not in job order,
+    use `job_id` to match them up.
+
+    :param jobs: The negotiations to run, see :func:`make_jobs`
+    :type jobs: Sequence[NegotiationJob]
+    :param max_workers: Number of worker processes, defaults to the number of cores.\
+        If it is 1 everything runs in the current process.
+    :type max_workers: Optional[int]
+    :param chunksize: Number of jobs per task sent to a worker
+    :type chunksize: int
+    :param executor: An executor to use instead of creating a process pool. \
+        It won't be shut down afterwards.
+    :type executor: Optional[Executor]
+    :raises ValueError: if chunksize is smaller than 1
+    :return: An iterator over the results
+    :rtype: Iterator[NegotiationResult]
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize should be at least 1 not {chunksize}")
+
+    chunks = [list(jobs[i:i + chunksize]) for i in range(0, len(jobs), chunksize)]
+
+    if executor is None and max_workers == 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+
+    if executor is not None:
+        yield from _run_chunks(executor, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from _run_chunks(pool, chunks)
+
+
+def _run_chunks(executor: Executor,
+                chunks: List[List[NegotiationJob]]) -> Iterator[NegotiationResult]:
+    futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+    for future in as_completed(futures):
+        yield from future.result()
@@ -9,9 +9,13 @@ Examples:
 '''
 
 from typing import Dict, Tuple, Union, cast, List, Optional
+
+from numpy.random import Generator, SeedSequence
 from pyneg.types.message_type import MessageType
 from pyneg.types.verbosity import Verbosity
 
 AtomicDict = Dict[str, float]
 NestedDict = Dict[str, Dict[str, float]]
 NegSpace = Dict[str, List[str]]
+# anything that can be turned into a numpy random Generator, see :func:`pyneg.utils.make_rng`
+RandomSeed = Union[None, int, SeedSequence, Generator]
@@ -16,19 +16,21 @@ Functions:
     - neg_scenario_from_util_matrices
     - setup_random_scenarios
     - generate_random_scenario
+    - make_rng
+    - spawn_seeds
+    - spawn_rngs
     - insert_difficult_constraints
 """
 
-from itertools import product
 from os import mkdir, path
 from re import search, sub
 from typing import Dict, List, Tuple
-from uuid import uuid4
+from uuid import UUID
 
 import numpy as np
-from numpy.random import randint
+from numpy.random import Generator, SeedSequence, default_rng, randint
 
-from pyneg.types import NestedDict
+from pyneg.types import NestedDict, RandomSeed
 
 def issue_value_tuple_from_atom(atom: str) -> Tuple[str, str]:
     """
@@ -265,11 +267,25 @@ def count_acceptable_offers(
         rho_a_percentile: float,
         rho_b_percentile: float,
         w_a=None,
-        w_b=None) -> Tuple[int, int, int]:
+        w_b=None,
+        method: str = "exact",
+        chunk_size: int = 2 ** 16,
+        resolution: int = 100) -> Tuple[int, int, int]:
     """
     Counts the number of acceptable offers for each agent as well as the number of offers that is
-    acceptable to both. Uses vecor arithmetic to speed up the calculation
-    and therefore can only be used in linear additive situations.
+    acceptable to both. Since the utilities are linear additive, the offers are never
+    materialised all at once, so spaces far larger than memory can be analysed.
+
+    With `method="exact"` the issues are split in two halves. The utilities of every partial
+    offer of one half are kept in memory, while the partial offers of the other half are
+    streamed in chunks of `chunk_size` and matched against them, so memory use is bounded
+    by `chunk_size` regardless of the size of the space. Offers whose utility is within
+    floating point error of a threshold count as acceptable.
+
+    With `method="histogram"` the weighted utilities of every issue are rounded to a grid
+    of `resolution` steps and the counts are computed by convolving the per-issue histograms.
+    This is much faster for large spaces, but only exact if the weighted utilities lie on
+    the grid, as they do for e.g. binary utility matrices with uniform weights.
 
     :param u_a: utility matrix for A
     :type u_a: Array[float]
@@ -283,31 +299,170 @@ def count_acceptable_offers(
     :type w_a: Optional[Array[float]]
     :param w_b: distribution of issue importance, defaults to uniform
     :type w_b: Optional[Array[float]]
+    :param method: Either "exact" or "histogram"
+    :type method: str
+    :param chunk_size: The number of partial offers held in memory at once in exact mode
+    :type chunk_size: int
+    :param resolution: The number of grid steps per issue in histogram mode
+    :type resolution: int
+    :raises ValueError: if the method is unknown or the chunk size or resolution is invalid
     :return: A tuple with entries representing the number of offers that \
         are acceptable to A, B and both resp.
     :rtype: Tuple[int,int,int]
     """
-    n, m = u_a.shape
-    if not w_a:
-        w_a = 1 / n * np.ones((1, n))
-    if not w_b:
-        w_b = 1 / n * np.ones((1, n))
+    weighted_a = weighted_utility_matrix(u_a, w_a)
+    weighted_b = weighted_utility_matrix(u_b, w_b)
+    rho_a_absolute = rho_a_percentile * weighted_a.max(axis=1).sum()
+    rho_b_absolute = rho_b_percentile * weighted_b.max(axis=1).sum()
+
+    if method == "exact":
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size should be at least 1, not {chunk_size}")
+        return _count_acceptable_offers_exact(
+            weighted_a, weighted_b, rho_a_absolute, rho_b_absolute, chunk_size)
+    if method == "histogram":
+        if resolution < 1:
+            raise ValueError(f"resolution should be at least 1, not {resolution}")
+        return _count_acceptable_offers_histogram(
+            weighted_a, weighted_b, rho_a_absolute, rho_b_absolute, resolution)
+
+    raise ValueError(f"Unknown method: {method}, should be exact or histogram")
+
+
+def weighted_utility_matrix(u, w=None) -> np.ndarray:
+    """
+    Multiplies every row of a utility matrix, as created by the
+    `generate_*_utility_matrices` functions, with the weight of its issue.
+
+    :param u: utility matrix with one row per issue
+    :type u: Array[float]
+    :param w: distribution of issue importance, defaults to uniform
+    :type w: Optional[Array[float]]
+    :return: The weighted utility matrix
+    :rtype: np.ndarray
+    """
+    u = np.asarray(u, dtype=float)
+    n, _ = u.shape
+    if w is None:
+        w = np.full(n, 1 / n)
+    return u * np.asarray(w, dtype=float).reshape(n, 1)
+
+
+def _tolerance(weighted):
+    """
+    Returns how far below a threshold a sum of weighted utilities
+    may be because of floating point error.
+    """
+    return 1e-9 * max(np.abs(weighted).max(axis=1).sum(), 1.0)
 
-    issue_indices = np.tile(np.arange(n), (m ** n, 1))
-    value_indices = np.array(list(product(*[range(m) for _ in range(n)])))
 
-    utils_a = np.dot(u_a[issue_indices, value_indices], w_a.T)
-    utils_b = np.dot(u_b[issue_indices, value_indices], w_b.T)
+def _partial_offer_utilities(weighted, start: int, stop: int):
+    """
+    Returns the utilities of the partial offers with index start up to stop, where partial offers
+    are numbered by reading the chosen values as the digits of a number.
+    """
+    k, m = weighted.shape
+    index = np.arange(start, stop, dtype=np.int64)
+    utils = np.zeros(len(index))
+    for issue in range(k - 1, -1, -1):
+        utils += weighted[issue, index % m]
+        index //= m
+
+    return utils
+
+
+def _count_acceptable_offers_exact(weighted_a, weighted_b, rho_a, rho_b, chunk_size):
+    n, m = weighted_a.shape
+    # the fixed half should fit in a chunk, the rest is streamed
+    fixed_issues = n // 2
+    while fixed_issues > 0 and m ** fixed_issues > chunk_size:
+        fixed_issues -= 1
+    streamed_issues = n - fixed_issues
+
+    fixed_a = _partial_offer_utilities(weighted_a[streamed_issues:], 0, m ** fixed_issues)
+    fixed_b = _partial_offer_utilities(weighted_b[streamed_issues:], 0, m ** fixed_issues)
+    sorted_a = np.sort(fixed_a)
+    sorted_b = np.sort(fixed_b)
+
+    # to count the offers acceptable to both we need the fixed offers acceptable to A that
+    # are also acceptable to B. Those acceptable to A are a prefix of the fixed offers
+    # in order of decreasing utility for A, which we split into blocks in which
+    # the utilities for B are sorted so they can be searched.
+    numb_fixed = len(fixed_a)
+    order = np.argsort(-fixed_a, kind="stable")
+    b_by_a = fixed_b[order]
+    block_size = max(1, int(np.sqrt(numb_fixed)))
+    blocks = [np.sort(b_by_a[i:i + block_size]) for i in range(0, numb_fixed, block_size)]
+
+    tol_a = _tolerance(weighted_a)
+    tol_b = _tolerance(weighted_b)
+    a_count = b_count = both_count = 0
+    numb_streamed = m ** streamed_issues
+    for start in range(0, numb_streamed, chunk_size):
+        stop = min(start + chunk_size, numb_streamed)
+        needed_a = rho_a - tol_a - _partial_offer_utilities(weighted_a[:streamed_issues],
+                                                            start, stop)
+        needed_b = rho_b - tol_b - _partial_offer_utilities(weighted_b[:streamed_issues],
+                                                            start, stop)
+        accepted_by_a = numb_fixed - np.searchsorted(sorted_a, needed_a, side="left")
+        a_count += int(accepted_by_a.sum())
+        b_count += int((numb_fixed - np.searchsorted(sorted_b, needed_b, side="left")).sum())
+
+        full_blocks = accepted_by_a // block_size
+        remainder = accepted_by_a - full_blocks * block_size
+        both = np.zeros(len(needed_b), dtype=np.int64)
+        for i, block in enumerate(blocks):
+            in_full = full_blocks > i
+            if in_full.any():
+                both[in_full] += len(block) - np.searchsorted(block, needed_b[in_full],
+                                                              side="left")
+            in_partial = (full_blocks == i) & (remainder > 0)
+            if in_partial.any():
+                segment = b_by_a[i * block_size:(i + 1) * block_size]
+                acceptable = segment[np.newaxis, :] >= needed_b[in_partial, np.newaxis]
+                in_prefix = np.arange(len(segment))[np.newaxis, :] < \
+                    remainder[in_partial, np.newaxis]
+                both[in_partial] += (acceptable & in_prefix).sum(axis=1)
+        both_count += int(both.sum())
+
+    return a_count, b_count, both_count
+
+
+def _quantize(weighted, resolution):
+    """
+    Rounds the weighted utilities to a grid, returning the grid step, the utility of the
+    origin of the grid, and for every issue value the number of steps from the origin.
+    """
+    lowest = weighted.min(axis=1)
+    step = (weighted.max(axis=1) - lowest).max() / resolution
+    if step == 0:
+        step = 1.0
+    steps = np.rint((weighted - lowest[:, np.newaxis]) / step).astype(np.int64)
 
-    rho_a_absolute = rho_a_percentile * max(utils_a)
-    rho_b_absolute = rho_b_percentile * max(utils_b)
+    return step, lowest.sum(), steps
 
-    a_accepts = utils_a >= rho_a_absolute
-    b_accepts = utils_b >= rho_b_absolute
 
-    both_accept = np.logical_and(a_accepts, b_accepts)
+def _count_acceptable_offers_histogram(weighted_a, weighted_b, rho_a, rho_b, resolution):
+    step_a, origin_a, steps_a = _quantize(weighted_a, resolution)
+    step_b, origin_b, steps_b = _quantize(weighted_b, resolution)
 
-    return a_accepts.sum(), b_accepts.sum(), both_accept.sum()
+    # joint_hist[i, j] is the number of offers that are i steps from A's origin
+    # and j steps from B's origin
+    joint_hist = np.ones((1, 1))
+    for issue_steps_a, issue_steps_b in zip(steps_a, steps_b):
+        rows, cols = joint_hist.shape
+        new_hist = np.zeros((rows + issue_steps_a.max(), cols + issue_steps_b.max()))
+        for value_step_a, value_step_b in zip(issue_steps_a, issue_steps_b):
+            new_hist[value_step_a:value_step_a + rows,
+                     value_step_b:value_step_b + cols] += joint_hist
+        joint_hist = new_hist
+
+    min_steps_a = max(int(np.ceil((rho_a - origin_a) / step_a - 1e-9)), 0)
+    min_steps_b = max(int(np.ceil((rho_b - origin_b) / step_b - 1e-9)), 0)
+
+    return (int(round(joint_hist[min_steps_a:].sum())),
+            int(round(joint_hist[:, min_steps_b:].sum())),
+            int(round(joint_hist[min_steps_a:, min_steps_b:].sum())))
 
 
 def neg_scenario_from_util_matrices(u_a, u_b):
@@ -337,7 +492,71 @@ def neg_scenario_from_util_matrices(u_a, u_b):
 
     return issues, utils_a, utils_b
 
-def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints):
+def make_rng(seed: RandomSeed = None) -> Generator:
+    """
+    Turns a seed into a numpy random Generator. Generators are returned as is so
+    components that are handed the same Generator share one stream.
+    If no seed is given the Generator is seeded from numpy's global random state,
+    so :func:`numpy.random.seed` still makes runs reproducible.
+
+    >>> make_rng(42).integers(0, 100) == make_rng(42).integers(0, 100)
+    True
+
+    :param seed: An integer, SeedSequence, Generator or None.
+    :type seed: RandomSeed
+    :return: A random Generator
+    :rtype: Generator
+    """
+    if seed is None:
+        return default_rng(randint(0, 2**32, dtype=np.uint64))
+
+    return default_rng(seed)
+
+
+def spawn_seeds(seed: RandomSeed, numb: int) -> List[SeedSequence]:
+    """
+    Derives `numb` independent SeedSequences from a seed, using
+    :meth:`numpy.random.SeedSequence.spawn`. Unlike Generators these can be used
+    more than once to replay the same stream, e.g. to rerun a single negotiation.
+    Spawning from the same Generator or SeedSequence twice yields new seeds.
+
+    :param seed: An integer, SeedSequence, Generator or None.
+    :type seed: RandomSeed
+    :param numb: The number of seeds to derive
+    :type numb: int
+    :return: A list of independent SeedSequences
+    :rtype: List[SeedSequence]
+    """
+    if isinstance(seed, Generator):
+        seed_seq = seed.bit_generator._seed_seq  # pylint: disable=protected-access
+    elif isinstance(seed, SeedSequence):
+        seed_seq = seed
+    elif seed is None:
+        seed_seq = SeedSequence(randint(0, 2**32, dtype=np.uint64))
+    else:
+        seed_seq = SeedSequence(seed)
+
+    return seed_seq.spawn(numb)
+
+
+def spawn_rngs(seed: RandomSeed, numb: int) -> List[Generator]:
+    """
+    Derives `numb` statistically independent random Generators from a seed, see
+    :func:`spawn_seeds`. Use this to hand every parallel worker its own stream
+    while still being able to replay each of them from the original seed.
+
+    :param seed: An integer, SeedSequence, Generator or None.
+    :type seed: RandomSeed
+    :param numb: The number of Generators to derive
+    :type numb: int
+    :return: A list of independent Generators
+    :rtype: List[Generator]
+    """
+    return [default_rng(child) for child in spawn_seeds(seed, numb)]
+
+
+def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints,
+                           rng: RandomSeed = None):
     """
     Generates `numb_of_scenarios` utility matrices with uniform random integers as entries.
     Afterwards a number of constraints is injected into the scenarios and they are all saved
@@ -352,16 +571,19 @@ def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints)
     :type numb_of_scenarios: int
     :param numb_constraints: The number of constraints inject into each scenario.
     :type numb_constraints: int
+    :param rng: Seed or random Generator to draw the utilities and directory names from
+    :type rng: RandomSeed
     """
 
     lower = 0
     upper = 100
+    rng = make_rng(rng)
 
-    base_a = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
-    base_b = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
+    base_a = rng.integers(lower, upper, shape[0]*shape[1]).reshape(shape)
+    base_b = rng.integers(lower, upper, shape[0]*shape[1]).reshape(shape)
 
     for _ in range(numb_of_scenarios):
-        uuid = uuid4()
+        uuid = UUID(bytes=rng.bytes(16), version=4)
 
         scenario_dir = path.join(root_dir, str(uuid))
         mkdir(scenario_dir)
@@ -375,7 +597,7 @@ def setup_random_scenarios(root_dir, shape, numb_of_scenarios, numb_constraints)
             np.save(path.join(instance_dir, "b.npy"), constr_b)
 
 
-def generate_random_scenario(shape, numb_constraints):
+def generate_random_scenario(shape, numb_constraints, rng: RandomSeed = None):
     """
     Generates a negotiation space and utility functions with random integers between 0 and 100.
     and returns them as a tuple. Useful for testing.
@@ -384,15 +606,18 @@ def generate_random_scenario(shape, numb_constraints):
     :type shape: Tuple[int,int]
     :param numb_constraints: The number of constraints that should be injected.
     :type numb_constraints: int
+    :param rng: Seed or random Generator to draw the utilities from
+    :type rng: RandomSeed
     :return: A tuple of the negotiation space and utility functions.
     :rtype: Tuple[NegSpace,NestedDict,NestedDict]
     """
 
     lower = 0
     upper = 100
+    rng = make_rng(rng)
 
-    base_a = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
-    base_b = randint(lower, upper, shape[0]*shape[1]).reshape(shape)
+    base_a = rng.integers(lower, upper, shape[0]*shape[1]).reshape(shape)
+    base_b = rng.integers(lower, upper, shape[0]*shape[1]).reshape(shape)
 
     return insert_difficult_constraints(base_a, base_b, numb_constraints)
 
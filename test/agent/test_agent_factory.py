@@ -145,3 +145,16 @@ class TestAgentFactory(TestCase):
         self.assertTrue(constr_a._engine.satisfies_all_constraints(last_message.offer))
         self.assertTrue(constr_b._engine.satisfies_all_constraints(last_message.offer))
 
+    def test_seeded_random_agents_replay_same_negotiation(self):
+        u_a, u_b = generate_random_scenario((4, 4), 1, rng=42)
+        neg_space, utils_a, utils_b = neg_scenario_from_util_matrices(u_a, u_b)
+
+        def negotiate():
+            agent_a = make_constrained_linear_random_agent(
+                "A", neg_space, utils_a, 0.5, self.non_agreement_cost, [], rng=1)
+            agent_b = make_constrained_linear_random_agent(
+                "B", neg_space, utils_b, 0.5, self.non_agreement_cost, [], rng=2)
+            agent_a.negotiate(agent_b)
+            return [str(msg) for msg in agent_a._transcript]
+
+        self.assertEqual(negotiate(), negotiate())
@@ -0,0 +1,141 @@
+# pylint: disable=protected-access
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from numpy import arange
+
+from pyneg.agent import (AsyncAgent, AsyncNegotiationSession, NegotiationSession,
+                         make_linear_concession_agent)
+from pyneg.comms import MessageCodec, QueueTransport, StreamTransport
+from pyneg.types import MessageType
+from pyneg.utils import neg_scenario_from_util_matrices
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncAgent(TestCase):
+
+    def setUp(self):
+        # opposing preferences so it takes a couple of rounds to agree
+        u_a = arange(9).reshape((3, 3))
+        u_b = u_a[:, ::-1].copy()
+        self.neg_space, self.utils_a, self.utils_b = neg_scenario_from_util_matrices(u_a, u_b)
+        self.non_agreement_cost = -1000
+        self.agent_a, self.agent_b = self.make_agents()
+
+    def make_agents(self):
+        return (make_linear_concession_agent(
+                    "A", self.neg_space, self.utils_a, 0.7, self.non_agreement_cost),
+                make_linear_concession_agent(
+                    "B", self.neg_space, self.utils_b, 0.7, self.non_agreement_cost))
+
+    def test_same_transcript_as_synchronous_session(self):
+        sync_session = NegotiationSession(*self.make_agents())
+        sync_session.run()
+
+        session = AsyncNegotiationSession(self.agent_a, self.agent_b)
+        self.assertTrue(run(session.run()))
+        self.assertTrue(self.agent_b.successful)
+        self.assertEqual(session.transcript, sync_session.transcript)
+        self.assertEqual(self.agent_a._transcript, sync_session.transcript)
+        self.assertEqual(self.agent_b._transcript, sync_session.transcript)
+        self.assertEqual(session.rounds, sync_session.rounds)
+
+    def test_negotiates_over_a_socket_pair(self):
+        sync_session = NegotiationSession(*self.make_agents())
+        sync_session.run()
+
+        async def negotiate_over_sockets():
+            transports = await StreamTransport.pair(MessageCodec(self.neg_space))
+            session = AsyncNegotiationSession(self.agent_a, self.agent_b,
+                                              transports=transports)
+            return await session.run()
+
+        self.assertTrue(run(negotiate_over_sockets()))
+        self.assertEqual(self.agent_a._transcript, sync_session.transcript)
+        self.assertEqual(self.agent_b._transcript, sync_session.transcript)
+
+    def test_negotiate(self):
+        self.assertTrue(run(AsyncAgent(self.agent_a).negotiate(self.agent_b)))
+        self.assertEqual(self.agent_a._transcript[-1].type_, MessageType.ACCEPT)
+
+    def test_interleaves_negotiations(self):
+        pairs = [self.make_agents() for _ in range(50)]
+
+        async def negotiate_all():
+            return await asyncio.gather(*(AsyncAgent(agent_a).negotiate(agent_b)
+                                          for agent_a, agent_b in pairs))
+
+        self.assertEqual(run(negotiate_all()), [True] * len(pairs))
+        for agent_a, agent_b in pairs:
+            self.assertEqual(agent_a._transcript, agent_b._transcript)
+
+    def test_runs_turns_in_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            session = AsyncNegotiationSession(AsyncAgent(self.agent_a, executor),
+                                              AsyncAgent(self.agent_b, executor))
+            self.assertTrue(run(session.run()))
+
+    def test_round_cap_ends_negotiation_without_agreement(self):
+        session = AsyncNegotiationSession(self.agent_a, self.agent_b, max_rounds=1)
+        self.assertFalse(run(session.run()))
+        self.assertTrue(session.exceeded_max_rounds)
+        # one complete round, then the exit of the initiator starts the second one
+        self.assertEqual(session.turns, 3)
+        self.assertEqual(session.rounds, 2)
+        self.assertEqual(session.transcript[-1].type_, MessageType.EXIT)
+        self.assertFalse(self.agent_a.negotiation_active)
+        self.assertFalse(self.agent_b.negotiation_active)
+
+    def test_timeout_ends_negotiation_without_agreement(self):
+        session = AsyncNegotiationSession(self.agent_a, self.agent_b, timeout=0)
+        self.assertFalse(run(session.run()))
+        self.assertTrue(session.timed_out)
+        self.assertFalse(self.agent_b.negotiation_active)
+
+    def test_opponent_failing_ends_negotiation(self):
+        def fail(incoming):
+            raise RuntimeError("engine crashed")
+
+        self.agent_b.step = fail
+        session = AsyncNegotiationSession(self.agent_a, self.agent_b)
+        with self.assertRaises(RuntimeError):
+            run(session.run())
+        self.assertFalse(self.agent_a.negotiation_active)
+        self.assertFalse(self.agent_a.successful)
+        self.assertEqual(self.agent_a._transcript[-1].type_, MessageType.EXIT)
+
+    def test_opponent_failing_cancels_waiting_agent(self):
+        def fail(incoming):
+            raise RuntimeError("engine crashed")
+
+        self.agent_b.step = fail
+
+        async def negotiate_without_hangup():
+            # nothing the responder sends reaches the initiator, not even the hangup,
+            # so the initiator would wait forever
+            offers = asyncio.Queue()
+            transports = (QueueTransport(asyncio.Queue(), offers),
+                          QueueTransport(offers, asyncio.Queue()))
+            session = AsyncNegotiationSession(self.agent_a, self.agent_b,
+                                              transports=transports)
+            with self.assertRaises(RuntimeError):
+                await session.run()
+            return [task for task in asyncio.all_tasks()
+                    if task is not asyncio.current_task() and not task.done()]
+
+        self.assertEqual(run(negotiate_without_hangup()), [])
+        self.assertFalse(self.agent_a.negotiation_active)
+        self.assertEqual(self.agent_a._transcript[-1].type_, MessageType.EXIT)
+
+    def test_looks_up_attributes_on_agent(self):
+        agent = AsyncAgent(self.agent_a)
+        self.assertEqual(agent.name, "A")
+        self.assertIs(agent._engine, self.agent_a._engine)
@@ -0,0 +1,80 @@
+# pylint: disable=protected-access
+from unittest import TestCase
+
+from numpy import arange
+
+from pyneg.agent import NegotiationSession, make_linear_concession_agent
+from pyneg.comms import InMemoryTranscript
+from pyneg.types import MessageType
+from pyneg.utils import neg_scenario_from_util_matrices
+
+
+class TestNegotiationSession(TestCase):
+
+    def setUp(self):
+        # opposing preferences so it takes a couple of rounds to agree
+        u_a = arange(9).reshape((3, 3))
+        u_b = u_a[:, ::-1].copy()
+        self.neg_space, self.utils_a, self.utils_b = neg_scenario_from_util_matrices(u_a, u_b)
+        self.non_agreement_cost = -1000
+        self.agent_a = make_linear_concession_agent(
+            "A", self.neg_space, self.utils_a, 0.7, self.non_agreement_cost)
+        self.agent_b = make_linear_concession_agent(
+            "B", self.neg_space, self.utils_b, 0.7, self.non_agreement_cost)
+
+    def test_reaches_agreement(self):
+        session = NegotiationSession(self.agent_a, self.agent_b)
+        self.assertTrue(session.run())
+        self.assertTrue(self.agent_a.successful)
+        self.assertTrue(self.agent_b.successful)
+        self.assertEqual(session.transcript[-1].type_, MessageType.ACCEPT)
+        self.assertFalse(session.timed_out)
+        self.assertFalse(session.exceeded_max_rounds)
+
+    def test_agents_record_same_transcript_as_session(self):
+        transcript = InMemoryTranscript()
+        session = NegotiationSession(self.agent_a, self.agent_b, transcript=transcript)
+        session.run()
+        self.assertIs(session.transcript, transcript)
+        self.assertEqual(transcript, self.agent_a._transcript)
+        self.assertEqual(transcript, self.agent_b._transcript)
+
+    def test_uses_transcript_of_initiator_by_default(self):
+        sink = InMemoryTranscript()
+        self.agent_a.set_transcript_sink(sink)
+        session = NegotiationSession(self.agent_a, self.agent_b)
+        session.run()
+        self.assertIs(session.transcript, sink)
+        self.assertEqual(sink, self.agent_b._transcript)
+
+    def test_same_outcome_as_negotiate(self):
+        session = NegotiationSession(self.agent_a, self.agent_b)
+        session.run()
+        agent_c = make_linear_concession_agent(
+            "A", self.neg_space, self.utils_a, 0.7, self.non_agreement_cost)
+        agent_d = make_linear_concession_agent(
+            "B", self.neg_space, self.utils_b, 0.7, self.non_agreement_cost)
+        self.assertTrue(agent_c.negotiate(agent_d))
+        self.assertEqual(agent_c._transcript, session.transcript)
+
+    def test_round_cap_ends_negotiation_without_agreement(self):
+        session = NegotiationSession(self.agent_a, self.agent_b, max_rounds=1)
+        self.assertFalse(session.run())
+        self.assertTrue(session.exceeded_max_rounds)
+        # one complete round, then the exit of the initiator starts the second one
+        self.assertEqual(session.turns, 3)
+        self.assertEqual(session.rounds, 2)
+        self.assertEqual(session.transcript[-1].type_, MessageType.EXIT)
+        self.assertFalse(self.agent_a.negotiation_active)
+        self.assertFalse(self.agent_b.negotiation_active)
+        self.assertEqual(self.agent_a._transcript, self.agent_b._transcript)
+
+    def test_timeout_ends_negotiation_without_agreement(self):
+        session = NegotiationSession(self.agent_a, self.agent_b, timeout=0)
+        self.assertFalse(session.run())
+        self.assertTrue(session.timed_out)
+        self.assertEqual(session.transcript[-1].type_, MessageType.EXIT)
+        self.assertFalse(self.agent_b.negotiation_active)
+
+    def test_step_returns_none_when_negotiation_is_over(self):
+        self.assertIsNone(self.agent_a.step(None))
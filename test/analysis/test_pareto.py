@@ -0,0 +1,120 @@
+from itertools import product
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.agent import NegotiationSession
+from pyneg.agent.agent_factory import make_linear_concession_agent
+from pyneg.analysis import (pareto_frontier, score_transcript,
+                            transcript_pareto_distances)
+from pyneg.comms import Message
+from pyneg.types import MessageType
+from pyneg.utils import generate_binary_utility_matrices, neg_scenario_from_util_matrices
+
+
+class TestParetoFrontier(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.u_a = rng.integers(-3, 6, (4, 4)).astype(float)
+        self.u_b = rng.integers(-3, 6, (4, 4)).astype(float)
+        self.frontier = pareto_frontier(self.u_a, self.u_b)
+
+        value_indices = np.array(list(product(*[range(4) for _ in range(4)])))
+        self.all_a = self.u_a[np.arange(4), value_indices].sum(axis=1) / 4
+        self.all_b = self.u_b[np.arange(4), value_indices].sum(axis=1) / 4
+
+    def test_frontier_matches_enumeration(self):
+        expected = set()
+        for utility_a, utility_b in zip(self.all_a, self.all_b):
+            dominated = np.any((self.all_a >= utility_a) & (self.all_b >= utility_b)
+                               & ((self.all_a > utility_a) | (self.all_b > utility_b)))
+            if not dominated:
+                expected.add((round(utility_a, 9), round(utility_b, 9)))
+
+        self.assertEqual({(round(point.utility_a, 9), round(point.utility_b, 9))
+                          for point in self.frontier}, expected)
+        self.assertEqual(len(self.frontier), len(expected))
+        self.assertTrue(np.all(np.diff(self.frontier.utilities[:, 0]) > 0))
+
+    def test_points_come_with_their_offers(self):
+        for i, point in enumerate(self.frontier):
+            utilities = self.frontier.offer_utilities(self.frontier.to_offer(i))
+            self.assertAlmostEqual(utilities[0], point.utility_a)
+            self.assertAlmostEqual(utilities[1], point.utility_b)
+
+    def test_nash_point_maximises_product_over_whole_space(self):
+        nash = self.frontier.nash_point()
+        products = np.where((self.all_a >= 0) & (self.all_b >= 0),
+                            self.all_a * self.all_b, -np.inf)
+        self.assertAlmostEqual(nash.utility_a * nash.utility_b, products.max())
+
+    def test_no_bargaining_point_if_disagreement_is_better(self):
+        self.assertIsNone(self.frontier.nash_point((100, 100)))
+        self.assertIsNone(self.frontier.kalai_smorodinsky_point((100, 100)))
+
+    def test_kalai_smorodinsky_point_of_symmetric_scenario(self):
+        u_a, u_b = generate_binary_utility_matrices((6, 6), 3)
+        frontier = pareto_frontier(u_a, u_b)
+        point = frontier.kalai_smorodinsky_point()
+        self.assertAlmostEqual(point.utility_a, point.utility_b)
+        self.assertEqual(point, frontier.nash_point())
+
+    def test_scales_beyond_enumeration(self):
+        rng = np.random.default_rng(1)
+        u_a = rng.random((30, 10))
+        u_b = rng.random((30, 10))
+        frontier = pareto_frontier(u_a, u_b)
+        # the extremes are the best offers for each agent
+        self.assertAlmostEqual(frontier.utilities[-1, 0], u_a.max(axis=1).mean())
+        self.assertAlmostEqual(frontier.utilities[0, 1], u_b.max(axis=1).mean())
+
+        approximate = pareto_frontier(u_a, u_b, epsilon=0.01)
+        self.assertLess(len(approximate), len(frontier))
+        for utility_a, utility_b in frontier.utilities:
+            self.assertLessEqual(approximate.distance(utility_a, utility_b), 0.01 * 30 * 2)
+
+    def test_rejects_mismatched_shapes(self):
+        with self.assertRaises(ValueError):
+            pareto_frontier(self.u_a, self.u_b[:3])
+        with self.assertRaises(ValueError):
+            pareto_frontier(self.u_a, self.u_b, neg_space={"first": ["a", "b"]})
+
+
+class TestTranscriptScores(TestCase):
+
+    def setUp(self):
+        self.u_a, self.u_b = generate_binary_utility_matrices((4, 4), 2)
+        self.neg_space, self.utils_a, self.utils_b = neg_scenario_from_util_matrices(
+            self.u_a, self.u_b)
+        self.frontier = pareto_frontier(self.u_a, self.u_b)
+
+    def test_pareto_optimal_offers_have_distance_0(self):
+        transcript = [Message("A", "B", MessageType.OFFER, self.frontier.to_offer(i))
+                      for i in range(len(self.frontier))]
+        transcript.append(Message("A", "B", MessageType.EXIT, None))
+        distances = transcript_pareto_distances(transcript, self.frontier)
+        self.assertEqual(len(distances), len(self.frontier))
+        self.assertTrue(np.allclose(distances, 0))
+
+    def test_scores_negotiation(self):
+        agent_a = make_linear_concession_agent("A", self.neg_space, self.utils_a, 0.3, -1)
+        agent_b = make_linear_concession_agent("B", self.neg_space, self.utils_b, 0.3, -1)
+        NegotiationSession(agent_a, agent_b).run()
+        score = score_transcript(agent_a._transcript, self.frontier, disagreement=(-1, -1))
+
+        self.assertTrue(score.agreement)
+        agreement = agent_a._transcript[-1].offer
+        self.assertAlmostEqual(score.utility_a, agent_a._engine.calc_offer_utility(agreement))
+        self.assertAlmostEqual(score.utility_b, agent_b._engine.calc_offer_utility(agreement))
+        self.assertGreaterEqual(score.distance_to_pareto, 0)
+        self.assertIsNotNone(score.distance_to_nash)
+        self.assertIsNotNone(score.mean_offer_distance)
+
+    def test_failed_negotiation_scores_disagreement_point(self):
+        transcript = [Message("A", "B", MessageType.EXIT, None)]
+        score = score_transcript(transcript, self.frontier, disagreement=(0, 0))
+        self.assertFalse(score.agreement)
+        self.assertEqual((score.utility_a, score.utility_b), (0, 0))
+        self.assertIsNone(score.mean_offer_distance)
+        self.assertAlmostEqual(score.distance_to_pareto, self.frontier.distance(0, 0))
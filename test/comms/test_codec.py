@@ -0,0 +1,144 @@
+import json
+from unittest import TestCase
+
+from pyneg.comms import (AtomicConstraint, CompactOffer, Message, MessageCodec,
+                         NegSpaceSchema, Offer)
+from pyneg.comms.codec import FORMAT_VERSION, MAX_NAME_SIZE
+from pyneg.types import MessageType
+
+
+class TestMessageCodec(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.1f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.schema = NegSpaceSchema(self.neg_space)
+        self.codec = MessageCodec(self.schema)
+        offer = Offer({
+            "boolean": {"True": 0.0, "False": 1.0},
+            "integer": {str(i): float(i == 3) for i in range(10)},
+            "float": {"{0:.1f}".format(0.1 * i): float(i == 6) for i in range(10)},
+        })
+        self.messages = [
+            Message("A", "B", MessageType.OFFER, offer),
+            Message("B", "Ä", MessageType.OFFER, CompactOffer(self.schema, [0, 9, 0]).to_offer(),
+                    AtomicConstraint("integer", "3")),
+            Message("A", "B", MessageType.ACCEPT, offer),
+            Message("B", "A", MessageType.EXIT, None),
+            Message("A", "B", MessageType.EMPTY, None),
+        ]
+
+    def assert_same_messages(self, decoded, messages):
+        self.assertEqual(decoded, messages)
+        self.assertEqual([(msg.sender_name, msg.recipient_name) for msg in decoded],
+                         [(msg.sender_name, msg.recipient_name) for msg in messages])
+
+    def test_round_trip_binary(self):
+        decoded = [self.codec.decode(self.codec.encode(msg)) for msg in self.messages]
+        self.assert_same_messages(decoded, self.messages)
+
+    def test_round_trip_json(self):
+        decoded = [self.codec.decode(self.codec.encode_json(msg)) for msg in self.messages]
+        self.assert_same_messages(decoded, self.messages)
+        decoded = [self.codec.decode(self.codec.encode_json(msg).encode("utf-8"))
+                   for msg in self.messages]
+        self.assert_same_messages(decoded, self.messages)
+
+    def test_offers_are_encoded_as_indices(self):
+        record = json.loads(self.codec.encode_json(self.messages[1]))
+        self.assertEqual(record["offer"], [0, 9, 0])
+        self.assertEqual(record["constraint"], [1, 3])
+        self.assertEqual(len(self.codec.encode(self.messages[0])),
+                         len(self.codec.encode(self.messages[3])) + len(self.schema))
+
+    def test_decoded_offers_are_complete_and_immutable(self):
+        offer = self.codec.decode(self.codec.encode(self.messages[0])).offer
+        self.assertEqual(offer.values_by_issue, self.messages[0].offer.values_by_issue)
+        self.assertEqual(offer.get_chosen_value("integer"), "3")
+        self.assertEqual(hash(offer), hash(self.messages[0].offer))
+        with self.assertRaises(AttributeError):
+            offer.indent_level = 2
+
+    def test_schema_of_equal_neg_space_is_accepted(self):
+        other = MessageCodec(dict(self.neg_space))
+        self.assertEqual(other.decode(self.codec.encode(self.messages[1])), self.messages[1])
+
+    def test_rejects_other_schema(self):
+        other = MessageCodec({"boolean": [True, False], "integer": list(range(9))})
+        with self.assertRaises(ValueError):
+            other.decode(self.codec.encode(self.messages[0]))
+        with self.assertRaises(ValueError):
+            other.decode(self.codec.encode_json(self.messages[3]))
+
+    def test_rejects_other_version(self):
+        data = bytearray(self.codec.encode(self.messages[0]))
+        data[2] = FORMAT_VERSION + 1
+        with self.assertRaises(ValueError):
+            self.codec.decode(bytes(data))
+
+        record = json.loads(self.codec.encode_json(self.messages[0]))
+        record["version"] = FORMAT_VERSION + 1
+        with self.assertRaises(ValueError):
+            self.codec.decode(json.dumps(record))
+
+    def test_rejects_malformed_data(self):
+        data = self.codec.encode(self.messages[1])
+        for malformed in [data[:-1], data + b"\x00", data[:5], b"garbage"]:
+            with self.assertRaises(ValueError):
+                self.codec.decode(malformed)
+
+        record = json.loads(self.codec.encode_json(self.messages[1]))
+        record["offer"] = [0, 10, 0]
+        with self.assertRaises(ValueError):
+            self.codec.decode(json.dumps(record))
+        record["offer"] = [0, -1, 0]
+        with self.assertRaises(ValueError):
+            self.codec.decode(json.dumps(record))
+
+    def test_rejects_malformed_json(self):
+        record = json.loads(self.codec.encode_json(self.messages[1]))
+        malformed = [
+            {key: value for key, value in record.items() if key != "version"},
+            {key: value for key, value in record.items() if key != "sender"},
+            dict(record, version=True),
+            dict(record, schema=None),
+            dict(record, schema="not hex"),
+            dict(record, type="HAGGLE"),
+            dict(record, type=["OFFER"]),
+            dict(record, recipient=1),
+            dict(record, offer=[1.0, 2.0, 0.0]),
+            dict(record, offer=[True, 2, 0]),
+            dict(record, offer=[0, 2]),
+            dict(record, offer="0, 2, 0"),
+            dict(record, constraint=[1]),
+            dict(record, constraint=[1, 30]),
+            dict(record, constraint=[1, 2.5]),
+        ]
+        for bad_record in malformed:
+            with self.assertRaises(ValueError, msg=bad_record):
+                self.codec.decode(json.dumps(bad_record))
+        for bad_data in ["[]", "{", '"message"']:
+            with self.assertRaises(ValueError, msg=bad_data):
+                self.codec.decode(bad_data)
+
+    def test_messages_fit_in_max_message_size(self):
+        # control characters take the most space once escaped in JSON
+        name = "\x01" * MAX_NAME_SIZE
+        msg = Message(name, name, MessageType.OFFER, self.messages[1].offer,
+                      self.messages[1].constraint)
+        self.assertLessEqual(len(self.codec.encode(msg)), self.codec.max_message_size)
+        self.assertLessEqual(len(self.codec.encode_json(msg).encode("utf-8")),
+                             self.codec.max_message_size)
+
+        with self.assertRaises(ValueError):
+            self.codec.encode(Message(name + "a", "B", MessageType.EXIT, None))
+        with self.assertRaises(ValueError):
+            self.codec.encode_json(Message(name + "a", "B", MessageType.EXIT, None))
+
+    def test_unknown_values_cannot_be_encoded(self):
+        msg = Message("A", "B", MessageType.EXIT, None, AtomicConstraint("integer", "10"))
+        with self.assertRaises(KeyError):
+            self.codec.encode(msg)
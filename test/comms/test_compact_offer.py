@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from pyneg.comms import CompactOffer, NegSpaceSchema, Offer
+
+
+class TestCompactOffer(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.1f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.schema = NegSpaceSchema(self.neg_space)
+
+        self.nested_test_offer = {
+            "boolean": {"True": 1, "False": 0},
+            "integer": {str(i): 0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 0 for i in range(10)}
+        }
+        self.nested_test_offer["integer"]["3"] = 1
+        self.nested_test_offer['float']["0.6"] = 1
+        self.offer = Offer(self.nested_test_offer)
+        self.compact_offer = CompactOffer(self.schema, [0, 3, 6])
+
+    def test_from_nested_dict_equals_direct_construction(self):
+        self.assertEqual(CompactOffer.from_dict(self.schema, self.nested_test_offer),
+                         self.compact_offer)
+
+    def test_from_atomic_dict_equals_direct_construction(self):
+        atomic = {"boolean_True": 1.0, "boolean_False": 0.0,
+                  "integer_3": 1.0, "'float_0.6'": 1.0}
+        self.assertEqual(CompactOffer.from_dict(self.schema, atomic), self.compact_offer)
+
+    def test_from_offer_equals_direct_construction(self):
+        self.assertEqual(CompactOffer.from_offer(self.schema, self.offer), self.compact_offer)
+
+    def test_round_trip_through_offer(self):
+        self.assertEqual(self.compact_offer.to_offer(), self.offer)
+
+    def test_sparse_repr_matches_offer(self):
+        self.assertEqual(self.compact_offer.get_sparse_repr(), self.offer.get_sparse_repr())
+        self.assertEqual(self.compact_offer.get_sparse_str_repr(),
+                         self.offer.get_sparse_str_repr())
+
+    def test_get_chosen_value(self):
+        self.assertEqual(self.compact_offer.get_chosen_value("integer"), "3")
+        self.assertTrue(self.compact_offer.is_assigned("float", "0.6"))
+        self.assertFalse(self.compact_offer.is_assigned("float", "0.5"))
+
+    def test_equal_offers_hash_equally(self):
+        other = CompactOffer(self.schema, [0, 3, 6])
+        self.assertEqual(len({self.compact_offer, other}), 1)
+
+    def test_different_offers_are_unequal(self):
+        self.assertNotEqual(self.compact_offer, CompactOffer(self.schema, [1, 3, 6]))
+
+    def test_out_of_range_index_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CompactOffer(self.schema, [2, 3, 6])
+
+    def test_wrong_number_of_indices_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CompactOffer(self.schema, [0, 3])
+
+    def test_non_binary_offer_is_rejected(self):
+        self.nested_test_offer["boolean"]["True"] = 0.5
+        self.nested_test_offer["boolean"]["False"] = 0.5
+        with self.assertRaises(ValueError):
+            CompactOffer.from_dict(self.schema, self.nested_test_offer)
+
+    def test_indices_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.compact_offer.indices[0] = 1
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.compact_offer, "__dict__"))
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from pyneg.comms import NegSpaceSchema
+
+
+class TestNegSpaceSchema(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.1f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.schema = NegSpaceSchema(self.neg_space)
+
+    def test_issues_are_indexed_in_order(self):
+        self.assertEqual(self.schema.issue_index("boolean"), 0)
+        self.assertEqual(self.schema.issue_index("float"), 2)
+
+    def test_values_are_indexed_as_strings(self):
+        self.assertEqual(self.schema.value_index("boolean", "False"), 1)
+        self.assertEqual(self.schema.value_index("float", "0.3"), 3)
+
+    def test_value_name_is_inverse_of_value_index(self):
+        index = self.schema.value_index("integer", "7")
+        self.assertEqual(self.schema.value_name(1, index), "7")
+
+    def test_unknown_value_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            self.schema.value_index("boolean", "Maybe")
+
+    def test_schemas_of_same_space_are_equal(self):
+        other = NegSpaceSchema(self.neg_space)
+        self.assertEqual(self.schema, other)
+        self.assertEqual(hash(self.schema), hash(other))
+        self.assertEqual(self.schema.fingerprint, other.fingerprint)
+
+    def test_fingerprint_is_stable(self):
+        # hash() of strings differs between processes, the fingerprint may not
+        self.assertEqual(NegSpaceSchema({"First": ["A", "B"]}).fingerprint.hex(),
+                         "8697caca513fa2f0")
+
+    def test_schemas_of_different_order_are_unequal(self):
+        other = NegSpaceSchema({"integer": self.neg_space["integer"],
+                                "boolean": self.neg_space["boolean"],
+                                "float": self.neg_space["float"]})
+        self.assertNotEqual(self.schema, other)
+        self.assertNotEqual(self.schema.fingerprint, other.fingerprint)
+
+    def test_empty_issue_is_rejected(self):
+        with self.assertRaises(ValueError):
+            NegSpaceSchema({"boolean": []})
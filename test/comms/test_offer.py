@@ -1,3 +1,4 @@
+import pickle
 from unittest import TestCase
 
 from pyneg.comms import Offer
@@ -45,3 +46,33 @@ class TestOffer(TestCase):
     def test_repr(self):
         print(Offer(self.nested_test_offer).get_sparse_str_repr())
 
+    def test_setting_attribute_raises(self):
+        offer = Offer(self.nested_test_offer)
+        with self.assertRaises(AttributeError):
+            offer.values_by_issue = {}
+
+    def test_mutating_assignment_raises(self):
+        offer = Offer(self.nested_test_offer)
+        with self.assertRaises(TypeError):
+            offer["boolean"]["True"] = 0.0
+
+    def test_changing_source_dict_does_not_change_offer(self):
+        offer = Offer(self.nested_test_offer)
+        self.nested_test_offer["boolean"]["True"] = 0
+        self.nested_test_offer["boolean"]["False"] = 1
+        self.assertEqual(offer.get_chosen_value("boolean"), "True")
+
+    def test_get_chosen_value(self):
+        offer = Offer(self.nested_test_offer)
+        self.assertEqual(offer.get_chosen_value("integer"), "3")
+        self.assertTrue(offer.is_assigned("float", "0.6"))
+        self.assertFalse(offer.is_assigned("float", "0.5"))
+
+    def test_equal_offers_have_equal_hashes(self):
+        self.assertEqual(hash(Offer(self.nested_test_offer)),
+                         hash(Offer(self.nested_test_offer)))
+        self.assertEqual(Offer(self.nested_test_offer), Offer(self.nested_test_offer))
+
+    def test_pickle_round_trip(self):
+        offer = Offer(self.nested_test_offer)
+        self.assertEqual(pickle.loads(pickle.dumps(offer)), offer)
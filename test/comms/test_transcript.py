@@ -0,0 +1,118 @@
+import io
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyneg.agent import NegotiationSession
+from pyneg.agent.agent_factory import make_linear_concession_agent
+from pyneg.comms import (AtomicConstraint, BinaryTranscriptWriter, CompactOffer,
+                         InMemoryTranscript, JSONLTranscriptWriter, Message,
+                         NegSpaceSchema, read_transcript)
+from pyneg.types import MessageType
+
+
+class TestTranscript(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.1f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.schema = NegSpaceSchema(self.neg_space)
+        offer = CompactOffer(self.schema, [0, 3, 6]).to_offer()
+        other_offer = CompactOffer(self.schema, [1, 9, 0]).to_offer()
+        self.messages = [
+            Message("A", "B", MessageType.OFFER, offer),
+            Message("B", "A", MessageType.OFFER, other_offer,
+                    AtomicConstraint("integer", "3")),
+            Message("A", "B", MessageType.ACCEPT, other_offer),
+            Message("B", "A", MessageType.EXIT, None),
+            Message("A", "B", MessageType.EMPTY, None),
+        ]
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def assert_same_messages(self, read, expected):
+        self.assertEqual(read, expected)
+        for read_msg, msg in zip(read, expected):
+            self.assertEqual(read_msg.sender_name, msg.sender_name)
+            self.assertEqual(read_msg.recipient_name, msg.recipient_name)
+
+    def test_in_memory_transcript_behaves_like_list(self):
+        transcript = InMemoryTranscript()
+        for msg in self.messages:
+            transcript.record(msg)
+        self.assertEqual(transcript, self.messages)
+        self.assertEqual(transcript[-1], self.messages[-1])
+
+    def test_jsonl_round_trip(self):
+        with JSONLTranscriptWriter(self.path("t.jsonl"), self.schema) as writer:
+            for msg in self.messages:
+                writer.record(msg)
+        self.assert_same_messages(list(read_transcript(self.path("t.jsonl"))), self.messages)
+
+    def test_binary_round_trip(self):
+        with BinaryTranscriptWriter(self.path("t.bin"), self.neg_space) as writer:
+            for msg in self.messages:
+                writer.record(msg)
+        self.assert_same_messages(list(read_transcript(self.path("t.bin"))), self.messages)
+
+    def test_binary_is_smaller_than_jsonl(self):
+        with JSONLTranscriptWriter(self.path("t.jsonl"), self.schema) as jsonl, \
+                BinaryTranscriptWriter(self.path("t.bin"), self.schema) as binary:
+            for _ in range(100):
+                for msg in self.messages:
+                    jsonl.record(msg)
+                    binary.record(msg)
+        self.assertLess(os.path.getsize(self.path("t.bin")),
+                        os.path.getsize(self.path("t.jsonl")) / 4)
+
+    def test_writes_are_buffered(self):
+        target = io.BytesIO()
+        writer = BinaryTranscriptWriter(target, self.schema, buffer_size=3)
+        header_size = len(target.getvalue())
+        writer.record(self.messages[0])
+        writer.record(self.messages[1])
+        self.assertEqual(len(target.getvalue()), header_size)
+        writer.record(self.messages[2])
+        self.assertGreater(len(target.getvalue()), header_size)
+        writer.close()
+        # files that were passed in are left open
+        self.assertFalse(target.closed)
+
+    def test_reader_is_lazy(self):
+        with JSONLTranscriptWriter(self.path("t.jsonl"), self.schema) as writer:
+            for msg in self.messages:
+                writer.record(msg)
+        reader = read_transcript(self.path("t.jsonl"))
+        self.assertEqual(next(reader), self.messages[0])
+        reader.close()
+
+    def test_rejects_offers_outside_schema(self):
+        other_schema = NegSpaceSchema({"boolean": ["True", "False"]})
+        with JSONLTranscriptWriter(io.StringIO(), other_schema) as writer:
+            with self.assertRaises(ValueError):
+                writer.record(self.messages[0])
+
+    def test_rejects_files_that_are_not_transcripts(self):
+        with open(self.path("t.jsonl"), "w") as file:
+            file.write('{"some": "json"}\n')
+        with self.assertRaises(ValueError):
+            list(read_transcript(self.path("t.jsonl")))
+
+    def test_session_streams_to_sink(self):
+        neg_space = {"first": ["a", "b", "c"], "second": ["d", "e", "f"]}
+        utilities_a = {"first_a": 10.0, "first_b": 5.0, "second_d": 10.0, "second_e": 5.0}
+        utilities_b = {"first_c": 10.0, "first_b": 5.0, "second_f": 10.0, "second_e": 5.0}
+        agent_a = make_linear_concession_agent("A", neg_space, utilities_a, 0.5, -1000)
+        agent_b = make_linear_concession_agent("B", neg_space, utilities_b, 0.5, -1000)
+        with BinaryTranscriptWriter(self.path("t.bin"), neg_space) as writer:
+            session = NegotiationSession(agent_a, agent_b, transcript=writer)
+            session.run()
+        self.assertEqual(list(read_transcript(self.path("t.bin"))), agent_a._transcript)
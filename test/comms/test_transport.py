@@ -0,0 +1,147 @@
+import asyncio
+import struct
+from unittest import TestCase
+
+from pyneg.comms import (AtomicConstraint, CompactOffer, Message, MessageCodec, QueueTransport,
+                         StreamTransport)
+from pyneg.types import MessageType
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestQueueTransport(TestCase):
+
+    def setUp(self):
+        self.msg = Message("A", "B", MessageType.EXIT, None)
+
+    def test_delivers_messages_in_order(self):
+        async def exchange():
+            left, right = QueueTransport.pair()
+            other = Message("B", "A", MessageType.EXIT, None)
+            await left.send(self.msg)
+            await left.send(other)
+            await right.send(other)
+            return [await right.receive(), await right.receive(), await left.receive()]
+
+        self.assertEqual(run(exchange()), [self.msg, Message("B", "A", MessageType.EXIT, None),
+                                           Message("B", "A", MessageType.EXIT, None)])
+
+    def test_close_ends_stream(self):
+        async def close_early():
+            left, right = QueueTransport.pair()
+            await left.send(self.msg)
+            await left.close()
+            await left.close()
+            received = [await right.receive(), await right.receive(), await right.receive()]
+            with self.assertRaises(RuntimeError):
+                await left.send(self.msg)
+            return received
+
+        self.assertEqual(run(close_early()), [self.msg, None, None])
+
+    def test_receive_waits_for_message(self):
+        async def wait():
+            left, right = QueueTransport.pair()
+            receiving = asyncio.ensure_future(right.receive())
+            await asyncio.sleep(0)
+            self.assertFalse(receiving.done())
+            await left.send(self.msg)
+            return await receiving
+
+        self.assertEqual(run(wait()), self.msg)
+
+
+class TestStreamTransport(TestCase):
+
+    def setUp(self):
+        self.codec = MessageCodec({"First": ["A", "B"], "Second": ["C", "D", "E"]})
+        offer = CompactOffer(self.codec.schema, [1, 2]).to_offer()
+        self.messages = [Message("A", "B", MessageType.OFFER, offer),
+                         Message("B", "A", MessageType.OFFER, offer,
+                                 AtomicConstraint("First", "A")),
+                         Message("A", "B", MessageType.ACCEPT, offer)]
+
+    def test_delivers_messages_in_order(self):
+        async def exchange(binary):
+            left, right = await StreamTransport.pair(self.codec, binary)
+            for msg in self.messages:
+                await left.send(msg)
+            received = [await right.receive() for _ in self.messages]
+            await left.close()
+            await right.close()
+            return received
+
+        self.assertEqual(run(exchange(True)), self.messages)
+        self.assertEqual(run(exchange(False)), self.messages)
+
+    def test_ends_may_use_different_formats(self):
+        async def exchange():
+            binary_end, json_end = await StreamTransport.pair(self.codec)
+            json_end.binary = False
+            await binary_end.send(self.messages[0])
+            await json_end.send(self.messages[1])
+            received = [await json_end.receive(), await binary_end.receive()]
+            await binary_end.close()
+            await json_end.close()
+            return received
+
+        self.assertEqual(run(exchange()), self.messages[:2])
+
+    def test_close_ends_stream(self):
+        async def close_early():
+            left, right = await StreamTransport.pair(self.codec)
+            await left.send(self.messages[0])
+            await left.close()
+            await left.close()
+            received = [await right.receive(), await right.receive(), await right.receive()]
+            with self.assertRaises(RuntimeError):
+                await left.send(self.messages[0])
+            # sending to a closed end is not an error
+            await right.send(self.messages[1])
+            await right.close()
+            return received
+
+        self.assertEqual(run(close_early()), [self.messages[0], None, None])
+
+    def test_rejects_oversized_frames(self):
+        async def send_oversized_frame():
+            left, right = await StreamTransport.pair(self.codec)
+            left.writer.write(struct.pack("<I", self.codec.max_message_size + 1))
+            await left.writer.drain()
+            try:
+                with self.assertRaises(ValueError):
+                    await right.receive()
+            finally:
+                await left.close()
+                await right.close()
+
+        run(send_oversized_frame())
+
+    def test_connects_over_tcp(self):
+        async def serve_and_connect():
+            received = []
+
+            async def handle(reader, writer):
+                server_end = StreamTransport(reader, writer, self.codec)
+                received.append(await server_end.receive())
+                await server_end.send(self.messages[1])
+                await server_end.close()
+
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            client_end = await StreamTransport.connect("127.0.0.1", port, self.codec)
+            await client_end.send(self.messages[0])
+            received.append(await client_end.receive())
+            received.append(await client_end.receive())
+            await client_end.close()
+            server.close()
+            await server.wait_closed()
+            return received
+
+        self.assertEqual(run(serve_and_connect()), [self.messages[0], self.messages[1], None])
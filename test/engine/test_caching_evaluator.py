@@ -0,0 +1,157 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, CompactOffer, NegSpaceSchema, Offer
+from pyneg.engine import (CachingEvaluator, ConstrainedLinearEvaluator,
+                          Evaluator, LinearEvaluator, ProblogEvaluator, RandomGenerator)
+
+
+class CountingEvaluator(Evaluator):
+    def __init__(self, evaluator):
+        super().__init__()
+        self.inner = evaluator
+        self.calls = 0
+
+    def calc_offer_utility(self, offer):
+        self.calls += 1
+        return self.inner.calc_offer_utility(offer)
+
+    def add_utilities(self, new_utils):
+        return self.inner.add_utilities(new_utils)
+
+    def set_utilities(self, new_utils):
+        return self.inner.set_utilities(new_utils)
+
+    def add_constraint(self, constraint):
+        return self.inner.add_constraint(constraint)
+
+    def add_constraints(self, new_constraints):
+        return self.inner.add_constraints(new_constraints)
+
+
+class TestCachingEvaluator(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": [True, False],
+            "integer": list(range(10)),
+            "float": [float("{0:.2f}".format(0.1 * i)) for i in range(10)]
+        }
+        self.utilities = {
+            "boolean_True": 100,
+            "boolean_False": 10,
+            "integer_9": 100,
+            "integer_3": 10,
+            "integer_1": 0.1,
+            "integer_4": -10,
+            "integer_5": -100,
+            "'float_0.1'": 1
+        }
+        self.non_agreement_cost = -1000
+        self.schema = NegSpaceSchema(self.neg_space)
+
+        self.nested_test_offer = {
+            "boolean": {"True": 1, "False": 0},
+            "integer": {str(i): 0 for i in range(10)},
+            "float": {"{0:.1f}".format(i * 0.1): 0 for i in range(10)}
+        }
+        self.nested_test_offer["integer"]["2"] = 1
+        self.nested_test_offer['float']["0.6"] = 1
+        self.nested_test_offer = Offer(self.nested_test_offer)
+
+        self.uniform_weights = {
+            issue: 1 / len(self.neg_space.keys()) for issue in self.neg_space.keys()}
+        self.inner = CountingEvaluator(ConstrainedLinearEvaluator(
+            self.utilities,
+            self.uniform_weights,
+            self.non_agreement_cost,
+            -1000, set([])))
+        self.evaluator = CachingEvaluator(self.inner, maxsize=4)
+
+    def test_repeated_evaluations_hit_cache(self):
+        first = self.evaluator.calc_offer_utility(self.nested_test_offer)
+        second = self.evaluator.calc_offer_utility(self.nested_test_offer)
+        self.assertAlmostEqual(first, 100 / 3)
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.calls, 1)
+        info = self.evaluator.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_compact_and_full_offers_share_entries(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        compact = CompactOffer.from_offer(self.schema, self.nested_test_offer)
+        self.evaluator.calc_offer_utility(compact)
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_evicts_least_recently_used(self):
+        offers = [CompactOffer(self.schema, [0, i, 0]).to_offer() for i in range(5)]
+        for offer in offers[:4]:
+            self.evaluator.calc_offer_utility(offer)
+        # touch the oldest entry so the second one gets evicted instead
+        self.evaluator.calc_offer_utility(offers[0])
+        self.evaluator.calc_offer_utility(offers[4])
+        self.assertEqual(self.evaluator.cache_info().currsize, 4)
+
+        self.evaluator.calc_offer_utility(offers[0])
+        self.assertEqual(self.inner.calls, 5)
+        self.evaluator.calc_offer_utility(offers[1])
+        self.assertEqual(self.inner.calls, 6)
+
+    def test_changing_utilities_invalidates(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        self.evaluator.add_utilities({"integer_2": 30})
+        self.assertEqual(self.evaluator.version, 1)
+        self.assertAlmostEqual(
+            self.evaluator.calc_offer_utility(self.nested_test_offer), 130 / 3)
+
+        self.evaluator.set_utilities({"boolean_True": 3})
+        self.assertEqual(self.evaluator.version, 2)
+        self.assertAlmostEqual(
+            self.evaluator.calc_offer_utility(self.nested_test_offer), 1)
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_adding_constraints_invalidates(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        self.evaluator.add_constraint(AtomicConstraint("integer", "2"))
+        self.assertEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), -1000)
+        self.evaluator.add_constraints({AtomicConstraint("boolean", "False")})
+        self.assertEqual(self.evaluator.version, 2)
+        self.assertEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), -1000)
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_batches_only_evaluate_missing_offers(self):
+        self.evaluator.calc_offer_utility(CompactOffer(self.schema, [0, 1, 0]).to_offer())
+        indices = np.array([[0, 1, 0], [0, 9, 1], [1, 3, 1]])
+        utils = self.evaluator.calc_offer_utilities(indices, self.schema)
+        self.assertEqual(self.inner.calls, 3)
+        expected = [self.inner.inner.calc_offer_utility(
+            CompactOffer(self.schema, row).to_offer()) for row in indices]
+        self.assertTrue(np.allclose(utils, expected))
+        self.assertEqual(self.evaluator.cache_info().hits, 1)
+
+    def test_delegates_other_attributes(self):
+        self.assertIs(self.evaluator.inner, self.inner.inner)
+        evaluator = CachingEvaluator(ConstrainedLinearEvaluator(
+            self.utilities, self.uniform_weights, self.non_agreement_cost, -1000, set([])))
+        self.assertEqual(evaluator.utilities, self.utilities)
+
+    def test_wraps_problog_evaluator(self):
+        evaluator = CachingEvaluator(ProblogEvaluator(
+            self.neg_space, self.utilities, self.non_agreement_cost, []))
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.nested_test_offer), 100)
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.nested_test_offer), 100)
+        self.assertEqual(evaluator.cache_info().hits, 1)
+
+    def test_forwards_batch_support(self):
+        self.assertFalse(self.evaluator.supports_batch)
+        self.assertTrue(CachingEvaluator(LinearEvaluator(
+            self.utilities, self.uniform_weights, self.non_agreement_cost)).supports_batch)
+
+    def test_random_generator_stops_at_first_acceptable_candidate(self):
+        evaluator = CachingEvaluator(self.inner)
+        generator = RandomGenerator(self.neg_space, self.utilities, evaluator,
+                                    self.non_agreement_cost, [], -1000, 20, rng=0)
+        for _ in range(10):
+            generator.generate_offer()
+        self.assertLessEqual(self.inner.calls, 10)
@@ -186,4 +186,15 @@ class TestConstrainedDTPGenerator(TestCase):
         self.generator = ConstrainedDTPGenerator(temp_issues, temp_utils,
                                                  self.non_agreement_cost, self.reservation_value,
                                                  self.kb, self.constr_value, set())
-        self.assertEqual(len(self.generator.constraints), 1)
\ No newline at end of file
+        self.assertEqual(len(self.generator.constraints), 1)
+
+    def test_reset_forgets_constraints(self):
+        utilities = {"a_x": 10, "a_y": 5}
+        generator = ConstrainedDTPGenerator({"a": ["x", "y"]}, utilities, -1000, 0, [],
+                                            -1000, set(), auto_constraints=False)
+        generator.add_constraint(AtomicConstraint("a", "x"))
+        self.assertEqual(generator.generate_offer().get_chosen_value("a"), "y")
+
+        generator.reset_generator()
+        self.assertEqual(generator.knowledge.utilities, utilities)
+        self.assertEqual(generator.generate_offer().get_chosen_value("a"), "x")
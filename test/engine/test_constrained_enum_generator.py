@@ -257,4 +257,40 @@ class TestConstrainedEnumGenerator(TestCase):
             self.constr_value,
             {AtomicConstraint("issue0", "2")})
 
-        self.generator.generate_offer()
\ No newline at end of file
+        self.generator.generate_offer()
+
+    def test_does_not_repropose_offers_after_new_constraint(self):
+        proposed = [self.generator.generate_offer() for _ in range(3)]
+        self.generator.add_constraint(AtomicConstraint("issue1", "1"))
+
+        offer_list = []
+        while True:
+            try:
+                offer_list.append(self.generator.generate_offer())
+            except StopIteration:
+                break
+
+        self.assertTrue(all(offer not in proposed for offer in offer_list))
+        self.assertEqual(len(offer_list), len(set(offer_list)))
+        self.assertTrue(all(self.generator.satisfies_all_constraints(offer) for offer in offer_list))
+
+    def test_new_constraint_leaves_same_offers_as_starting_over(self):
+        proposed = [self.generator.generate_offer() for _ in range(3)]
+        new_constraint = AtomicConstraint("issue1", "1")
+        self.generator.add_constraint(new_constraint)
+
+        fresh_generator = ConstrainedEnumGenerator(
+            self.neg_space, self.utilities, deepcopy(self.evaluator),
+            self.arbitrary_reservation_value, self.constr_value,
+            {self.difficult_constraint, new_constraint})
+
+        def drain(generator):
+            offer_list = []
+            while True:
+                try:
+                    offer_list.append(generator.generate_offer())
+                except StopIteration:
+                    return offer_list
+
+        expected = [offer for offer in drain(fresh_generator) if offer not in proposed]
+        self.assertEqual(set(drain(self.generator)), set(expected))
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from pyneg.comms import Offer, AtomicConstraint
+from pyneg.comms import Offer, AtomicConstraint, NegSpaceSchema
 from pyneg.engine import ConstrainedLinearEvaluator, Strategy
 
 
@@ -111,3 +111,19 @@ class TestConstrainedLinearEvaluator(TestCase):
         self.evaluator.add_constraint(self.boolean_constraint)
         self.assertEqual(self.evaluator.calc_offer_utility(
             self.violating_offer), self.constr_value)
+
+    def test_calc_offer_utilities_applies_constraints(self):
+        schema = NegSpaceSchema(self.neg_space)
+        self.evaluator.add_constraint(self.integer_constraint)
+        utils = self.evaluator.calc_offer_utilities(
+            [self.violating_offer, self.optimal_offer], schema)
+        self.assertEqual(utils[0], self.constr_value)
+        self.assertAlmostEqual(utils[1], self.evaluator.calc_offer_utility(self.optimal_offer))
+
+    def test_constraint_mask_is_updated_with_constraints(self):
+        schema = NegSpaceSchema(self.neg_space)
+        self.assertNotEqual(self.evaluator.calc_offer_utilities(
+            [self.optimal_offer], schema)[0], self.constr_value)
+        self.evaluator.add_constraints({self.boolean_constraint})
+        self.assertEqual(self.evaluator.calc_offer_utilities(
+            [self.optimal_offer], schema)[0], self.constr_value)
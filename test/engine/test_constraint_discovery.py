@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint
+from pyneg.engine import ConstraintDiscovery, KnowledgeBase
+from pyneg.utils import atom_from_issue_value
+
+
+def discover_by_brute_force(neg_space, utilities, threshold):
+    bounds = {issue: max(utilities.get(atom_from_issue_value(issue, value), 0)
+                         for value in values)
+              for issue, values in neg_space.items()}
+    constraints = set()
+    for issue, values in neg_space.items():
+        best_case = sum(bound for other, bound in bounds.items() if other != issue)
+        for value in values:
+            if best_case + utilities.get(atom_from_issue_value(issue, value), 0) < threshold:
+                constraints.add(AtomicConstraint(issue, value))
+    return constraints
+
+
+class TestConstraintDiscovery(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": [str(i) for i in range(5)],
+        }
+        self.utilities = {"boolean_True": 10, "boolean_False": -10,
+                          "integer_3": 5, "integer_4": -20}
+        self.knowledge = KnowledgeBase(self.utilities)
+        self.discovery = ConstraintDiscovery(self.neg_space, self.knowledge)
+
+    def test_discovers_constraints(self):
+        self.assertEqual(self.discovery.discover(5), {AtomicConstraint("boolean", "False"),
+                                                      AtomicConstraint("integer", "4")})
+        self.assertEqual(self.discovery.best_case, 15)
+
+    def test_returns_only_new_constraints(self):
+        self.knowledge.add_constraints({AtomicConstraint("integer", "4")})
+        self.assertEqual(self.discovery.discover(5), {AtomicConstraint("boolean", "False")})
+
+        self.knowledge.add_constraints({AtomicConstraint("boolean", "False")})
+        self.assertEqual(self.discovery.discover(5), set())
+
+    def test_follows_updates_of_the_knowledge_base(self):
+        self.discovery.discover(5)
+        self.knowledge.add_utilities({"integer_3": 0})
+        self.assertEqual(self.discovery.discover(5),
+                         discover_by_brute_force(self.neg_space, self.knowledge.utilities, 5))
+        self.assertEqual(self.discovery.bounds["integer"], 0)
+        self.assertEqual(self.discovery.best_case, 10)
+
+        self.knowledge.set_utilities({"integer_1": 3})
+        self.assertEqual(self.discovery.discover(2), {AtomicConstraint("integer", str(i))
+                                                      for i in [0, 2, 3, 4]})
+        self.assertEqual(self.discovery.best_case, 3)
+
+    def test_agrees_with_brute_force(self):
+        rng = np.random.default_rng(0)
+        neg_space = {f"issue{i}": [str(j) for j in range(6)] for i in range(8)}
+        knowledge = KnowledgeBase()
+        discovery = ConstraintDiscovery(neg_space, knowledge)
+        for _ in range(20):
+            issue = f"issue{rng.integers(8)}"
+            knowledge.add_utilities({atom_from_issue_value(issue, str(value)): float(util)
+                                     for value, util in enumerate(rng.normal(size=6))})
+            threshold = float(rng.uniform(0, 3))
+            expected = discover_by_brute_force(neg_space, knowledge.utilities, threshold)
+            discovered = discovery.discover(threshold)
+            if discovery.best_case < threshold:
+                # nothing is acceptable, see test_only_rules_out_worst_issue_if_nothing_is_acceptable
+                continue
+            self.assertEqual(discovered, expected - set(knowledge.constraints))
+            knowledge.add_constraints(discovered)
+
+    def test_tight_bounds_skip_forbidden_values(self):
+        tight = ConstraintDiscovery(self.neg_space, self.knowledge, tight_bounds=True)
+        self.knowledge.add_constraints({AtomicConstraint("boolean", "True")})
+
+        self.assertEqual(self.discovery.discover(-12), set())
+        self.assertEqual(tight.discover(-12), {AtomicConstraint("integer", "4")})
+        self.assertEqual(tight.bounds["boolean"], -10)
+
+    def test_tight_bounds_stop_when_unsatisfiable(self):
+        tight = ConstraintDiscovery(self.neg_space, self.knowledge, tight_bounds=True)
+        self.knowledge.add_constraints({AtomicConstraint("boolean", "True"),
+                                        AtomicConstraint("boolean", "False")})
+        self.assertEqual(tight.discover(-100), set())
+
+        self.knowledge.clear_constraints()
+        self.assertEqual(tight.discover(-100), set())
+        self.assertEqual(tight.bounds["boolean"], 10)
+
+    def test_only_rules_out_worst_issue_if_nothing_is_acceptable(self):
+        self.knowledge.add_utilities({"boolean_True": -1000, "boolean_False": -1000})
+        self.assertEqual(self.discovery.discover(0), {AtomicConstraint("boolean", "True"),
+                                                      AtomicConstraint("boolean", "False")})
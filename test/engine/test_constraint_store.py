@@ -0,0 +1,119 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyneg.comms import AtomicConstraint, NegSpaceSchema, Offer
+from pyneg.engine import (ConstrainedEnumGenerator, ConstrainedLinearEvaluator,
+                          ConstraintStore, Strategy)
+
+
+class TestConstraintStore(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": [str(i) for i in range(5)],
+        }
+        self.store = ConstraintStore(self.neg_space)
+        self.offer = Offer({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): float(i == 3) for i in range(5)},
+        })
+
+    def test_behaves_like_a_set(self):
+        self.assertTrue(self.store.add(AtomicConstraint("integer", "3")))
+        self.assertFalse(self.store.add(AtomicConstraint("integer", "3")))
+        new = self.store.update({AtomicConstraint("integer", "3"),
+                                 AtomicConstraint("boolean", "True")})
+
+        self.assertEqual(new, {AtomicConstraint("boolean", "True")})
+        self.assertEqual(self.store, {AtomicConstraint("integer", "3"),
+                                      AtomicConstraint("boolean", "True")})
+        self.assertEqual(len(self.store), 2)
+        self.assertIn(AtomicConstraint("boolean", "True"), self.store)
+
+    def test_version_changes_only_with_constraints(self):
+        version = self.store.version
+        self.store.add(AtomicConstraint("integer", "3"))
+        self.assertEqual(self.store.version, version + 1)
+        self.store.add(AtomicConstraint("integer", "3"))
+        self.assertEqual(self.store.version, version + 1)
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.version, version + 2)
+
+    def test_assignment_checks(self):
+        self.store.add(AtomicConstraint("integer", "3"))
+
+        self.assertFalse(self.store.is_allowed("integer", "3"))
+        self.assertTrue(self.store.is_allowed("integer", "4"))
+        self.assertTrue(self.store.is_allowed("boolean", "True"))
+        self.assertTrue(self.store.is_allowed("unknown", "3"))
+
+    def test_offer_checks(self):
+        self.assertTrue(self.store.satisfied_by(self.offer))
+        self.assertIsNone(self.store.find_violation(self.offer))
+
+        self.store.add(AtomicConstraint("integer", "3"))
+
+        self.assertFalse(self.store.satisfied_by(self.offer))
+        self.assertEqual(self.store.find_violation(self.offer),
+                         AtomicConstraint("integer", "3"))
+
+    def test_strategy_checks(self):
+        strat = Strategy({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): 0.25 * (i != 3) for i in range(5)},
+        })
+        self.store.add(AtomicConstraint("integer", "3"))
+        self.assertTrue(self.store.satisfied_by(strat))
+
+        self.store.add(AtomicConstraint("boolean", "True"))
+        self.assertFalse(self.store.satisfied_by(strat))
+
+    def test_rejects_unknown_types(self):
+        with self.assertRaises(TypeError):
+            self.store.satisfied_by("integer_3")
+
+    def test_unconstrained_values_and_satisfiability(self):
+        self.store.update({AtomicConstraint("integer", "1"), AtomicConstraint("integer", "3")})
+        self.assertEqual(self.store.unconstrained_values("integer"), ["0", "2", "4"])
+        self.assertEqual(self.store.forbidden_values("integer"), ["1", "3"])
+        self.assertEqual(self.store.constrained_issues(), ["integer"])
+        self.assertTrue(self.store.satisfiable())
+
+        self.store.update({AtomicConstraint("boolean", "True"),
+                           AtomicConstraint("boolean", "False")})
+        self.assertEqual(self.store.unconstrained_values("boolean"), [])
+        self.assertFalse(self.store.satisfiable())
+
+    def test_values_outside_of_neg_space_are_not_unconstrained(self):
+        self.store.add(AtomicConstraint("integer", "7"))
+        self.store.register_neg_space({"integer": ["7", "8"]})
+        self.assertEqual(self.store.unconstrained_values("integer"),
+                         ["0", "1", "2", "3", "4", "8"])
+
+    def test_mask(self):
+        schema = NegSpaceSchema(self.neg_space)
+        self.store.update({AtomicConstraint("integer", "3"), AtomicConstraint("float", "0.1")})
+        mask = self.store.mask(schema)
+
+        expected = np.zeros((2, 5), dtype=bool)
+        expected[1, 3] = True
+        self.assertTrue(np.array_equal(mask, expected))
+        self.assertIs(self.store.mask(schema), mask)
+
+        self.store.add(AtomicConstraint("boolean", "False"))
+        self.assertTrue(self.store.mask(schema)[0, 1])
+
+    def test_generator_shares_store_of_evaluator(self):
+        utilities = {"boolean_True": 10, "integer_3": 5}
+        evaluator = ConstrainedLinearEvaluator(
+            utilities, {"boolean": 1, "integer": 1}, -1000, -100, set())
+        generator = ConstrainedEnumGenerator(self.neg_space, utilities, evaluator,
+                                             0, -100, set(), auto_constraints=False)
+
+        self.assertIs(generator.constraints, evaluator.constraints)
+        generator.add_constraint(AtomicConstraint("integer", "3"))
+        self.assertIn(AtomicConstraint("integer", "3"), evaluator.constraints)
+        self.assertEqual(evaluator.calc_offer_utility(self.offer), -100)
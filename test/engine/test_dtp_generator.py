@@ -1,3 +1,13 @@
+from itertools import product
+from unittest import TestCase
+
+from problog import get_evaluatable
+from problog.program import PrologString
+
+from pyneg.comms import Offer
+from pyneg.engine import DTPGenerator, ProblogEvaluator
+
+
 # from unittest import TestCase
 #
 # from pyneg.comms import Offer
@@ -178,4 +188,135 @@
 #     #         util_list.append(util)
 #     #
 #     #     self.assertTrue(all(util_list[i] >= util_list[i + 1]
-#     #                         for i in range(len(util_list) - 1)), util_list)
\ No newline at end of file
+#     #                         for i in range(len(util_list) - 1)), util_list)
+
+
+class TestDTPGeneratorSession(TestCase):
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.neg_space = {
+            "umbrella": ["True", "False"],
+            "raincoat": ["True", "False"],
+            "colour": ["red", "blue", "green"]
+        }
+        self.utilities = {
+            "broken_umbrella": -40,
+            "raincoat_True": -20,
+            "umbrella_True": -2,
+            "dry": 60
+        }
+        self.kb = [
+            "broken_umbrella:- umbrella_True, rain, wind.",
+            "dry:- rain, raincoat_True.",
+            "dry:- rain, umbrella_True, not broken_umbrella.",
+            "dry:- not(rain).",
+            "0.3::rain.",
+            "0.5::wind."
+        ]
+        self.non_agreement_cost = -1000
+        self.generator = DTPGenerator(self.neg_space, self.utilities,
+                                      self.non_agreement_cost, -1000, self.kb)
+        self.evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                          self.non_agreement_cost, self.kb)
+
+    def all_offers(self):
+        return [Offer({issue: {value: float(value == chosen) for value in values}
+                       for (issue, values), chosen in zip(self.neg_space.items(), choice)})
+                for choice in product(*self.neg_space.values())]
+
+    def test_generates_every_offer_in_descending_order_of_utility(self):
+        expected = sorted((self.evaluator.calc_offer_utility(offer)
+                           for offer in self.all_offers()), reverse=True)
+        offers = [self.generator.generate_offer() for _ in range(len(expected))]
+        self.assertEqual(len(set(offers)), len(expected))
+        for offer, util in zip(offers, expected):
+            self.assertAlmostEqual(self.evaluator.calc_offer_utility(offer), util)
+
+        with self.assertRaises(StopIteration):
+            self.generator.generate_offer()
+        self.assertFalse(self.generator.active)
+
+    def test_aliased_decision_facts_are_ranked_by_their_utility(self):
+        self.neg_space = {"a": ["x", "y", "z"], "b": ["1", "2"], "c": ["p", "q"]}
+        utilities = {"bad": -5, "good": 7, "b_1": 1}
+        kb = ["bad :- b_2.", "0.7::lucky.", "good :- lucky, a_y.", "good :- c_q, \\+ a_x."]
+        evaluator = ProblogEvaluator(self.neg_space, utilities, self.non_agreement_cost, kb)
+
+        def utility(offer):
+            # compile every offer separately, so we don't rely on the compiled model
+            model = evaluator.compile_problog_model(offer)
+            return sum(prob * utilities[str(atom)] for atom, prob in
+                       get_evaluatable("sdd").create_from(PrologString(model)).evaluate().items())
+
+        expected = sorted((utility(offer) for offer in self.all_offers()), reverse=True)
+        for top_k in [1, 5]:
+            generator = DTPGenerator(self.neg_space, utilities, self.non_agreement_cost,
+                                     -1000, kb, top_k=top_k)
+            for util in expected:
+                offer = generator.generate_offer()
+                self.assertAlmostEqual(utility(offer), util)
+                self.assertAlmostEqual(evaluator.calc_offer_utility(offer), util)
+
+    def test_irrelevant_issues_are_not_compiled_separately(self):
+        self.generator.generate_offer()
+        # 2 umbrella x 2 raincoat, the colour never matters
+        self.assertEqual(len(self.generator._offer_classes), 4)
+
+    def test_keeps_session_between_offers(self):
+        self.generator.generate_offer()
+        session = self.generator._session
+        probabilities = self.generator._class_probabilities
+        for _ in range(5):
+            self.generator.generate_offer()
+        self.assertIs(self.generator._session, session)
+        self.assertIs(self.generator._class_probabilities, probabilities)
+
+    def test_changing_utility_values_reuses_session(self):
+        self.generator.generate_offer()
+        probabilities = self.generator._class_probabilities
+        self.generator.add_utilities({"dry": 10})
+        self.generator.generate_offer()
+        self.assertIs(self.generator._class_probabilities, probabilities)
+
+    def test_new_utility_atoms_rebuild_session(self):
+        self.generator.generate_offer()
+        probabilities = self.generator._class_probabilities
+        self.generator.add_utilities({"colour_red": 100})
+        offer = self.generator.generate_offer()
+        self.assertIsNot(self.generator._class_probabilities, probabilities)
+        self.assertEqual(offer.get_chosen_value("colour"), "red")
+
+    def test_reset_releases_session(self):
+        self.generator.generate_offer()
+        self.generator.reset_generator()
+        self.assertIsNone(self.generator._session)
+        self.assertEqual(self.generator.generated_offers, {})
+
+    def test_top_k_queues_best_offers_in_one_solve(self):
+        generator = DTPGenerator(self.neg_space, self.utilities,
+                                 self.non_agreement_cost, -1000, self.kb, top_k=5)
+        first = generator.generate_offer()
+        self.assertEqual(len(generator.offer_queue), 4)
+        offers = [first] + [generator.offer_queue[-i] for i in range(1, 5)]
+        utils = [self.evaluator.calc_offer_utility(offer) for offer in offers]
+        expected = sorted((self.evaluator.calc_offer_utility(offer)
+                           for offer in self.all_offers()), reverse=True)[:5]
+        for util, expected_util in zip(utils, expected):
+            self.assertAlmostEqual(util, expected_util)
+
+    def test_top_k_respects_acceptability_threshold(self):
+        generator = DTPGenerator(self.neg_space, self.utilities,
+                                 self.non_agreement_cost, 30, self.kb, top_k=100)
+        offers = set()
+        with self.assertRaises(StopIteration):
+            while True:
+                offers.add(generator.generate_offer())
+        acceptable = [offer for offer in self.all_offers()
+                      if self.evaluator.calc_offer_utility(offer) >= 30]
+        self.assertEqual(offers, set(acceptable))
+
+    def test_top_k_has_to_be_positive(self):
+        with self.assertRaises(ValueError):
+            DTPGenerator(self.neg_space, self.utilities,
+                         self.non_agreement_cost, -1000, self.kb, top_k=0)
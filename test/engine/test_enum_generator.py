@@ -3,10 +3,25 @@ from functools import reduce
 from numpy import arange
 
 from pyneg.comms import Offer
-from pyneg.engine import EnumGenerator, LinearEvaluator
+from pyneg.engine import EnumGenerator, Evaluator, LinearEvaluator
 from pyneg.utils import neg_scenario_from_util_matrices, nested_dict_from_atom_dict
 
 
+class OpaqueEvaluator(Evaluator):
+    """
+    Hides a LinearEvaluator from the generator so it has to evaluate every candidate.
+    """
+    def __init__(self, evaluator):
+        super().__init__()
+        self.evaluator = evaluator
+
+    def calc_offer_utility(self, offer):
+        return self.evaluator.calc_offer_utility(offer)
+
+    def calc_assignment_util(self, issue, value):
+        return self.evaluator.calc_assignment_util(issue, value)
+
+
 class TestEnumGenerator(TestCase):
 
     def setUp(self):
@@ -152,5 +167,46 @@ class TestEnumGenerator(TestCase):
 
         print("\n".join(map(str,transcript)))
 
+    def test_incremental_utilities_match_full_evaluation(self):
+        opaque_generator = EnumGenerator(
+            self.issues, self.utilities, OpaqueEvaluator(self.evaluator),
+            self.arbitrary_reservation_value)
+        opaque_generator.init_generator()
+
+        # exact ties may come out in a different order so compare utilities
+        # and the offers generated overall
+        offers, opaque_offers = [], []
+        while self.generator.active:
+            try:
+                offers.append(self.generator.generate_offer())
+            except StopIteration:
+                break
+            opaque_offers.append(opaque_generator.generate_offer())
 
+        with self.assertRaises(StopIteration):
+            opaque_generator.generate_offer()
+        self.assertEqual(set(offers), set(opaque_offers))
+        for offer, opaque_offer in zip(offers, opaque_offers):
+            self.assertAlmostEqual(self.evaluator.calc_offer_utility(offer),
+                                   self.evaluator.calc_offer_utility(opaque_offer))
+
+    def test_does_not_repropose_offers_after_utility_update(self):
+        first_offer = self.generator.generate_offer()
+        second_offer = self.generator.generate_offer()
+        self.generator.add_utilities({"issue0_0": -1.0})
 
+        offer_list = []
+        while True:
+            try:
+                offer_list.append(self.generator.generate_offer())
+            except StopIteration:
+                break
+
+        self.assertNotIn(first_offer, offer_list)
+        self.assertNotIn(second_offer, offer_list)
+        self.assertEqual(len(offer_list), len(set(offer_list)))
+
+    def test_reinitialising_forgets_proposed_offers(self):
+        first_offer = self.generator.generate_offer()
+        self.generator.init_generator()
+        self.assertEqual(first_offer, self.generator.generate_offer())
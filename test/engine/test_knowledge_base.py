@@ -0,0 +1,101 @@
+from unittest import TestCase
+
+from pyneg.comms import AtomicConstraint, Offer
+from pyneg.engine import (CachingEvaluator, ConstrainedDTPGenerator, EnumGenerator, Engine,
+                          KnowledgeBase, LinearEvaluator)
+
+
+class TestKnowledgeBase(TestCase):
+
+    def setUp(self):
+        self.neg_space = {
+            "boolean": ["True", "False"],
+            "integer": [str(i) for i in range(5)],
+        }
+        self.utilities = {"boolean_True": 10, "integer_3": 5}
+        self.knowledge = KnowledgeBase(self.utilities, neg_space=self.neg_space)
+        self.offer = Offer({
+            "boolean": {"True": 1.0, "False": 0.0},
+            "integer": {str(i): float(i == 3) for i in range(5)},
+        })
+
+    def test_copies_initial_utilities(self):
+        self.knowledge.add_utilities({"integer_1": 1})
+        self.assertEqual(self.utilities, {"boolean_True": 10, "integer_3": 5})
+
+    def test_updates_in_place(self):
+        utilities = self.knowledge.utilities
+        previous = self.knowledge.add_utilities({"boolean_True": 3, "integer_1": 1})
+
+        self.assertEqual(previous, {"boolean_True": 10})
+        self.assertIs(self.knowledge.utilities, utilities)
+        self.assertEqual(utilities, {"boolean_True": 3, "integer_3": 5, "integer_1": 1})
+
+        previous = self.knowledge.set_utilities({"integer_4": 2})
+        self.assertEqual(previous, {"boolean_True": 3, "integer_3": 5, "integer_1": 1})
+        self.assertIs(self.knowledge.utilities, utilities)
+        self.assertEqual(utilities, {"integer_4": 2})
+
+    def test_version_changes_only_when_something_changes(self):
+        version = self.knowledge.version
+        self.knowledge.add_utilities({"boolean_True": 10})
+        self.knowledge.set_utilities(dict(self.utilities))
+        self.knowledge.set_rules([])
+        self.knowledge.add_constraints(set())
+        self.assertEqual(self.knowledge.version, version)
+
+        self.knowledge.add_utilities({"boolean_True": 11})
+        self.knowledge.set_rules(["boolean_True :- integer_3."])
+        self.knowledge.add_constraints({AtomicConstraint("integer", "4")})
+        self.assertEqual(self.knowledge.version, version + 3)
+
+    def test_notifies_listeners(self):
+        changes = []
+        self.knowledge.subscribe(changes.append)
+
+        self.knowledge.add_utilities({"boolean_True": 10})
+        self.knowledge.add_utilities({"boolean_True": 3})
+        self.knowledge.add_constraints({AtomicConstraint("integer", "4")})
+        self.knowledge.add_constraints({AtomicConstraint("integer", "4")})
+        self.knowledge.set_rules(["boolean_True :- integer_3."])
+        self.knowledge.unsubscribe(changes.append)
+        self.knowledge.add_utilities({"boolean_True": 4})
+
+        self.assertEqual(len(changes), 3)
+        self.assertEqual(changes[0].utilities, {"boolean_True": 3})
+        self.assertEqual(changes[0].previous_utilities, {"boolean_True": 10})
+        self.assertEqual(changes[1].constraints, {AtomicConstraint("integer", "4")})
+        self.assertTrue(changes[2].rules)
+        self.assertEqual(changes[2].version, self.knowledge.version - 1)
+
+    def test_generator_shares_knowledge_of_evaluator(self):
+        evaluator = LinearEvaluator(self.utilities, {"boolean": 1, "integer": 1}, -1000)
+        generator = EnumGenerator(self.neg_space, self.utilities, evaluator, 0)
+        engine = Engine(generator, evaluator)
+
+        self.assertIs(engine.knowledge, evaluator.knowledge)
+        self.assertTrue(generator.shares_knowledge(evaluator))
+
+        version = engine.knowledge.version
+        engine.add_utilities({"integer_3": 20})
+        self.assertEqual(engine.knowledge.version, version + 1)
+        self.assertEqual(evaluator.calc_offer_utility(self.offer), 30)
+        self.assertEqual(generator.generate_offer(), self.offer)
+
+    def test_caching_evaluator_notices_shared_changes(self):
+        evaluator = CachingEvaluator(
+            LinearEvaluator(self.utilities, {"boolean": 1, "integer": 1}, -1000))
+        generator = EnumGenerator(self.neg_space, self.utilities, evaluator, 0)
+
+        self.assertEqual(evaluator.calc_offer_utility(self.offer), 15)
+        generator.add_utilities({"integer_3": 20})
+        self.assertEqual(evaluator.calc_offer_utility(self.offer), 30)
+
+    def test_constrained_dtp_generator_shares_knowledge_with_its_evaluator(self):
+        generator = ConstrainedDTPGenerator(self.neg_space, self.utilities, -100, -50,
+                                            [], -1000, set(), auto_constraints=False)
+
+        self.assertTrue(generator.shares_knowledge(generator.evaluator))
+        generator.add_constraint(AtomicConstraint("integer", "3"))
+        self.assertEqual(len(generator.constraints), 1)
+        self.assertIn(AtomicConstraint("integer", "3"), generator.evaluator.constraints)
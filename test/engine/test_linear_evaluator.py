@@ -1,6 +1,8 @@
 from unittest import TestCase
 
-from pyneg.comms import Offer
+import numpy as np
+
+from pyneg.comms import CompactOffer, NegSpaceSchema, Offer
 from pyneg.engine import LinearEvaluator, Strategy
 
 
@@ -77,3 +79,35 @@ class TestLinearEvaluator(TestCase):
                                                   1 * 0.1) / 3
         self.assertAlmostEqual(self.evaluator.calc_strat_utility(
             self.uniform_strat), expected_uniform_strat_util)
+
+    def test_calc_offer_utilities_matches_single_offer_utility(self):
+        schema = NegSpaceSchema(self.neg_space)
+        utils = self.evaluator.calc_offer_utilities(
+            [self.nested_test_offer, self.optimal_offer], schema)
+        self.assertAlmostEqual(utils[0], self.evaluator.calc_offer_utility(self.nested_test_offer))
+        self.assertAlmostEqual(utils[1], self.evaluator.calc_offer_utility(self.optimal_offer))
+
+    def test_calc_offer_utilities_of_index_matrix(self):
+        schema = NegSpaceSchema(self.neg_space)
+        indices = np.array([[0, 2, 6], [0, 9, 1], [1, 5, 0]])
+        utils = self.evaluator.calc_offer_utilities(indices, schema)
+        for row, util in zip(indices, utils):
+            self.assertAlmostEqual(
+                util, self.evaluator.calc_offer_utility(CompactOffer(schema, row)))
+
+    def test_calc_offer_utilities_infers_schema_from_compact_offers(self):
+        schema = NegSpaceSchema(self.neg_space)
+        offer = CompactOffer.from_offer(schema, self.optimal_offer)
+        self.assertAlmostEqual(self.evaluator.calc_offer_utilities([offer])[0],
+                               100 / 3 + 100 / 3 + 1 / 3)
+
+    def test_calc_offer_utilities_without_schema_raises(self):
+        with self.assertRaises(ValueError):
+            self.evaluator.calc_offer_utilities([self.optimal_offer])
+
+    def test_utility_matrix_is_updated_with_utilities(self):
+        schema = NegSpaceSchema(self.neg_space)
+        self.evaluator.calc_offer_utilities([self.optimal_offer], schema)
+        self.evaluator.add_utilities({"boolean_True": 400})
+        self.assertAlmostEqual(self.evaluator.calc_offer_utilities([self.optimal_offer], schema)[0],
+                               400 / 3 + 100 / 3 + 1 / 3)
@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+from numpy import arange
+
+from pyneg.agent import NegotiationSession
+from pyneg.agent.agent_factory import (make_constrained_linear_concession_agent,
+                                       make_linear_concession_agent)
+from pyneg.comms import AtomicConstraint
+from pyneg.engine import InMemoryMetrics, TimingHistogram
+from pyneg.utils import neg_scenario_from_util_matrices
+
+
+class TestTimingHistogram(TestCase):
+
+    def test_keeps_summary_statistics(self):
+        histogram = TimingHistogram()
+        for seconds in [1e-6, 3e-6, 1e-3, 2e-3]:
+            histogram.record(seconds)
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.total, 3.004e-3)
+        self.assertAlmostEqual(histogram.mean, 0.751e-3)
+        self.assertEqual(histogram.min, 1e-6)
+        self.assertEqual(histogram.max, 2e-3)
+
+    def test_percentiles_are_bucket_upper_bounds(self):
+        histogram = TimingHistogram()
+        for _ in range(99):
+            histogram.record(3e-6)
+        histogram.record(1.0)
+        self.assertAlmostEqual(histogram.percentile(50), 4e-6)
+        self.assertAlmostEqual(histogram.percentile(99), 4e-6)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_empty_histogram(self):
+        summary = TimingHistogram().summary()
+        self.assertEqual(summary["count"], 0)
+        self.assertEqual(summary["p50"], 0)
+        self.assertEqual(summary["min"], 0)
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        u_a = arange(9).reshape((3, 3))
+        u_b = u_a[:, ::-1].copy()
+        self.neg_space, self.utils_a, self.utils_b = neg_scenario_from_util_matrices(u_a, u_b)
+        self.agent_a = make_linear_concession_agent("A", self.neg_space, self.utils_a, 0.7, -1000)
+        self.agent_b = make_linear_concession_agent("B", self.neg_space, self.utils_b, 0.7, -1000)
+
+    def test_nothing_is_measured_by_default(self):
+        self.assertIsNone(self.agent_a._engine.metrics)
+        self.assertTrue(self.agent_a.negotiate(self.agent_b))
+
+    def test_timer_records_on_exceptions(self):
+        metrics = InMemoryMetrics()
+        with self.assertRaises(StopIteration):
+            with metrics.timer("failing"):
+                raise StopIteration()
+        self.assertEqual(metrics.histograms["failing"].count, 1)
+
+    def test_negotiation_reports_rounds_and_engine_timings(self):
+        metrics = InMemoryMetrics()
+        self.agent_a.set_metrics_sink(metrics)
+        session = NegotiationSession(self.agent_a, self.agent_b, metrics=metrics)
+        self.assertTrue(session.run())
+
+        self.assertEqual(metrics.counters["negotiation.rounds"], session.rounds)
+        self.assertEqual(metrics.histograms["negotiation.round"].count, session.rounds)
+        offers_made = sum(1 for msg in session.transcript
+                          if msg.sender_name == "A" and msg.is_offer())
+        self.assertEqual(metrics.histograms["engine.generate_offer"].count, offers_made)
+        received = sum(1 for msg in session.transcript if msg.recipient_name == "A")
+        self.assertEqual(metrics.histograms["agent.receive_message"].count, received)
+        self.assertEqual(metrics.histograms["engine.accepts"].count,
+                         metrics.counters.get("engine.offers_accepted", 0)
+                         + metrics.counters.get("engine.offers_rejected", 0))
+
+        summary = metrics.summary()
+        self.assertIn("engine.generate_offer", summary["timings"])
+        self.assertEqual(metrics.summary("engine.generate_offer")["count"], offers_made)
+
+    def test_negotiate_uses_agent_sink(self):
+        metrics = InMemoryMetrics()
+        self.agent_a.set_metrics_sink(metrics)
+        self.agent_a.negotiate(self.agent_b)
+        self.assertGreater(metrics.counters["negotiation.rounds"], 0)
+
+        metrics.reset()
+        self.agent_a.set_metrics_sink(None)
+        self.assertIsNone(self.agent_a._engine.metrics)
+
+    def test_reports_constraint_handling(self):
+        agent_a = make_constrained_linear_concession_agent(
+            "A", self.neg_space, self.utils_a, 0.5, -1000,
+            initial_constraints={AtomicConstraint("issue0", "2")})
+        agent_b = make_constrained_linear_concession_agent(
+            "B", self.neg_space, self.utils_b, 0.5, -1000,
+            initial_constraints={AtomicConstraint("issue1", "2")})
+        metrics = InMemoryMetrics()
+        agent_a.set_metrics_sink(metrics)
+        agent_b.set_metrics_sink(metrics)
+        agent_a.negotiate(agent_b)
+
+        self.assertGreater(metrics.histograms["engine.find_violated_constraint"].count, 0)
+        self.assertGreater(metrics.histograms["engine.add_constraint"].count, 0)
+        self.assertGreater(metrics.counters["engine.violations_found"], 0)
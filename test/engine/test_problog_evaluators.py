@@ -1,5 +1,10 @@
+# pylint: disable=protected-access
+from itertools import product
 from unittest import TestCase
 
+from problog import get_evaluatable
+from problog.program import PrologString
+
 from pyneg.comms import Offer
 from pyneg.engine import ProblogEvaluator
 from pyneg.engine import Strategy
@@ -110,3 +115,63 @@ class TestProblogEvaluator(TestCase):
         })
         util = self.evaluator.calc_offer_utility(offer)
         self.assertAlmostEqual(util, 43)
+
+    def test_reuses_compiled_model_between_offers(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        compiled_model = self.evaluator._compiled_model
+        self.assertIsNotNone(compiled_model)
+        self.evaluator.calc_offer_utility(self.optimal_offer)
+        self.assertIs(self.evaluator._compiled_model, compiled_model)
+
+    def test_compiled_model_agrees_with_compiling_every_offer(self):
+        for offer in [self.nested_test_offer, self.optimal_offer]:
+            model = self.evaluator.compile_problog_model(offer)
+            probabilities = {str(atom): prob for atom, prob in
+                             get_evaluatable("sdd").create_from(
+                                 PrologString(model)).evaluate().items()}
+            self.assertEqual(probabilities,
+                             self.evaluator.calc_probabilities_of_utilities(offer))
+
+    def test_recompiles_when_knowledge_base_changes(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        compiled_model = self.evaluator._compiled_model
+        self.evaluator.knowledge_base.append("boolean_True :- integer_3.")
+        self.assertEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 100)
+        self.assertIsNot(self.evaluator._compiled_model, compiled_model)
+
+    def test_recompiles_when_utility_atoms_change(self):
+        self.evaluator.calc_offer_utility(self.nested_test_offer)
+        compiled_model = self.evaluator._compiled_model
+        self.evaluator.set_utilities({**self.evaluator.utilities, "'float_0.6'": 5})
+        self.assertEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 105)
+        self.assertIsNot(self.evaluator._compiled_model, compiled_model)
+
+    def test_compiled_model_handles_knowledge_base_defining_decision_facts(self):
+        self.evaluator.knowledge_base.append("0.5::integer_3.")
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(self.nested_test_offer), 105)
+        self.assertIsNotNone(self.evaluator._compiled_model)
+
+    def test_compiled_model_handles_aliased_decision_facts(self):
+        neg_space = {"a": ["x", "y", "z"], "b": ["1", "2"], "c": ["p", "q"]}
+        kb = ["bad :- b_2.", "0.7::lucky.", "good :- lucky, a_y.", "good :- c_q, \\+ a_x."]
+        self.evaluator = ProblogEvaluator(
+            neg_space, {"bad": -5, "good": 7, "b_1": 1}, self.non_agreement_cost, kb)
+        offer = Offer({"a": {"x": 1, "y": 0, "z": 0},
+                       "b": {"1": 1, "2": 0},
+                       "c": {"p": 1, "q": 0}})
+        self.assertEqual(self.evaluator.calc_probabilities_of_utilities(offer)["bad"], 0.0)
+        self.assertAlmostEqual(self.evaluator.calc_offer_utility(offer), 1.0)
+        self.assertIsNotNone(self.evaluator._compiled_model)
+        self.assertEqual(self.evaluator.get_relevant_values(),
+                         {"a": {"x", "y"}, "b": {"1", "2"}, "c": {"q"}})
+        for a, b, c in product(*neg_space.values()):
+            offer = Offer({issue: {value: int(value == chosen) for value in neg_space[issue]}
+                           for issue, chosen in zip(neg_space, (a, b, c))})
+            model = self.evaluator.compile_problog_model(offer)
+            probabilities = {str(atom): prob for atom, prob in
+                             get_evaluatable("sdd").create_from(
+                                 PrologString(model)).evaluate().items()}
+            compiled = self.evaluator.calc_probabilities_of_utilities(offer)
+            self.assertEqual(probabilities.keys(), compiled.keys())
+            for atom, prob in probabilities.items():
+                self.assertAlmostEqual(prob, compiled[atom])
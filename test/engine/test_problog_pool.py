@@ -0,0 +1,158 @@
+import threading
+import time
+from unittest import TestCase
+
+from pyneg.comms import AtomicConstraint, Offer
+from pyneg.engine import (ConstrainedProblogEvaluator, DTPGenerator,
+                          ProblogEvaluator, ProblogPool)
+
+
+class TestProblogPool(TestCase):
+    # pylint: disable=protected-access
+
+    def setUp(self):
+        self.neg_space = {
+            "umbrella": ["True", "False"],
+            "raincoat": ["True", "False"],
+            "colour": ["red", "blue"]
+        }
+        self.utilities = {
+            "broken_umbrella": -40,
+            "raincoat_True": -20,
+            "umbrella_True": -2,
+            "dry": 60
+        }
+        self.kb = [
+            "broken_umbrella:- umbrella_True, rain, wind.",
+            "dry:- rain, raincoat_True.",
+            "dry:- rain, umbrella_True, not broken_umbrella.",
+            "dry:- not(rain).",
+            "0.3::rain.",
+            "0.5::wind."
+        ]
+        self.non_agreement_cost = -1000
+        self.offer = Offer({
+            "umbrella": {"True": 1.0, "False": 0.0},
+            "raincoat": {"True": 0.0, "False": 1.0},
+            "colour": {"red": 1.0, "blue": 0.0}
+        })
+        self.pool = ProblogPool(max_workers=2, max_solves=3)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def worker_pids(self):
+        return {worker.process.pid for worker in self.pool._idle}
+
+    def test_evaluator_in_pool_matches_local_evaluator(self):
+        local = ProblogEvaluator(self.neg_space, self.utilities,
+                                 self.non_agreement_cost, self.kb)
+        pooled = ProblogEvaluator(self.neg_space, self.utilities,
+                                  self.non_agreement_cost, self.kb, pool=self.pool)
+        self.assertAlmostEqual(pooled.calc_offer_utility(self.offer), 43)
+        self.assertEqual(pooled.calc_probabilities_of_utilities(self.offer),
+                         local.calc_probabilities_of_utilities(self.offer))
+
+    def test_constrained_evaluator_checks_constraints_locally(self):
+        evaluator = ConstrainedProblogEvaluator(
+            self.neg_space, self.utilities, self.non_agreement_cost,
+            self.kb, -2000, set(), pool=self.pool)
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.offer), 43)
+        evaluator.add_constraint(AtomicConstraint("colour", "red"))
+        self.assertEqual(evaluator.calc_offer_utility(self.offer), self.non_agreement_cost)
+
+    def test_workers_are_recycled_after_max_solves(self):
+        evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                     self.non_agreement_cost, self.kb, pool=self.pool)
+        evaluator.calc_offer_utility(self.offer)
+        first_pids = self.worker_pids()
+        for _ in range(2):
+            evaluator.calc_offer_utility(self.offer)
+        self.assertEqual(self.pool.recycled, 1)
+        self.assertEqual(self.pool.solves, 3)
+
+        evaluator.calc_offer_utility(self.offer)
+        self.assertTrue(first_pids.isdisjoint(self.worker_pids()))
+
+    def test_workers_are_recycled_above_rss_limit(self):
+        pool = ProblogPool(max_workers=1, max_solves=None, max_rss=1)
+        try:
+            evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                         self.non_agreement_cost, self.kb, pool=pool)
+            evaluator.calc_offer_utility(self.offer)
+            evaluator.calc_offer_utility(self.offer)
+            self.assertEqual(pool.recycled, 2)
+        finally:
+            pool.close()
+
+    def test_dtp_generator_in_pool_matches_local_generator(self):
+        local = DTPGenerator(self.neg_space, self.utilities,
+                             self.non_agreement_cost, -1000, self.kb, top_k=8)
+        pooled = DTPGenerator(self.neg_space, self.utilities,
+                              self.non_agreement_cost, -1000, self.kb, top_k=8, pool=self.pool)
+        self.assertEqual([local.generate_offer() for _ in range(8)],
+                         [pooled.generate_offer() for _ in range(8)])
+        self.assertIsNone(pooled._session)
+
+    def test_errors_are_raised_in_caller(self):
+        evaluator = ProblogEvaluator(self.neg_space, self.utilities, self.non_agreement_cost,
+                                     ["this is not valid problog"], pool=self.pool)
+        with self.assertRaises(Exception):
+            evaluator.calc_offer_utility(self.offer)
+        # the worker should still be usable afterwards
+        evaluator.knowledge_base = self.kb
+        self.assertAlmostEqual(evaluator.calc_offer_utility(self.offer), 43)
+
+    def test_closed_pool_refuses_work(self):
+        self.pool.close()
+        evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                     self.non_agreement_cost, self.kb, pool=self.pool)
+        with self.assertRaises(RuntimeError):
+            evaluator.calc_offer_utility(self.offer)
+
+    def test_threads_waiting_for_recycled_workers_are_served(self):
+        pool = ProblogPool(max_workers=1, max_solves=1)
+        evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                     self.non_agreement_cost, self.kb, pool=pool)
+        results = []
+
+        def evaluate():
+            for _ in range(3):
+                results.append(evaluator.calc_offer_utility(self.offer))
+
+        threads = [threading.Thread(target=evaluate, daemon=True) for _ in range(2)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+                self.assertFalse(thread.is_alive())
+        finally:
+            pool.close()
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(pool.solves, 6)
+        self.assertEqual(pool.recycled, 6)
+
+    def test_close_releases_waiting_threads(self):
+        pool = ProblogPool(max_workers=1)
+        evaluator = ProblogEvaluator(self.neg_space, self.utilities,
+                                     self.non_agreement_cost, self.kb, pool=pool)
+        busy_worker = pool._acquire()
+        errors = []
+
+        def evaluate():
+            try:
+                evaluator.calc_offer_utility(self.offer)
+            except RuntimeError as err:
+                errors.append(err)
+
+        thread = threading.Thread(target=evaluate, daemon=True)
+        thread.start()
+        time.sleep(0.1)
+        pool.close()
+        thread.join(10)
+        pool._release(busy_worker, None)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
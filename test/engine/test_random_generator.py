@@ -1,7 +1,7 @@
 from unittest import TestCase
 
 from pyneg.comms import Offer
-from pyneg.engine import RandomGenerator, ProblogEvaluator
+from pyneg.engine import RandomGenerator, ProblogEvaluator, LinearEvaluator
 
 
 class TestRandomGenerator(TestCase):
@@ -61,3 +61,48 @@ class TestRandomGenerator(TestCase):
         for _ in range(20):
             offer_list.append(self.generator.generate_offer())
         self.assertFalse(all([offer_list[i] == offer_list[i + 1] for i in range(len(offer_list)-1)]))
+
+    def test_never_samples_values_without_probability(self):
+        self.generator.strategy.set_prob("boolean", "False", 0)
+        self.generator.strategy.set_prob("boolean", "True", 1)
+        samples = self.generator._sample_indices(
+            self.generator._cumulative_distributions(), 500)
+        true_index = self.generator.schema.value_index("boolean", "True")
+        boolean_index = self.generator.schema.issue_index("boolean")
+        self.assertTrue((samples[:, boolean_index] == true_index).all())
+
+    def test_samples_all_values_of_uniform_strategy(self):
+        samples = self.generator._sample_indices(
+            self.generator._cumulative_distributions(), 1000)
+        for i, cardinality in enumerate(self.generator.schema.cardinalities()):
+            self.assertEqual(set(samples[:, i]), set(range(cardinality)))
+
+    def test_generates_acceptable_offers_with_vectorized_evaluator(self):
+        evaluator = LinearEvaluator(
+            self.utilities, {issue: 1 for issue in self.neg_space}, self.non_agreement_cost)
+        generator = RandomGenerator(
+            self.neg_space, self.utilities, evaluator, self.non_agreement_cost,
+            self.kb, 150, self.max_rounds, batch_size=10)
+        for _ in range(10):
+            offer = generator.generate_offer()
+            self.assertGreaterEqual(evaluator.calc_offer_utility(offer), 150)
+
+    def test_scores_candidates_in_bulk_only_if_evaluator_supports_batch(self):
+        class CountingEvaluator(LinearEvaluator):
+            batches = 0
+
+            def calc_offer_utilities(self, batch, schema=None):
+                self.batches += 1
+                return super().calc_offer_utilities(batch, schema)
+
+        evaluator = CountingEvaluator(
+            self.utilities, {issue: 1 for issue in self.neg_space}, self.non_agreement_cost)
+        generator = RandomGenerator(
+            self.neg_space, self.utilities, evaluator, self.non_agreement_cost,
+            self.kb, 0, self.max_rounds, batch_size=10)
+        generator.generate_offer()
+        self.assertEqual(evaluator.batches, 1)
+
+        evaluator.supports_batch = False
+        generator.generate_offer()
+        self.assertEqual(evaluator.batches, 1)
@@ -0,0 +1,89 @@
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+
+from pyneg.agent import (NegotiationSession, make_linear_concession_agent,
+                         make_linear_random_agent)
+from pyneg.engine import InMemoryMetrics
+from pyneg.tournament import AgentSpec, make_jobs, run_negotiation, run_tournament
+from pyneg.utils import generate_random_scenario, neg_scenario_from_util_matrices
+
+
+class TestTournament(TestCase):
+
+    def setUp(self):
+        self.non_agreement_cost = -1000
+        self.concession_spec = AgentSpec(
+            make_linear_concession_agent,
+            {"reservation_value": 0.5, "non_agreement_cost": self.non_agreement_cost})
+        self.random_spec = AgentSpec(
+            make_linear_random_agent,
+            {"reservation_value": 0.5, "non_agreement_cost": self.non_agreement_cost},
+            "random")
+        self.scenarios = [generate_random_scenario((3, 3), 1, rng=seed) for seed in range(3)]
+
+    def test_creates_job_for_every_ordered_pair_in_every_scenario(self):
+        jobs = make_jobs(self.scenarios, [self.concession_spec, self.random_spec])
+        self.assertEqual(len(jobs), 3 * 4)
+        self.assertEqual([job.job_id for job in jobs], list(range(12)))
+        self.assertEqual({job.scenario_id for job in jobs}, {0, 1, 2})
+
+    def test_accepts_scenarios_with_neg_spaces(self):
+        scenarios = [neg_scenario_from_util_matrices(*scenario) for scenario in self.scenarios]
+        jobs = make_jobs(scenarios, [self.concession_spec], matchups=[(0, 0)])
+        self.assertEqual(len(jobs), 3)
+        self.assertEqual(jobs[0].neg_space, scenarios[0][0])
+
+    def test_result_of_successful_negotiation(self):
+        job = make_jobs(self.scenarios, [self.concession_spec], matchups=[(0, 0)])[0]
+        result = run_negotiation(job)
+        self.assertTrue(result.success)
+        self.assertGreater(result.rounds, 0)
+        self.assertGreater(result.utility_a, self.non_agreement_cost)
+        self.assertGreater(result.wall_time, 0)
+        self.assertEqual(result.name_a, "make_linear_concession_agent")
+
+    def test_rounds_are_counted_like_the_session_and_metrics(self):
+        for job in make_jobs(self.scenarios, [self.concession_spec, self.random_spec], rng=42):
+            agent_a = job.spec_a.build("A", job.neg_space, job.utilities_a, job.rng_a)
+            agent_b = job.spec_b.build("B", job.neg_space, job.utilities_b, job.rng_b)
+            metrics = InMemoryMetrics()
+            session = NegotiationSession(agent_a, agent_b, metrics=metrics)
+            session.run()
+            result = run_negotiation(job)
+            self.assertEqual(result.rounds, session.rounds)
+            self.assertEqual(result.rounds, metrics.counters["negotiation.rounds"])
+
+    def test_failed_negotiation_gets_non_agreement_cost(self):
+        impossible_spec = AgentSpec(
+            make_linear_concession_agent,
+            {"reservation_value": 1.1, "non_agreement_cost": self.non_agreement_cost})
+        job = make_jobs(self.scenarios, [impossible_spec], matchups=[(0, 0)])[0]
+        result = run_negotiation(job)
+        self.assertFalse(result.success)
+        self.assertEqual(result.utility_a, self.non_agreement_cost)
+        self.assertEqual(result.utility_b, self.non_agreement_cost)
+
+    def test_runs_every_job_in_process_pool(self):
+        jobs = make_jobs(self.scenarios, [self.concession_spec, self.random_spec], rng=42)
+        results = list(run_tournament(jobs, max_workers=2, chunksize=5))
+        self.assertEqual(sorted(result.job_id for result in results), list(range(len(jobs))))
+
+    def test_seeded_jobs_give_same_results_in_and_out_of_process(self):
+        jobs = make_jobs(self.scenarios, [self.random_spec], rng=42)
+        serial = sorted(run_tournament(jobs, max_workers=1))
+        in_processes = sorted(run_tournament(jobs, max_workers=2, chunksize=2))
+        # everything but the wall time
+        self.assertEqual([result[:-1] for result in serial],
+                         [result[:-1] for result in in_processes])
+
+    def test_seeded_jobs_give_same_results_in_threads(self):
+        jobs = make_jobs(self.scenarios, [self.random_spec], rng=42)
+        serial = sorted(run_tournament(jobs, max_workers=1))
+        with ThreadPoolExecutor(2) as executor:
+            threaded = sorted(run_tournament(jobs, executor=executor, chunksize=2))
+        self.assertEqual([result[:-1] for result in serial],
+                         [result[:-1] for result in threaded])
+
+    def test_rejects_invalid_chunksize(self):
+        with self.assertRaises(ValueError):
+            list(run_tournament([], chunksize=0))
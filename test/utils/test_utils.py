@@ -1,10 +1,12 @@
 import unittest
+from itertools import product
 
 import numpy as np
 
 
 
 from pyneg.utils import generate_binary_utility_matrices, count_acceptable_offers, neg_scenario_from_util_matrices
+from pyneg.utils import generate_random_scenario, make_rng, spawn_rngs
 
 
 class TestUtils(unittest.TestCase):
@@ -80,6 +82,42 @@ class TestUtils(unittest.TestCase):
             u_a, u_b, self.standard_n / 2, self.standard_n / 2 + 1)
         self.assertTrue(both == 0)
 
+    def test_counts_match_enumeration_with_weights(self):
+        rng = np.random.default_rng(0)
+        u_a = rng.integers(-5, 10, (4, 5)).astype(float)
+        u_b = rng.random((4, 5))
+        w_a = rng.random(4)
+        w_b = rng.random(4)
+        value_indices = np.array(list(product(*[range(5) for _ in range(4)])))
+        utils_a = (u_a[np.arange(4), value_indices] * w_a).sum(axis=1)
+        utils_b = (u_b[np.arange(4), value_indices] * w_b).sum(axis=1)
+        a_accepts = utils_a >= 0.4 * utils_a.max()
+        b_accepts = utils_b >= 0.6 * utils_b.max()
+        expected = (a_accepts.sum(), b_accepts.sum(), (a_accepts & b_accepts).sum())
+        for chunk_size in [1, 7, 2 ** 16]:
+            self.assertEqual(count_acceptable_offers(
+                u_a, u_b, 0.4, 0.6, w_a, w_b, chunk_size=chunk_size), expected)
+
+    def test_histogram_method_is_exact_for_binary_matrices(self):
+        u_a, u_b = generate_binary_utility_matrices(self.u_a.shape, 2)
+        for rho in [0, 1 / 3, 0.5, 1]:
+            self.assertEqual(
+                count_acceptable_offers(u_a, u_b, rho, rho, method="histogram", resolution=1),
+                count_acceptable_offers(u_a, u_b, rho, rho))
+
+    def test_counts_large_spaces(self):
+        u_a, u_b = generate_binary_utility_matrices((10, 10), 4)
+        a, b, both = count_acceptable_offers(u_a, u_b, 0.5, 0.5, method="histogram")
+        self.assertEqual((a, b, both), (3668967424, 8337613824, 2006581248))
+        u_a, u_b = generate_binary_utility_matrices((7, 10), 3)
+        self.assertEqual(count_acceptable_offers(u_a, u_b, 0.5, 0.5, chunk_size=1000),
+                         count_acceptable_offers(u_a, u_b, 0.5, 0.5, method="histogram"))
+
+    def test_unknown_count_method_raises(self):
+        u_a, u_b = generate_binary_utility_matrices(self.u_a.shape, 1)
+        with self.assertRaises(ValueError):
+            count_acceptable_offers(u_a, u_b, 0, 0, method="sampling")
+
     def test_neg_scenario_from_util_matrices_returns_propper_types(self):
         u_a, u_b = generate_binary_utility_matrices(self.u_a.shape, 1)
         issues, utils_a, utils_b = neg_scenario_from_util_matrices(u_a, u_b)
@@ -98,3 +136,33 @@ class TestUtils(unittest.TestCase):
         self.assertTrue(isinstance(utils_b, dict))
         self.assertTrue(isinstance(next(iter(utils_b.values())), float))
         self.assertTrue(isinstance(next(iter(utils_b.keys())), str))
+
+    def test_same_seed_generates_same_scenario(self):
+        u_a, u_b = generate_random_scenario((4, 4), 2, rng=42)
+        v_a, v_b = generate_random_scenario((4, 4), 2, rng=42)
+        self.assertTrue(np.array_equal(u_a, v_a))
+        self.assertTrue(np.array_equal(u_b, v_b))
+
+    def test_global_seed_still_makes_scenarios_reproducible(self):
+        np.random.seed(42)
+        u_a, _ = generate_random_scenario((4, 4), 2)
+        np.random.seed(42)
+        v_a, _ = generate_random_scenario((4, 4), 2)
+        self.assertTrue(np.array_equal(u_a, v_a))
+
+    def test_make_rng_passes_generators_through(self):
+        rng = make_rng(42)
+        self.assertIs(make_rng(rng), rng)
+
+    def test_spawned_rngs_are_reproducible_and_independent(self):
+        first = [rng.integers(0, 2**32, 4) for rng in spawn_rngs(42, 3)]
+        second = [rng.integers(0, 2**32, 4) for rng in spawn_rngs(42, 3)]
+        for a, b in zip(first, second):
+            self.assertTrue(np.array_equal(a, b))
+        self.assertFalse(np.array_equal(first[0], first[1]))
+
+    def test_spawning_twice_from_generator_gives_new_streams(self):
+        rng = make_rng(42)
+        first = spawn_rngs(rng, 1)[0].integers(0, 2**32, 4)
+        second = spawn_rngs(rng, 1)[0].integers(0, 2**32, 4)
+        self.assertFalse(np.array_equal(first, second))